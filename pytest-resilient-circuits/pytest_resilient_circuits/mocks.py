@@ -228,6 +228,7 @@ class BasicResilientMock(ResilientMock):
     def attachment_contents_get(self, request):
         """ Callback for GET to attachment contents """
         LOG.debug("attachment_contents_get")
+        # A file-like body, so that streamed downloads read it in chunks
         return requests_mock.create_response(request,
                                              status_code=200,
-                                             json='"abcdef"')
+                                             body=io.BytesIO(json.dumps('"abcdef"').encode("utf-8")))
@@ -35,6 +35,8 @@ class ActionMessageBase(Event):
 
         self.deferred = False
         self.message = message
+        # The message destination (queue name) that this message was received from
+        self.destination = None
         self.frame = frame
         self.context = headers.get("Co3ContextToken")
         self.action_id = message.get("action_id")
@@ -8,6 +8,8 @@ import json
 import logging
 import os.path
 import base64
+import sys
+import threading
 from collections import Callable
 from signal import SIGINT, SIGTERM
 from six import string_types
@@ -16,13 +18,16 @@ from circuits.core.manager import ExceptionWrapper
 from circuits.core.handlers import handler
 from requests.utils import DEFAULT_CA_BUNDLE_PATH
 import resilient
-from resilient import ensure_unicode
 import resilient_circuits.actions_test_component as actions_test_component
 from resilient_circuits.decorators import *  # for back-compatibility, these were previously declared here
+from resilient_circuits.decorators import shutdown_process_pool
 from resilient_circuits.rest_helper import get_resilient_client, reset_resilient_client
+from resilient_circuits import schema_snapshot
+from resilient_circuits.schema_registry import get_registry
 from resilient_circuits.action_message import ActionMessageBase, ActionMessage, \
     FunctionMessage, StatusMessage, FunctionResult
 from resilient_circuits.stomp_component import StompClient
+from resilient_circuits.bulkhead import Bulkhead, parse_limits
 from resilient_circuits.stomp_events import *
 
 LOG = logging.getLogger(__name__)
@@ -47,10 +52,111 @@ def validate_cert(cert, hostname):
     return (True, "Success")
 
 
+def get_schema(client, refresh=False):
+    """Get the schema definitions that are shared by all components.
+
+    They are read once, then shared, until `refresh` is set (or there is a new client).
+
+    :param client: A connected :class:`resilient.SimpleClient`
+    :param refresh: Read the definitions again (from the client's cache where possible)
+    :return: The process-wide :class:`resilient_circuits.schema_registry.SchemaRegistry`
+    """
+    return get_registry().load(client, refresh)
+
+
+class TaskSlot(Event):
+    """A queued function task has a slot in its bulkheads"""
+    pass
+
+
+class TaskDone(Event):
+    """A function task has finished running in the pool (fired from the pool's result thread)"""
+    pass
+
+
 class FunctionWorker(Worker):
+    """Thread pool that runs the function tasks.
+
+       A task's handler waits for the pool to signal (with a `TaskDone` event) that the task is
+       finished, so the circuits loop does no work for a task while it is running.
+
+       `function_limits` and `destination_limits` ({name: limit}) cap the number of tasks for each
+       function, or for all the functions on a message destination, that can run or be waiting for
+       a worker at once.  Tasks over the limit are held here, in order, and only queued to the pool
+       when one of the tasks before them finishes.
+    """
 
     channel = "functionworker"
 
+    def init(self, process=False, workers=None, channel=channel, function_limits=None, destination_limits=None):
+        super(FunctionWorker, self).init(process=process, workers=workers, channel=channel)
+        self._bulkheads = {}
+        self._stats_lock = threading.Lock()
+        self._busy = 0
+        self._function_stats = {}
+        self.set_limits(function_limits, destination_limits)
+
+    def set_limits(self, function_limits=None, destination_limits=None):
+        """Change the concurrency limits (on the circuits loop, e.g. in a reload handler).
+           Tasks that were waiting, and are now within the limits, are started.
+        """
+        self._limits = {"function": dict(function_limits or {}),
+                        "destination": dict(destination_limits or {})}
+        for (kind, name), bulkhead in self._bulkheads.items():
+            for slot in bulkhead.set_limit(self._limits[kind].get(name, sys.maxsize)):
+                self._grant(slot)
+
+    def stats(self):
+        """Worker statistics.
+
+        :return: A dict with the number of "workers", the number that are "busy", the number of tasks
+          "queued" (waiting for their bulkheads, or for a worker), and for each function ("functions"),
+          the number of its tasks that are "running" and "queued".
+        """
+        with self._stats_lock:
+            functions = dict((name, dict(stats)) for name, stats in self._function_stats.items())
+            busy = self._busy
+        return {"workers": self.workers,
+                "busy": busy,
+                "queued": sum(stats["queued"] for stats in functions.values()),
+                "functions": functions}
+
+    def _task_bulkheads(self, event):
+        """The bulkheads that limit this task"""
+        bulkheads = []
+        for kind, name in (("function", getattr(event, "function_name", None)),
+                           ("destination", getattr(event, "destination", None))):
+            if name is not None and ((kind, name) in self._bulkheads or name in self._limits[kind]):
+                bulkhead = self._bulkheads.get((kind, name))
+                if bulkhead is None:
+                    bulkhead = self._bulkheads[(kind, name)] = Bulkhead(self._limits[kind][name])
+                bulkheads.append(bulkhead)
+        return bulkheads
+
+    def _update_stats(self, name, queued=0, running=0):
+        with self._stats_lock:
+            stats = self._function_stats.setdefault(name, {"running": 0, "queued": 0})
+            stats["queued"] += queued
+            stats["running"] += running
+            self._busy += running
+
+    def _run(self, name, f, args, kwargs):
+        """On the worker thread: run the task, counting it as running.
+           Returns its result, or an ExceptionWrapper if it raised.
+        """
+        self._update_stats(name, queued=-1, running=1)
+        try:
+            return f(*args, **kwargs)
+        except Exception as e:
+            return ExceptionWrapper(e)
+        finally:
+            self._update_stats(name, running=-1)
+
+    def _task_done(self, done, result):
+        """On the pool's result thread: post the task's result back to the circuits loop"""
+        done.result = result
+        self.fire(done, self.channel)
+
     @handler("signal", channel="*")
     def _on_signal(self, signo, stack):
         """Add a signal handler to the worker processes otherwise they swallow SIGINT, SIGTERM
@@ -61,15 +167,59 @@ class FunctionWorker(Worker):
             raise SystemExit(0)
 
     @handler("task", override=True)
-    def _on_task(self, f, *args, **kwargs):
+    def _on_task(self, event, f, *args, **kwargs):
         LOG.debug("Task: %s", f)
-        result = self.pool.apply_async(f, args, kwargs)
-        while not result.ready():
-            yield
+        name = getattr(event, "function_name", None) or getattr(f, "__name__", str(f))
+        self._update_stats(name, queued=1)
+        # Take a slot (or a place in the queue) in each bulkhead now, so tasks get their turn in order
+        slots = []
+        for bulkhead in self._task_bulkheads(event):
+            slot = TaskSlot()
+            slot.granted = bulkhead.acquire(slot)
+            slots.append((bulkhead, slot))
+        return self._run_task(name, slots, f, args, kwargs)
+
+    def _run_task(self, name, slots, f, args, kwargs):
+        """Wait for the task's bulkhead slots, then run it in the pool"""
+        done = None
         try:
-            yield result.get()
-        except Exception as e:
-            yield ExceptionWrapper(e)
+            for bulkhead, slot in slots:
+                if not slot.granted:
+                    LOG.debug("Task %s waiting for its concurrency limit", name)
+                    yield self.wait(slot, self.channel)
+            done = TaskDone()
+            self.pool.apply_async(self._run, (name, f, args, kwargs),
+                                  callback=lambda result: self._task_done(done, result))
+            # Parked until the pool fires `done`, rather than polling the result on every tick
+            yield self.wait(done, self.channel)
+        finally:
+            # The task is finished (or abandoned): give its slots to the next tasks
+            if done is None:
+                self._update_stats(name, queued=-1)
+            for bulkhead, slot in slots:
+                if slot.granted:
+                    self._release(bulkhead)
+                else:
+                    bulkhead.waiting.remove(slot)
+        # Circuits sends the wait's value back into this generator, and only checks the value
+        # yielded *next* for an ExceptionWrapper, so give the result a step of its own
+        yield
+        yield done.result
+
+    def _release(self, bulkhead):
+        slot = bulkhead.release()
+        if slot is not None:
+            self._grant(slot)
+
+    def _grant(self, slot):
+        slot.granted = True
+        self.fire(slot, self.channel)
+
+
+class SchemaRefreshedEvent(Event):
+    """Event: the schema definitions changed on the server (see schema_snapshot)"""
+    def __init__(self, changed_uris):
+        super(SchemaRefreshedEvent, self).__init__(changed_uris=changed_uris)
 
 
 class ResilientComponent(BaseComponent):
@@ -136,24 +286,28 @@ class ResilientComponent(BaseComponent):
                             LOG.warn("Function '{0}' is not defined in this Resilient platform!".format(func_name))
 
     def _get_fields(self):
-        """Get Incident and Action fields"""
-        client = self.rest_client()
-        self._fields = dict((field["name"], field)
-                            for field in client.cached_get("/types/incident/fields"))
-        self._action_fields = dict((field["name"], field)
-                                   for field in client.cached_get("/types/actioninvocation/fields"))
-        self._destinations = dict((dest["id"], dest)
-                                  for dest in client.cached_get("/message_destinations")["entities"])
-        try:
-            self._functions = {}
-            for func in client.cached_get("/functions")["entities"]:
-                self._functions[func["name"]] = client.cached_get("/functions/{}".format(func["name"]))
-            self._function_fields = dict((field["name"], field)
-                                         for field in client.cached_get("/types/__function/fields"))
-        except resilient.SimpleHTTPException:
-            # functions are not available, pre-v30 server
-            self._functions = None
-            self._function_fields = None
+        """Get Incident and Action fields (shared by all components)"""
+        get_schema(self.rest_client())
+
+    @property
+    def _fields(self):
+        return get_registry().fields
+
+    @property
+    def _action_fields(self):
+        return get_registry().action_fields
+
+    @property
+    def _function_fields(self):
+        return get_registry().function_fields
+
+    @property
+    def _functions(self):
+        return get_registry().functions
+
+    @property
+    def _destinations(self):
+        return get_registry().destinations
 
     def rest_client(self):
         """Return a connected instance of the :class:`resilient.SimpleClient`
@@ -184,12 +338,7 @@ class ResilientComponent(BaseComponent):
 
     def get_field_label(self, fieldname, value_id):
         """Get the label for an incident-field value id"""
-        field = self._fields[fieldname]
-        for value in field["values"]:
-            if value["enabled"]:
-                if value["value"] == value_id:
-                    return value["label"]
-        return value_id
+        return get_registry().get_field_label(fieldname, value_id)
 
     def get_action_field(self, fieldname):
         """Get the definition of an action-field"""
@@ -201,12 +350,7 @@ class ResilientComponent(BaseComponent):
 
     def get_action_field_label(self, fieldname, value_id):
         """Get the label for an action-field value id"""
-        field = self._action_fields[fieldname]
-        for value in field["values"]:
-            if value["enabled"]:
-                if value["value"] == value_id:
-                    return value["label"]
-        return ensure_unicode(value_id)  # fallback
+        return get_registry().get_action_field_label(fieldname, value_id)
 
     def get_function_field(self, fieldname):
         """Get the definition of a function input field (parameter)"""
@@ -218,14 +362,7 @@ class ResilientComponent(BaseComponent):
 
     def get_function_field_label(self, fieldname, value_id):
         """Get the label for a function input-field value id"""
-        if self._function_fields is None:
-            return None
-        field = self._function_fields[fieldname]
-        for value in field["values"]:
-            if value["enabled"]:
-                if value["value"] == value_id:
-                    return value["label"]
-        return ensure_unicode(value_id)  # fallback
+        return get_registry().get_function_field_label(fieldname, value_id)
 
     @staticmethod
     def get_select_param(value):
@@ -249,6 +386,11 @@ class ResilientComponent(BaseComponent):
         self.opts = opts
         self._get_fields()
 
+    @handler("SchemaRefreshedEvent")
+    def _schema_refreshed(self, event, changed_uris):
+        """Event handler called when the schema snapshot was refreshed with changes from the server."""
+        self._get_fields()
+
 
 class Actions(ResilientComponent):
     """Component that subscribes to Resilient Action Module queues and fires message events"""
@@ -277,11 +419,22 @@ class Actions(ResilientComponent):
         self.subscribe_headers = None
         self._configure_opts(opts)
 
+        # Tell all the components when the schema snapshot is refreshed with changes
+        schema_snapshot.add_listener(self._on_schema_changed)
+
+        # Pause the message queues while the REST API circuit breaker is open
+        self._circuit_breaker = None
+        self._queues_paused = False
+        self._probe_timer = None
+        self._watch_circuit_breaker()
+
         _retry_timer = Timer(RETRY_TIMER_INTERVAL, Event.create("retry_failed_deliveries"), persist=True)
         _retry_timer.register(self)
 
         # Make a worker thread-pool that will run functions
-        self._functionworker = FunctionWorker(process=False, channel="functionworker")
+        self._functionworker = FunctionWorker(process=False, workers=opts.get("num_workers"), channel="functionworker",
+                                              function_limits=parse_limits(opts.get("function_concurrency")),
+                                              destination_limits=parse_limits(opts.get("destination_concurrency")))
         self._functionworker.register(self.root)
 
         if opts.get("test_actions", False):
@@ -310,11 +463,71 @@ class Actions(ResilientComponent):
         rest_client = self.rest_client()
         self.org_id = rest_client.org_id
 
-        list_action_defs = rest_client.get("/actions")["entities"]
+        list_action_defs = rest_client.cached_get("/actions")["entities"]
         self.action_defs = dict((int(action["id"]), action) for action in list_action_defs)
 
         self.subscribe_headers = {"activemq.prefetchSize": opts["stomp_prefetch_limit"]}
 
+    def _watch_circuit_breaker(self):
+        """Listen to the REST client's circuit breaker (if it has one)"""
+        breaker = getattr(self.rest_client(), "circuit_breaker", None)
+        if breaker is not self._circuit_breaker:
+            if self._circuit_breaker:
+                self._circuit_breaker.remove_listener(self._on_circuit_breaker_state)
+            if breaker:
+                breaker.add_listener(self._on_circuit_breaker_state)
+            self._circuit_breaker = breaker
+
+    def _on_circuit_breaker_state(self, old_state, new_state):
+        """Called on the thread whose REST request changed the circuit breaker state"""
+        self.fire(Event.create("circuit_breaker_state", state=new_state))
+
+    @handler("circuit_breaker_state")
+    def _circuit_breaker_state(self, event, state):
+        """The REST API circuit breaker changed state: pause the message queues while it is open"""
+        if state == "open" and not self._queues_paused:
+            LOG.warn("Resilient REST API is failing; pausing the message queues")
+            self._queues_paused = True
+            for queue_name in self.listeners:
+                self._unsubscribe(queue_name)
+            if self._probe_timer is None:
+                # While paused, nothing makes requests; probe the server to find when it recovers
+                self._probe_timer = Timer(self._circuit_breaker.reset_timeout,
+                                          Event.create("circuit_breaker_probe"), persist=True)
+                self._probe_timer.register(self)
+        elif state == "closed" and self._queues_paused:
+            LOG.info("Resilient REST API has recovered; resuming the message queues")
+            self._queues_paused = False
+            if self._probe_timer is not None:
+                self._probe_timer.unregister()
+                self._probe_timer = None
+            self.fire(Event.create("subscribe_to_all"))
+
+    @handler("circuit_breaker_probe")
+    def _circuit_breaker_probe(self, event):
+        """Send a probe request (on a worker thread), if the circuit breaker allows one"""
+        if self._queues_paused and self._circuit_breaker and self._circuit_breaker.state == "half-open":
+            self.fire(task(self._probe_rest_api), "functionworker")
+
+    def _probe_rest_api(self):
+        try:
+            get_resilient_client(self.opts).get_const()
+        except Exception as exc:
+            LOG.info("Resilient REST API probe failed: %s", exc)
+
+    def _on_schema_changed(self, changed_uris):
+        """Called on a background thread, when the schema snapshot has changes from the server"""
+        get_schema(get_resilient_client(self.opts), refresh=True)
+        self.fire(SchemaRefreshedEvent(changed_uris), "*")
+
+    @handler("SchemaRefreshedEvent")
+    def _schema_refreshed(self, event, changed_uris):
+        """Event handler called when the schema snapshot was refreshed with changes from the server."""
+        super(Actions, self)._schema_refreshed(event, changed_uris)
+        if "/actions" in changed_uris:
+            list_action_defs = self.rest_client().get("/actions")["entities"]
+            self.action_defs = dict((int(action["id"]), action) for action in list_action_defs)
+
     # Public Utility methods
 
     def action_name(self, action_id):
@@ -425,6 +638,7 @@ class Actions(ResilientComponent):
                                           message=message,
                                           frame=event.frame,
                                           log_dir=self.logging_directory)
+                event.destination = queue_name
                 LOG.info("Event: %s Channel: %s", event, channel)
 
                 self.fire(event, channel)
@@ -491,16 +705,23 @@ class Actions(ResilientComponent):
 
         # Set up a STOMP connection to the Resilient action services
         if not self.stomp_component:
-            self.stomp_component = StompClient(self.opts["host"], self.opts["stomp_port"],
-                                               username=self.opts["email"],
-                                               password=self.opts["password"],
-                                               heartbeats=(STOMP_CLIENT_HEARTBEAT,
-                                                           STOMP_SERVER_HEARTBEAT),
-                                               connected_timeout=STOMP_TIMEOUT,
-                                               connect_timeout=STOMP_TIMEOUT,
-                                               ssl_context=context,
-                                               ca_certs=ca_certs,  # For old ssl version
-                                               **self._proxy_args)
+            stomp_client_class = StompClient
+            if self.opts.get("stomp_transport") == "asyncio":
+                if sys.version_info >= (3, 5):
+                    from resilient_circuits.stomp_async import AsyncStompClient
+                    stomp_client_class = AsyncStompClient
+                else:
+                    LOG.warn("stomp_transport=asyncio requires Python 3.5 or higher; using sync")
+            self.stomp_component = stomp_client_class(self.opts["host"], self.opts["stomp_port"],
+                                                      username=self.opts["email"],
+                                                      password=self.opts["password"],
+                                                      heartbeats=(STOMP_CLIENT_HEARTBEAT,
+                                                                  STOMP_SERVER_HEARTBEAT),
+                                                      connected_timeout=STOMP_TIMEOUT,
+                                                      connect_timeout=STOMP_TIMEOUT,
+                                                      ssl_context=context,
+                                                      ca_certs=ca_certs,  # For old ssl version
+                                                      **self._proxy_args)
             self.stomp_component.register(self)
         else:
             # Component exists, just update it
@@ -563,7 +784,7 @@ class Actions(ResilientComponent):
                              type(component).__module__, type(component).__name__, func_name)
                     continue
                 queue_id = self._functions[func_name]["destination_handle"]
-                queue_name = self._destinations[queue_id]["programmatic_name"]
+                queue_name = get_registry().get_destination_name(queue_id)
                 LOG.info("'%s.%s' function '%s' registered to '%s'",
                          type(component).__module__, type(component).__name__, func_name, queue_name)
             else:
@@ -583,6 +804,9 @@ class Actions(ResilientComponent):
         """ Subscribe to all message queues """
         if not self.stomp_component:
             return
+        if self._queues_paused:
+            LOG.info("Not subscribing to message queues while the Resilient REST API is failing")
+            return
         if not self.stomp_component.connected:
             yield self.wait("Connected", timeout=30)
             if not self.stomp_component.connected:
@@ -596,6 +820,9 @@ class Actions(ResilientComponent):
         """A component is unregistering.  Unsubscribe its message queue(s)."""
         LOG.debug("component %s has unregistered", component)
         if self is component:
+            schema_snapshot.remove_listener(self._on_schema_changed)
+            if self._circuit_breaker:
+                self._circuit_breaker.remove_listener(self._on_circuit_breaker_state)
             LOG.info("disconnecting Actions component from stomp queue")
             self.disconnect()
             self.reconnect_stomp = False
@@ -603,6 +830,7 @@ class Actions(ResilientComponent):
                 # TODO: Confirm the stomp component gets garbage collected automatically
                 self.stomp_component.unregister()
                 self.stomp_component = None
+            shutdown_process_pool()
 
         for channel in event.channels:
             if not str(channel).startswith("actions."):
@@ -827,8 +1055,15 @@ class Actions(ResilientComponent):
     def reload(self, event, opts):
         """New config, reconnect to stomp if required"""
         event.success = False
+        # Re-read the shared schema once; the other components will use it when they reload
+        get_schema(get_resilient_client(opts), refresh=True)
         super(Actions, self).reload(event, opts)
+        # Read the action definitions from the server, not from the cache (which may be primed from a snapshot)
+        get_resilient_client(opts).cache.invalidate("/actions")
         self._configure_opts(opts)
+        self._functionworker.set_limits(parse_limits(opts.get("function_concurrency")),
+                                        parse_limits(opts.get("destination_concurrency")))
+        self._watch_circuit_breaker()
         if self.stomp_component:
             self.fire(Disconnect(flush=True, reconnect=False))
             yield self.wait("Disconnect_success")
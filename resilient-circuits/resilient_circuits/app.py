@@ -58,6 +58,12 @@ class AppArgumentParser(keyring_arguments.ArgumentParser):
         default_stomp_port = self.getopt("resilient", "stomp_port") or self.DEFAULT_STOMP_PORT
         # For some environments the STOMP TLS certificate will be different from the REST API cert
         default_stomp_cafile = self.getopt("resilient", "stomp_cafile") or None
+        # STOMP transport: "sync" (stompest), or "asyncio" (Python 3.5 or higher)
+        default_stomp_transport = self.getopt("resilient", "stomp_transport") or "sync"
+        # Function worker threads, and concurrency limits (e.g. "fn_yara_scan:2, fn_pdf_parse:4")
+        default_num_workers = self.getopt("resilient", "num_workers") or None
+        default_function_concurrency = self.getopt("resilient", "function_concurrency") or None
+        default_destination_concurrency = self.getopt("resilient", "destination_concurrency") or None
 
         default_no_prompt_password = self.getopt("resilient",
                                                  "no_prompt_password") or self.DEFAULT_NO_PROMPT_PASS
@@ -71,6 +77,7 @@ class AppArgumentParser(keyring_arguments.ArgumentParser):
         default_test_port = self.getopt("resilient", "test_port") or None
         default_log_responses = self.getopt("resilient",
                                             "log_http_responses") or ""
+        default_schema_snapshot = self.getopt("resilient", "schema_snapshot") or None
         logging.getLogger().removeHandler(temp_handler)
 
         self.add_argument("--stomp-port",
@@ -82,6 +89,25 @@ class AppArgumentParser(keyring_arguments.ArgumentParser):
                           action="store",
                           default=default_stomp_cafile,
                           help="Resilient server STOMP TLS certificate")
+        self.add_argument("--stomp-transport",
+                          type=str,
+                          choices=["sync", "asyncio"],
+                          default=default_stomp_transport,
+                          help="STOMP connection implementation (asyncio requires Python 3.5 or higher)")
+        self.add_argument("--num-workers",
+                          type=int,
+                          default=default_num_workers,
+                          help="Number of worker threads that run functions")
+        self.add_argument("--function-concurrency",
+                          type=str,
+                          default=default_function_concurrency,
+                          help=("Maximum concurrent tasks for each function, "
+                                "e.g. 'fn_yara_scan:2, fn_pdf_parse:4'"))
+        self.add_argument("--destination-concurrency",
+                          type=str,
+                          default=default_destination_concurrency,
+                          help=("Maximum concurrent tasks for all the functions on each message destination, "
+                                "e.g. 'fn_third_party:4'"))
         self.add_argument("--componentsdir",
                           type=str,
                           default=default_components_dir,
@@ -133,6 +159,11 @@ class AppArgumentParser(keyring_arguments.ArgumentParser):
                           default=default_log_responses,
                           help=("Log all responses from Resilient "
                                 "REST API to this directory"))
+        self.add_argument("--schema-snapshot",
+                          type=str,
+                          default=default_schema_snapshot,
+                          help=("File to save the Resilient schema definitions, "
+                                "for faster startup"))
 
     def parse_args(self, args=None, namespace=None):
         """Parse commandline arguments and construct an opts dictionary"""
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright IBM Corp. 2010, 2018. All Rights Reserved.
+
+"""Concurrency limits ("bulkheads") for function tasks, so that one slow function can't take every worker"""
+
+from collections import deque
+
+
+def parse_limits(limits):
+    """Parse concurrency limits.
+
+    >>> sorted(parse_limits("fn_yara_scan:2, fn_pdf_parse: 4").items())
+    [('fn_pdf_parse', 4), ('fn_yara_scan', 2)]
+
+    :param limits: Comma-separated `name:limit` pairs (or a dict of them)
+    :return: dict of {name: maximum concurrent tasks}
+    """
+    if not limits:
+        return {}
+    if isinstance(limits, dict):
+        return dict((name, int(limit)) for name, limit in limits.items())
+    parsed = {}
+    for rule in limits.split(","):
+        rule = rule.strip()
+        if rule:
+            name, _, limit = rule.rpartition(":")
+            name = name.strip()
+            if not name:
+                raise ValueError(u"Invalid concurrency limit '{0}', expected name:limit".format(rule))
+            parsed[str(name)] = int(limit)
+    return parsed
+
+
+class Bulkhead(object):
+    """Allows up to `limit` tasks at once.  Other tasks wait, and get their turn in the order they arrived.
+
+    A waiting task is represented by a `waiter` (any object); when a slot is released, it is handed
+    straight to the first waiter, which the caller then wakes.  A bulkhead is not thread-safe: it is
+    used from the circuits loop.
+    """
+
+    def __init__(self, limit):
+        self.limit = max(1, limit)
+        self.active = 0
+        self.waiting = deque()
+
+    def acquire(self, waiter):
+        """Take a slot if one is free (returns True), otherwise queue the waiter (returns False)"""
+        if self.active < self.limit and not self.waiting:
+            self.active += 1
+            return True
+        self.waiting.append(waiter)
+        return False
+
+    def release(self):
+        """Give up a slot.  Returns the waiter that now has it, to be woken, or None."""
+        if self.waiting and self.active <= self.limit:
+            return self.waiting.popleft()
+        self.active -= 1
+        return None
+
+    def set_limit(self, limit):
+        """Change the limit.  Returns the waiters that now have a slot, to be woken."""
+        self.limit = max(1, limit)
+        woken = []
+        while self.waiting and self.active < self.limit:
+            self.active += 1
+            woken.append(self.waiting.popleft())
+        return woken
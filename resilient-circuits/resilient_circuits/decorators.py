@@ -5,20 +5,153 @@
 
 import logging
 import threading
+import multiprocessing
+import pickle
+import weakref
 from inspect import getargspec
 from functools import wraps
 from types import GeneratorType
-from circuits import Timer, task, Event
+import six
+from six.moves import queue
+from circuits import BaseComponent, Timer, task, Event
 import circuits.core.handlers
-from resilient_circuits.action_message import FunctionResult, \
+from resilient_circuits.action_message import FunctionMessage, FunctionResult, \
     StatusMessage, StatusMessageEvent, \
-    FunctionError_, FunctionErrorEvent
+    FunctionError_, FunctionException_, FunctionErrorEvent
 
 LOG = logging.getLogger(__name__)
 
 # for convenience we alias the circuits 'handler'
 handler = circuits.core.handlers.handler
 
+EXECUTORS = ("thread", "process")
+
+# How often to check that a function's child process is still running (seconds)
+PROCESS_POLL_INTERVAL = 1.0
+
+# The process pool for @function(executor="process"), created when first needed
+_process_pool = None
+_process_manager = None
+_process_pool_lock = threading.Lock()
+
+# Attributes of every circuits component, which are not copied to the child process
+_component_attributes = None
+# For each component, whether each of its attributes can be sent to the child process
+_picklable_attributes = weakref.WeakKeyDictionary()
+_picklable_attributes_lock = threading.Lock()
+
+
+def _process_context():
+    """The multiprocessing context for the pool.
+
+       The pool is started from a worker thread, so the child processes are spawned rather than
+       forked: a fork would copy the locks held by the other threads (circuits, STOMP, logging...).
+    """
+    if hasattr(multiprocessing, "get_context"):
+        return multiprocessing.get_context("spawn")
+    return multiprocessing  # Python 2 can only fork
+
+
+def _get_process_pool():
+    """The process pool (and a multiprocessing manager, for the results queues)"""
+    global _process_pool, _process_manager
+    with _process_pool_lock:
+        if _process_pool is None:
+            context = _process_context()
+            _process_manager = context.Manager()
+            _process_pool = context.Pool()
+            LOG.info("Started function process pool")
+        return _process_pool, _process_manager
+
+
+def shutdown_process_pool():
+    """Stop the process pool used by @function(executor="process"), if it was started"""
+    global _process_pool, _process_manager
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.terminate()
+            _process_pool.join()
+            _process_manager.shutdown()
+            _process_pool = _process_manager = None
+            LOG.info("Stopped function process pool")
+
+
+def _component_state(component):
+    """The instance attributes of a component that can be sent to a child process.
+       The circuits internals (parent, handlers, queue...) are left behind.
+       Each attribute is only test-pickled the first time it is seen.
+    """
+    global _component_attributes
+    with _picklable_attributes_lock:
+        if _component_attributes is None:
+            _component_attributes = set(vars(BaseComponent()))
+        picklable = _picklable_attributes.setdefault(component, {})
+        state = {}
+        for name, value in list(vars(component).items()):
+            if name in _component_attributes:
+                continue
+            if name not in picklable:
+                try:
+                    pickle.dumps(value)
+                    picklable[name] = True
+                except Exception:
+                    LOG.debug("Attribute '%s' of %s is not available in the child process", name, component)
+                    picklable[name] = False
+            if picklable[name]:
+                state[name] = value
+        return state
+
+
+class _TaskDone(object):
+    """Sent by the child process after the last result"""
+
+
+def _run_in_process(component_class, state, func_name, headers, message, results, args, kwargs):
+    """In the child process: call the function with a copy of the component and event,
+       and send each value that it yields to the `results` queue.
+    """
+    itself = component_class.__new__(component_class)
+    itself.__dict__.update(state)
+    func = getattr(component_class, func_name).handler_function
+    event = FunctionMessage(headers=headers, message=message)
+    try:
+        task_result_or_gen = func(itself, event, *args, **kwargs)
+        if not isinstance(task_result_or_gen, GeneratorType):
+            task_result_or_gen = [task_result_or_gen]
+        for val in task_result_or_gen:
+            if isinstance(val, FunctionException_):
+                # Raise the wrapped exception (the traceback can't be sent to the parent)
+                six.reraise(*val.args)
+            results.put(val)
+            if isinstance(val, FunctionError_):
+                break
+    finally:
+        results.put(_TaskDone())
+
+
+def _process_task_results(itself, func, event, args, kwargs):
+    """On the worker thread: run the function in the process pool,
+       and yield each value as it is yielded in the child process.
+    """
+    pool, manager = _get_process_pool()
+    results = manager.Queue()
+    async_result = pool.apply_async(_run_in_process,
+                                    (type(itself), _component_state(itself), func.__name__,
+                                     event.hdr(), event.message, results, args, kwargs))
+    while True:
+        try:
+            val = results.get(timeout=PROCESS_POLL_INTERVAL)
+        except queue.Empty:
+            if async_result.ready():
+                # The child process finished without sending all its results
+                break
+            continue
+        if isinstance(val, _TaskDone):
+            break
+        yield val
+    # Raise the exception from the child process, if there was one
+    async_result.get()
+
 
 class function(object):
     """Creates a Function Handler.
@@ -27,12 +160,29 @@ class function(object):
     It marks the method as a handler for the events passed as arguments to the :func:`function` decorator.
     Specify the function's API name as parameter to the decorator.
     The function handler will automatically be subscribed to the function's message destination.
+
+    By default the function runs on a worker thread.  For CPU-bound functions, specify
+    `executor="process"` to run it in a process pool instead:
+
+    .. code-block:: python
+
+        @function("the_function_name", executor="process")
+        def _any_method_name(self, event, *args, **kwargs):
+            ...
+
+    In the child process, `self` is a copy of the component (with its picklable attributes, such as
+    `self.opts`) that is not connected to the circuits manager, so the function can't fire events;
+    and `event` is a copy of the :class:`FunctionMessage`, rebuilt from its headers and message.
+    Yielded :class:`StatusMessage`, :class:`FunctionResult` and :class:`FunctionError_` values are
+    sent back to the parent as they are produced.
     """
     # This is an extended version of circuits.core.handlers:handler
 
     def __init__(self, *args, **kwargs):
         if len(args) != 1:
             raise ValueError("Usage: @function(api_name)")
+        if kwargs.get("executor", "thread") not in EXECUTORS:
+            raise ValueError("Usage: @function(api_name, executor='thread' or 'process')")
         self.names = args
         self.kwargs = kwargs
 
@@ -48,6 +198,7 @@ class function(object):
         func.priority = self.kwargs.get("priority", 0)
         func.channel = self.kwargs.get("channel", ",".join(["functions.{}".format(name) for name in self.names]))
         func.override = self.kwargs.get("override", False)
+        func.executor = self.kwargs.get("executor", "thread")
 
         args = getargspec(func)[0]
 
@@ -62,6 +213,8 @@ class function(object):
             function_parameters = event.message.get("inputs", {})
 
             def _the_task(event, *args, **kwargs):
+                if func.executor == "process":
+                    return _process_task_results(itself, func, event, args, kwargs)
                 return func(itself, event, *args, **kwargs)
 
             def _call_the_task(evt, **kwds):
@@ -98,10 +251,15 @@ class function(object):
                 return result_list
 
             the_task = task(_call_the_task, event, **function_parameters)
+            # For the worker's concurrency limits
+            the_task.function_name = event.name
+            the_task.destination = event.destination
             ret = yield itself.call(the_task, "functionworker")
             xxx = ret.value
             # Return value is the result_list that was yielded from the wrapped function
             yield xxx
+        # The undecorated function, for the child process to call
+        decorated.handler_function = func
         return decorated
 
 
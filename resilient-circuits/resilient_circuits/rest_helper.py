@@ -4,22 +4,37 @@
 
 """Global accessor for the Resilient REST API"""
 
+import threading
 import resilient
+from resilient_circuits import schema_snapshot
 
 resilient_client = None
 connection_opts = None
+# The REST API circuit breaker, kept when the client is reset so that its state (and listeners) are not lost
+circuit_breaker = None
+# Held while the client is created, so that threads share one client
+_client_lock = threading.RLock()
 
 
 def reset_resilient_client():
     """Reset the cached client"""
     global resilient_client
-    resilient_client = None
+    with _client_lock:
+        resilient_client = None
 
 
 def get_resilient_client(opts):
-    """Get a connected instance of SimpleClient for Resilient REST API"""
+    """Get a connected instance of SimpleClient for Resilient REST API.
+       The client is shared by all threads.
+    """
+    with _client_lock:
+        return _get_resilient_client(opts)
+
+
+def _get_resilient_client(opts):
     global resilient_client
     global connection_opts
+    global circuit_breaker
 
     new_opts = (opts.get("cafile"),
                 opts.get("org"),
@@ -32,9 +47,16 @@ def get_resilient_client(opts):
                 opts.get("email"))
     if new_opts != connection_opts:
         resilient_client = None
+        circuit_breaker = None
         connection_opts = new_opts
     if resilient_client:
         return resilient_client
 
     resilient_client = resilient.get_client(opts)
+    if getattr(resilient_client, "circuit_breaker", None) is not None:
+        if circuit_breaker is None:
+            circuit_breaker = resilient_client.circuit_breaker
+        else:
+            resilient_client.circuit_breaker = circuit_breaker
+    schema_snapshot.attach(resilient_client, opts)
     return resilient_client
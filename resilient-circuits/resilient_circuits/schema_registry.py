@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright IBM Corp. 2010, 2018. All Rights Reserved.
+
+"""Process-wide registry of the Resilient type definitions, with indexes for fast lookups"""
+
+import logging
+import threading
+import time
+import resilient
+from resilient import ensure_unicode
+
+LOG = logging.getLogger(__name__)
+
+INCIDENT_FIELDS = "/types/incident/fields"
+ACTION_FIELDS = "/types/actioninvocation/fields"
+DESTINATIONS = "/message_destinations"
+FUNCTIONS = "/functions"
+FUNCTION_FIELDS = "/types/__function/fields"
+
+
+def _raise_if_exception(result):
+    """Utility for results of get_many: raise the error for a URI that failed, otherwise return its value"""
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+class FieldIndex(object):
+    """The definitions of one type's fields, indexed by name, and the labels of their select values"""
+
+    def __init__(self, field_defs):
+        self.fields = dict((field["name"], field) for field in field_defs)
+        # {(field name, value id): label} and {(field name, label): value id}, for enabled values
+        self.labels = {}
+        self.value_ids = {}
+        for field in field_defs:
+            for value in field.get("values") or []:
+                if value["enabled"]:
+                    self.labels.setdefault((field["name"], value["value"]), value["label"])
+                    self.value_ids.setdefault((field["name"], value["label"]), value["value"])
+
+    def label(self, fieldname, value_id, default):
+        """The label for a field's value id, or `default`.  Raises KeyError if there is no such field."""
+        if fieldname not in self.fields:
+            raise KeyError(fieldname)
+        try:
+            return self.labels.get((fieldname, value_id), default)
+        except TypeError:
+            # not a single value id (e.g. a list from a multi-select)
+            return default
+
+    def value_id(self, fieldname, label):
+        """The value id for a field's label.  Raises KeyError if there is no such field or label."""
+        return self.value_ids[(fieldname, label)]
+
+
+class SchemaRegistry(object):
+    """The type definitions (fields, message destinations and functions) from the Resilient server.
+
+    There is one registry per process (see :func:`get_registry`), shared by reference by all
+    the components.  :meth:`load` reads the definitions; when they are loaded again, only the
+    parts that changed are re-indexed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._client = None
+        self._responses = {}
+        self._incident = FieldIndex([])
+        self._action = FieldIndex([])
+        self._function = None
+        self.destinations = {}
+        self.destination_names = {}
+        self.functions = None
+
+    @property
+    def fields(self):
+        """Incident field definitions, by name"""
+        return self._incident.fields
+
+    @property
+    def action_fields(self):
+        """Action field definitions, by name"""
+        return self._action.fields
+
+    @property
+    def function_fields(self):
+        """Function input field definitions, by name (None if the server does not have functions)"""
+        return self._function.fields if self._function else None
+
+    def load(self, client, refresh=False):
+        """Read the definitions, if they are not loaded (or `refresh` is set, or this is a different client).
+
+        :param client: A connected :class:`resilient.SimpleClient`.  The definitions are read with
+          concurrent requests, from the client's cache where possible.
+        :param refresh: Read the definitions again, and re-index any that changed
+        :return: This registry
+        """
+        with self._lock:
+            if refresh or self._client is not client:
+                start = time.time()
+                changed = self._update(client, full=self._client is not client)
+                self._client = client
+                LOG.info("Schema loaded in %.2fs (%d incident fields, %d action fields, "
+                         "%d message destinations, %s functions); changed: %s",
+                         time.time() - start, len(self.fields), len(self.action_fields), len(self.destinations),
+                         "no" if self.functions is None else len(self.functions), ", ".join(changed) or "none")
+        return self
+
+    def _update(self, client, full):
+        """Read the definitions, and rebuild the indexes for the responses that changed"""
+        responses = dict(zip([INCIDENT_FIELDS, ACTION_FIELDS, DESTINATIONS, FUNCTIONS, FUNCTION_FIELDS],
+                             client.cached_get_many([INCIDENT_FIELDS, ACTION_FIELDS, DESTINATIONS,
+                                                     FUNCTIONS, FUNCTION_FIELDS])))
+        for uri in (INCIDENT_FIELDS, ACTION_FIELDS, DESTINATIONS):
+            _raise_if_exception(responses[uri])
+        try:
+            func_names = [func["name"] for func in _raise_if_exception(responses[FUNCTIONS])["entities"]]
+            func_uris = [u"/functions/{}".format(func_name) for func_name in func_names]
+            responses.update(zip(func_uris, client.cached_get_many(func_uris)))
+            functions = dict((func_name, _raise_if_exception(responses[func_uri]))
+                             for func_name, func_uri in zip(func_names, func_uris))
+            function_fields = _raise_if_exception(responses[FUNCTION_FIELDS])
+        except resilient.SimpleHTTPException:
+            # functions are not available, pre-v30 server
+            functions = function_fields = None
+            func_uris = []
+
+        responses = dict((uri, None if isinstance(value, Exception) else value) for uri, value in responses.items())
+        changed = [uri for uri in responses if full or self._responses.get(uri) != responses[uri]]
+        if INCIDENT_FIELDS in changed:
+            self._incident = FieldIndex(responses[INCIDENT_FIELDS])
+        if ACTION_FIELDS in changed:
+            self._action = FieldIndex(responses[ACTION_FIELDS])
+        if DESTINATIONS in changed:
+            destinations = dict((dest["id"], dest) for dest in responses[DESTINATIONS]["entities"])
+            self.destination_names = dict((dest_id, dest["programmatic_name"])
+                                          for dest_id, dest in destinations.items())
+            self.destinations = destinations
+        if functions is None:
+            self._function = None
+            self.functions = None
+        else:
+            if FUNCTION_FIELDS in changed or self._function is None:
+                self._function = FieldIndex(function_fields)
+            if self.functions is None or set(changed) & set([FUNCTIONS] + func_uris):
+                self.functions = functions
+        self._responses = responses
+        return sorted(changed)
+
+    def get_field_label(self, fieldname, value_id):
+        """The label for an incident-field value id (or the value id, if it is not one of the field's values)"""
+        return self._incident.label(fieldname, value_id, value_id)
+
+    def get_action_field_label(self, fieldname, value_id):
+        """The label for an action-field value id"""
+        return self._action.label(fieldname, value_id, ensure_unicode(value_id))
+
+    def get_function_field_label(self, fieldname, value_id):
+        """The label for a function input-field value id (None if the server does not have functions)"""
+        if self._function is None:
+            return None
+        return self._function.label(fieldname, value_id, ensure_unicode(value_id))
+
+    def get_field_value(self, fieldname, label):
+        """The value id for an incident-field label"""
+        return self._incident.value_id(fieldname, label)
+
+    def get_action_field_value(self, fieldname, label):
+        """The value id for an action-field label"""
+        return self._action.value_id(fieldname, label)
+
+    def get_function_field_value(self, fieldname, label):
+        """The value id for a function input-field label"""
+        if self._function is None:
+            raise KeyError(fieldname)
+        return self._function.value_id(fieldname, label)
+
+    def get_destination_name(self, destination_id):
+        """The programmatic name of a message destination"""
+        return self.destination_names[destination_id]
+
+
+_registry = SchemaRegistry()
+
+
+def get_registry():
+    """The registry shared by all components in this process"""
+    return _registry
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright IBM Corp. 2010, 2018. All Rights Reserved.
+
+"""On-disk snapshot of the Resilient schema definitions, for fast startup.
+
+When the `schema_snapshot` option is set to a file path, the REST responses that
+describe the schema (fields, message destinations, functions and actions) are saved
+to that file.  At startup the REST client's cache is primed from the file, so that
+components can load without waiting for the server.  The snapshot is then refreshed
+from the server in the background; if anything changed, the cache is updated, and the
+listeners (see :func:`add_listener`) are told which URIs changed.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+LOG = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+# The REST endpoints (relative to the org) that define the schema.
+# Each function's definition is also included, as "/functions/<name>".
+SCHEMA_URIS = ["/types/incident/fields",
+               "/types/actioninvocation/fields",
+               "/message_destinations",
+               "/functions",
+               "/types/__function/fields",
+               "/actions"]
+
+_lock = threading.Lock()
+_current = None
+_refreshing = False
+_listeners = []
+
+
+def fetch_schema(client, cached=True):
+    """Fetch the schema definitions from the server, concurrently.
+
+    :param client: A connected :class:`resilient.SimpleClient`
+    :param cached: Use (and fill) the client's cache
+    :return: dict of {uri: response}.  URIs that could not be read (e.g. functions on a pre-v30
+      server) are left out.
+    """
+    get_many = client.cached_get_many if cached else client.get_many
+    responses = dict((uri, value) for uri, value in get_many(SCHEMA_URIS, as_dict=True).items()
+                     if not isinstance(value, Exception))
+    functions = responses.get("/functions")
+    if functions:
+        func_uris = [u"/functions/{}".format(func["name"]) for func in functions["entities"]]
+        responses.update((uri, value) for uri, value in get_many(func_uris, as_dict=True).items()
+                         if not isinstance(value, Exception))
+    return responses
+
+
+class SchemaSnapshot(object):
+    """The schema definitions from one Resilient server and org"""
+
+    def __init__(self, host, org_id, responses, saved=None):
+        """
+        :param host: The Resilient server host name
+        :param org_id: The org id
+        :param responses: dict of {uri: response}
+        :param saved: Time (seconds since the epoch) the responses were read from the server
+        """
+        self.host = host
+        self.org_id = org_id
+        self.responses = responses
+        self.saved = saved or time.time()
+
+    @classmethod
+    def load(cls, path):
+        """Read a snapshot file.
+
+        :raises ValueError: if the file is not a snapshot in the current format.
+        """
+        with open(path, "r") as snapshot_file:
+            data = json.load(snapshot_file)
+        if not isinstance(data, dict) or data.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError("Unsupported schema snapshot format")
+        return cls(data["host"], data["org_id"], data["responses"], data["saved"])
+
+    def save(self, path):
+        """Write the snapshot file (atomically, so that readers never see a partial file)."""
+        data = {"format_version": SNAPSHOT_FORMAT_VERSION,
+                "host": self.host,
+                "org_id": self.org_id,
+                "saved": self.saved,
+                "responses": self.responses}
+        directory = os.path.dirname(os.path.abspath(path))
+        handle, temp_path = tempfile.mkstemp(dir=directory, prefix=".schema_snapshot")
+        try:
+            with os.fdopen(handle, "w") as snapshot_file:
+                json.dump(data, snapshot_file)
+            if os.name == "nt" and os.path.exists(path):
+                os.remove(path)
+            os.rename(temp_path, path)
+        except Exception:
+            os.remove(temp_path)
+            raise
+
+    def is_for(self, host, org_id):
+        """Is this snapshot from the specified server and org?"""
+        return self.host == host and self.org_id == org_id
+
+    def changed_uris(self, other):
+        """The URIs whose responses differ between this snapshot and `other`"""
+        uris = set(self.responses) | set(other.responses)
+        return sorted(uri for uri in uris if self.responses.get(uri) != other.responses.get(uri))
+
+    def prime(self, client):
+        """Put the responses into the client's cache"""
+        for uri, value in self.responses.items():
+            client.cache[uri] = value
+
+
+def add_listener(callback):
+    """Register a function that is called (on a background thread) when a refresh finds that
+       the schema has changed.  It is called with the list of the URIs that changed.
+    """
+    with _lock:
+        _listeners.append(callback)
+
+
+def remove_listener(callback):
+    """Unregister a function registered by :func:`add_listener`"""
+    with _lock:
+        if callback in _listeners:
+            _listeners.remove(callback)
+
+
+def attach(client, opts):
+    """Use the schema snapshot (if the `schema_snapshot` option is set) with a new REST client.
+
+    If there is a valid snapshot, the client's cache is primed from it, and it is refreshed from
+    the server in the background (once per process).
+    Otherwise, the schema is read from the server (priming the cache), and saved.
+
+    :param client: A connected :class:`resilient.SimpleClient`
+    :param opts: The configuration options
+    """
+    global _current, _refreshing
+    path = opts.get("schema_snapshot")
+    if not path:
+        return
+    path = os.path.expanduser(path)
+    host = opts.get("host")
+
+    with _lock:
+        snapshot = _current
+        if snapshot is None and os.path.exists(path):
+            try:
+                snapshot = SchemaSnapshot.load(path)
+            except (IOError, OSError, ValueError, KeyError) as exc:
+                LOG.warn(u"Schema snapshot '%s' is not valid: %s", path, exc)
+        if snapshot is not None and not snapshot.is_for(host, client.org_id):
+            LOG.info(u"Schema snapshot '%s' is for a different server or org, not used", path)
+            snapshot = None
+        _current = snapshot
+        start_refresh = snapshot is not None and not _refreshing
+        _refreshing = _refreshing or start_refresh
+
+    if snapshot is None:
+        start = time.time()
+        snapshot = SchemaSnapshot(host, client.org_id, fetch_schema(client))
+        with _lock:
+            _current = snapshot
+        _save(snapshot, path)
+        LOG.info(u"Schema read from server in %.2fs, saved to '%s'", time.time() - start, path)
+        return
+
+    snapshot.prime(client)
+    LOG.info(u"Schema loaded from snapshot '%s'", path)
+    if start_refresh:
+        thread = threading.Thread(target=refresh, args=(client, host, path), name="schema_snapshot_refresh")
+        thread.daemon = True
+        thread.start()
+
+
+def refresh(client, host, path):
+    """Read the schema from the server, and update the client's cache, the snapshot file, and
+       the listeners, if anything changed.
+    """
+    global _current
+    try:
+        start = time.time()
+        fresh = SchemaSnapshot(host, client.org_id, fetch_schema(client, cached=False))
+        with _lock:
+            previous = _current
+            _current = fresh
+            listeners = list(_listeners)
+        changed = fresh.changed_uris(previous) if previous else sorted(fresh.responses)
+        if changed:
+            fresh.prime(client)
+            _save(fresh, path)
+            LOG.info(u"Schema snapshot refreshed in %.2fs; changed: %s", time.time() - start, u", ".join(changed))
+            for listener in listeners:
+                listener(changed)
+        else:
+            LOG.info(u"Schema snapshot is up to date (checked in %.2fs)", time.time() - start)
+    except Exception as exc:
+        LOG.warn(u"Schema snapshot refresh failed: %s", exc)
+
+
+def _save(snapshot, path):
+    try:
+        snapshot.save(path)
+    except (IOError, OSError) as exc:
+        LOG.warn(u"Could not save schema snapshot '%s': %s", path, exc)
+
+
+def reset():
+    """Forget the snapshot in memory (for tests)"""
+    global _current, _refreshing
+    with _lock:
+        _current = None
+        _refreshing = False
@@ -0,0 +1,489 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright IBM Corp. 2010, 2018. All Rights Reserved.
+
+""" Circuits component for handling Stomp Connection, using asyncio
+
+:class:`AsyncStompClient` can be used instead of :class:`resilient_circuits.stomp_component.StompClient`:
+it handles the same events.  Its connection runs on an asyncio event loop in a background thread, so
+connecting, reading, writing and heartbeats never block the circuits event loop.  Requires Python 3.5+.
+"""
+
+import asyncio
+import functools
+import logging
+import ssl
+import threading
+import traceback
+from circuits import BaseComponent
+from circuits.core.handlers import handler
+from stompest._backwards import binaryType
+from stompest.error import StompConnectionError, StompError, StompProtocolError
+from stompest.protocol import StompFrame, StompParser, StompSession, StompSpec
+from stompest.sync.client import LOG_CATEGORY
+from resilient_circuits.stomp_events import *
+from resilient_circuits.stomp_component import ACK_MODES, ACK_CLIENT_INDIVIDUAL
+
+LOG = logging.getLogger(__name__)
+
+READ_SIZE = 65536
+
+
+class ServerHeartbeatTimeout(StompConnectionError):
+    """The server has not sent anything (not even a heartbeat) for too long"""
+    pass
+
+
+def make_ssl_context(key_file=None, cert_file=None, ca_certs=None, ssl_version=ssl.PROTOCOL_SSLv23, password=None):
+    """Build an SSLContext from the old-style ssl parameters"""
+    context = ssl.SSLContext(ssl_version)
+    if cert_file:
+        context.load_cert_chain(cert_file, key_file, password)
+    if ca_certs:
+        context.load_verify_locations(ca_certs)
+        context.verify_mode = ssl.CERT_REQUIRED
+        context.check_hostname = True
+    return context
+
+
+def _proxy_socket(host, port, proxy_host, proxy_port, proxy_user, proxy_password, timeout):
+    """Open a socket to host:port through an HTTP proxy.  This blocks, so it is run in an executor."""
+    import socks
+    sock = socks.socksocket()
+    sock.set_proxy(socks.HTTP, proxy_host, proxy_port, True, username=proxy_user, password=proxy_password)
+    sock.settimeout(timeout)
+    try:
+        sock.connect((host, port))
+    except Exception:
+        sock.close()
+        raise
+    sock.setblocking(False)
+    return sock
+
+
+class AsyncStompConnection(object):
+    """A STOMP connection on an asyncio event loop.
+
+    :meth:`connect` and :meth:`disconnect` are coroutines, to run on the loop.  The methods that send
+    frames (:meth:`subscribe`, :meth:`send`, :meth:`ack`, ...) can be called from any thread: they
+    queue the frame to be written by the loop, and never block.
+
+    `on_frame(frame)` is called (on the loop) with each frame that is received, and
+    `on_disconnected(error)` when the connection is lost.
+    """
+    ALLOWANCE = 2  # multiplier for heartbeat timeouts
+
+    def __init__(self, host, port, ssl_context=None, login=None, passcode=None, version=StompSpec.VERSION_1_2,
+                 proxy_host=None, proxy_port=None, proxy_user=None, proxy_password=None,
+                 on_frame=None, on_disconnected=None, loop=None):
+        self.host = host
+        self.port = port
+        self.ssl_context = ssl_context
+        self.login = login
+        self.passcode = passcode
+        self.proxy_host = proxy_host
+        self.proxy_port = proxy_port
+        self.proxy_user = proxy_user
+        self.proxy_password = proxy_password
+        self.on_frame = on_frame or (lambda frame: None)
+        self.on_disconnected = on_disconnected or (lambda error: None)
+        self.loop = loop or asyncio.get_event_loop()
+        self.session = StompSession(version)
+        self._parser = StompParser(version)
+        self._lock = threading.Lock()
+        self._reader = None
+        self._writer = None
+        self._tasks = []
+
+    def __str__(self):
+        return "asyncio://%s:%s" % (self.host, self.port)
+
+    @property
+    def socket_connected(self):
+        return self._writer is not None
+
+    @property
+    def connected(self):
+        return self.socket_connected and self.session.state == StompSession.CONNECTED
+
+    async def connect(self, heartbeats=(0, 0), versions=None, host=None, connect_timeout=None, connected_timeout=None):
+        """Open the connection, and wait for the server's CONNECTED frame.
+           Subscriptions that were not flushed when the previous connection closed are replayed.
+
+           :raises StompConnectionError: if the connection failed
+        """
+        if self._writer is not None:
+            raise StompConnectionError("Already connected to %s" % self)
+        try:
+            self._reader, self._writer = await asyncio.wait_for(self._open(connect_timeout), connect_timeout)
+        except (OSError, asyncio.TimeoutError) as err:
+            raise StompConnectionError("Could not establish connection [%s]" % (err or "timeout"))
+        self._parser.reset()
+        try:
+            with self._lock:
+                frame = self.session.connect(self.login, self.passcode, versions=versions, host=host,
+                                             heartBeats=heartbeats)
+            self._writer.write(binaryType(frame))
+            frame = await asyncio.wait_for(self._read_frame(), connected_timeout)
+            if frame.command == StompSpec.ERROR:
+                raise StompProtocolError("Could not connect: %s" % frame.info())
+            with self._lock:
+                self.session.connected(frame)
+                self._parser.version = self.session.version
+                replay = self.session.replay()
+        except (OSError, StompError, asyncio.TimeoutError) as err:
+            self.close(flush=False)
+            if isinstance(err, StompConnectionError):
+                raise
+            raise StompConnectionError("STOMP connection failed [%s]" % (err or "timeout"))
+        for destination, headers, receipt, context in replay:
+            self.subscribe(destination, headers, receipt, context)
+        LOG.info("Client HB: %s  Server HB: %s", self.session.clientHeartBeat, self.session.serverHeartBeat)
+        self._tasks = [self.loop.create_task(self._read_frames())]
+        if self.session.clientHeartBeat:
+            self._tasks.append(self.loop.create_task(self._send_heartbeats()))
+
+    async def _open(self, timeout):
+        """Open the socket (through the proxy, if there is one), and start TLS"""
+        kwargs = {}
+        if self.ssl_context:
+            kwargs = {"ssl": self.ssl_context, "server_hostname": self.host}
+        if not self.proxy_host:
+            return await asyncio.open_connection(self.host, self.port, **kwargs)
+        LOG.info("Connecting through proxy %s", self.proxy_host)
+        sock = await self.loop.run_in_executor(None, functools.partial(_proxy_socket, self.host, self.port,
+                                                                       self.proxy_host, self.proxy_port,
+                                                                       self.proxy_user, self.proxy_password,
+                                                                       timeout))
+        return await asyncio.open_connection(sock=sock, **kwargs)
+
+    async def _read_frame(self):
+        """Read the next frame (not a heartbeat)"""
+        while True:
+            while self._parser.canRead():
+                frame = self._parser.get()
+                with self._lock:
+                    self.session.received()
+                if isinstance(frame, StompFrame):
+                    return frame
+            await self._read_data(None)
+
+    async def _read_data(self, timeout):
+        data = await asyncio.wait_for(self._reader.read(READ_SIZE), timeout)
+        if not data:
+            raise StompConnectionError("Connection closed by the server")
+        self._parser.add(data)
+
+    async def _read_frames(self):
+        """Reader task: pass each frame to on_frame, until the connection is lost"""
+        timeout = None
+        if self.session.serverHeartBeat:
+            timeout = (self.session.serverHeartBeat / 1000.0) * self.ALLOWANCE
+        try:
+            while True:
+                while self._parser.canRead():
+                    frame = self._parser.get()
+                    with self._lock:
+                        self.session.received()
+                    if isinstance(frame, StompFrame):
+                        self.on_frame(frame)
+                try:
+                    await self._read_data(timeout)
+                except asyncio.TimeoutError:
+                    raise ServerHeartbeatTimeout("No heartbeat from the server for %ss" % timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as err:
+            LOG.debug(traceback.format_exc())
+            self.close(flush=False)
+            self.on_disconnected(err)
+
+    async def _send_heartbeats(self):
+        """Heartbeat task: send heartbeats at 80% of the agreed rate"""
+        interval = (self.session.clientHeartBeat / 1000.0) * 0.8
+        while True:
+            await asyncio.sleep(interval)
+            with self._lock:
+                frame = self.session.beat()
+            self._write(binaryType(frame))
+
+    async def disconnect(self, receipt=None, flush=True):
+        """Send DISCONNECT, and close the connection"""
+        if self.connected:
+            try:
+                with self._lock:
+                    frame = self.session.disconnect(receipt)
+                self._writer.write(binaryType(frame))
+                await self._writer.drain()
+            except (OSError, StompError) as err:
+                LOG.warning("Failed to send DISCONNECT: %s", err)
+        self.close(flush=flush)
+
+    def close(self, flush=True):
+        """Close the connection (on the loop).  If not `flush`, the subscriptions are replayed on the next connect."""
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+        with self._lock:
+            self.session.close(flush)
+
+    def subscribe(self, destination, headers=None, receipt=None, context=None):
+        """Subscribe to a destination.  Returns the subscription token."""
+        with self._lock:
+            frame, token = self.session.subscribe(destination, headers, receipt, context)
+        self.send_frame(frame)
+        return token
+
+    def unsubscribe(self, token, receipt=None):
+        with self._lock:
+            frame = self.session.unsubscribe(token, receipt)
+        self.send_frame(frame)
+        return frame
+
+    def send(self, destination, body=b"", headers=None, receipt=None):
+        with self._lock:
+            frame = self.session.send(destination, body, headers, receipt)
+        self.send_frame(frame)
+
+    def ack(self, frame, receipt=None):
+        with self._lock:
+            frame = self.session.ack(frame, receipt)
+        self.send_frame(frame)
+
+    def message(self, frame):
+        """The subscription token for a MESSAGE frame"""
+        with self._lock:
+            return self.session.message(frame)
+
+    def send_frame(self, frame):
+        """Queue a frame to be written.  Can be called from any thread."""
+        if not self.socket_connected:
+            raise StompConnectionError("Not connected")
+        self.loop.call_soon_threadsafe(self._write, binaryType(frame))
+
+    def _write(self, data):
+        writer = self._writer
+        if writer is None:
+            LOG.warning("STOMP connection closed, frame not sent")
+            return
+        writer.write(data)
+        with self._lock:
+            self.session.sent()
+
+
+class AsyncStompClient(BaseComponent):
+
+    channel = "stomp"
+
+    def init(self, host, port, username=None, password=None,
+             connect_timeout=3, connected_timeout=3,
+             version=StompSpec.VERSION_1_2, accept_versions=["1.0", "1.1", "1.2"],
+             heartbeats=(0, 0), ssl_context=None,
+             use_ssl=True,
+             key_file=None,
+             cert_file=None,
+             ca_certs=None,
+             ssl_version=ssl.PROTOCOL_SSLv23,  # means 'latest available'
+             key_file_password=None,
+             proxy_host=None,
+             proxy_port=None,
+             proxy_user=None,
+             proxy_password=None,
+             channel=channel):
+        """ Initialize AsyncStompClient.  Called after __init__ """
+        self.channel = channel
+        if proxy_host:
+            LOG.info("Connect to %s:%s through proxy %s:%d", host, port, proxy_host, proxy_port)
+        else:
+            LOG.info("Connect to %s:%s", host, port)
+
+        if not use_ssl:
+            ssl_context = None
+        elif not ssl_context:
+            LOG.info("Creating SSL context from ssl parameters")
+            ssl_context = make_ssl_context(key_file=key_file, cert_file=cert_file, ca_certs=ca_certs,
+                                           ssl_version=ssl_version, password=key_file_password)
+
+        self._stomp_server = "%s://%s:%s" % ("ssl" if use_ssl else "tcp", host, port)
+        self._heartbeats = heartbeats
+        self._accept_versions = accept_versions
+        self._connect_timeout = connect_timeout
+        self._connected_timeout = connected_timeout
+        if getattr(self, "_connection", None):
+            # Re-initialized: close the previous connection
+            self._call_soon(self._connection.close)
+        else:
+            self._start_loop()
+        self._connection = AsyncStompConnection(host, port, ssl_context=ssl_context,
+                                                login=username, passcode=password, version=version,
+                                                proxy_host=proxy_host, proxy_port=proxy_port,
+                                                proxy_user=proxy_user, proxy_password=proxy_password,
+                                                on_frame=self._on_frame, on_disconnected=self._on_disconnected,
+                                                loop=self._loop)
+        self._subscribed = {}
+
+    def _start_loop(self):
+        """Run an asyncio event loop in a background thread"""
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self._loop.run_forever, name="stomp-asyncio")
+        self._loop_thread.daemon = True
+        self._loop_thread.start()
+
+    def _call_soon(self, func, *args):
+        self._loop.call_soon_threadsafe(func, *args)
+
+    def _await(self, coro):
+        """For a handler to `yield from`: run a coroutine on the asyncio loop, and wait for it
+           without blocking the circuits loop.  Returns its result (or raises its exception).
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        done = StompTaskDone()
+        future.add_done_callback(lambda _: self.fire(done, self.channel))
+        yield self.wait(done, self.channel)
+        return future.result()
+
+    @property
+    def connected(self):
+        return self._connection.connected
+
+    @property
+    def socket_connected(self):
+        return self._connection.socket_connected
+
+    @property
+    def subscribed(self):
+        return self._subscribed.keys()
+
+    @property
+    def stomp_logger(self):
+        return LOG_CATEGORY
+
+    def _on_frame(self, frame):
+        """A frame was received (called on the asyncio loop)"""
+        LOG.debug("Recieved frame %s", frame.info())
+        if frame.command == StompSpec.ERROR:
+            self.fire(OnStompError(frame, None))
+        else:
+            self.fire(Message(frame))
+
+    def _on_disconnected(self, error):
+        """The connection was lost (called on the asyncio loop)"""
+        if isinstance(error, ServerHeartbeatTimeout):
+            LOG.error("Server heartbeat timeout. %s", error)
+            self.fire(HeartbeatTimeout())
+        else:
+            LOG.error("STOMP connection lost: %s", error)
+            self.fire(OnStompError(None, error))
+            self.fire(Disconnected(reconnect=True))
+
+    @handler("Disconnect")
+    def _disconnect(self, receipt=None, flush=True, reconnect=False):
+        if flush:
+            self._subscribed = {}
+        try:
+            yield from self._await(self._connection.disconnect(receipt=receipt, flush=flush))
+        except Exception as e:
+            LOG.error("Failed to disconnect client: %s", e)
+        self.fire(Disconnected(reconnect=reconnect))
+        yield "disconnected"
+
+    @handler("Connect")
+    def connect(self, event, host=None, *args, **kwargs):
+        """ connect to Stomp server """
+        LOG.info("Connect to Stomp...")
+        try:
+            yield from self._await(self._connection.connect(heartbeats=self._heartbeats,
+                                                            versions=self._accept_versions,
+                                                            host=host,
+                                                            connect_timeout=self._connect_timeout,
+                                                            connected_timeout=self._connected_timeout))
+        except StompConnectionError as err:
+            LOG.debug("Failed to connect to %s: %s", self._stomp_server, err)
+            LOG.debug(traceback.format_exc())
+            self.fire(ConnectionFailed(self._stomp_server))
+            event.success = False
+            yield "fail"
+            return
+        LOG.info("Connected to %s", self._stomp_server)
+        self.fire(Connected())
+        yield "success"
+
+    @handler("Send")
+    def send(self, event, destination, body, headers=None, receipt=None):
+        LOG.debug("send()")
+        try:
+            self._connection.send(destination, body=body.encode('utf-8'), headers=headers, receipt=receipt)
+            LOG.debug("Message sent")
+        except (StompConnectionError, StompError) as err:
+            LOG.error("Error sending frame")
+            event.success = False
+            self.fire(OnStompError(None, err))
+            raise  # To fire Send_failure event
+
+    @handler("Subscribe")
+    def _subscribe(self, event, destination, additional_headers=None, ack=ACK_CLIENT_INDIVIDUAL):
+        if ack not in ACK_MODES:
+            raise ValueError("Invalid client ack mode specified")
+        LOG.info("Subscribe to message destination %s", destination)
+        try:
+            headers = {StompSpec.ACK_HEADER: ack,
+                       'id': destination}
+            if additional_headers:
+                headers.update(additional_headers)
+
+            # Set ID to match destination name for easy reference later
+            self._subscribed[destination] = self._connection.subscribe(destination, headers)
+        except (StompConnectionError, StompError) as err:
+            LOG.error("Failed to subscribe to queue.")
+            event.success = False
+            LOG.debug(traceback.format_exc())
+            self.fire(OnStompError(None, err))
+
+    @handler("Unsubscribe")
+    def _unsubscribe(self, event, destination):
+        if destination not in self._subscribed:
+            LOG.error("Unsubscribe Request Ignored. Not subscribed to %s", destination)
+            return
+        try:
+            token = self._subscribed.pop(destination)
+            frame = self._connection.unsubscribe(token)
+            LOG.debug("Unsubscribed: %s", frame)
+        except (StompConnectionError, StompError) as err:
+            event.success = False
+            LOG.error("Unsubscribe Failed.")
+            self.fire(OnStompError(None, err))
+
+    @handler("Message")
+    def on_message(self, event, headers, message):
+        LOG.debug("Stomp message received")
+
+    @handler("Ack")
+    def ack_frame(self, event, frame):
+        LOG.debug("ack_frame()")
+        try:
+            self._connection.ack(frame)
+            LOG.debug("Ack Sent")
+        except (StompConnectionError, StompError) as err:
+            LOG.error("Error sending ack")
+            event.success = False
+            self.fire(OnStompError(frame, err))
+            raise  # To fire Ack_failure event
+
+    @handler("prepare_unregister")
+    def _prepare_unregister(self, event, component):
+        """Stop the asyncio loop when this component is unregistered"""
+        if component is self:
+            asyncio.run_coroutine_threadsafe(self._stop_loop(), self._loop)
+
+    async def _stop_loop(self):
+        self._connection.close()
+        # Let the cancelled tasks finish before stopping
+        await asyncio.sleep(0)
+        self._loop.stop()
+
+    def get_subscription(self, frame):
+        """ Get subscription from frame """
+        _, token = self._connection.message(frame)
+        return self._subscribed[token]
@@ -4,7 +4,10 @@
 """ Circuits component for handling Stomp Connection """
 
 import logging
+import select
+import socket
 import ssl
+import threading
 import time
 import traceback
 from circuits import BaseComponent, Timer
@@ -26,6 +29,9 @@ ACK_MODES = (ACK_CLIENT_INDIVIDUAL, ACK_AUTO, ACK_CLIENT)
 
 LOG = logging.getLogger(__name__)
 
+# How often (seconds) the reader thread checks whether it should stop, while it waits for data
+READER_POLL_INTERVAL = 1.0
+
 
 class StompClient(BaseComponent):
 
@@ -85,6 +91,7 @@ class StompClient(BaseComponent):
         Stomp._transportFactory.proxy_port = proxy_port
         Stomp._transportFactory.proxy_user = proxy_user
         Stomp._transportFactory.proxy_password = proxy_password
+        self._stop_reader()
         self._client = Stomp(self._stomp_config)
         self._subscribed = {}
         self.server_heartbeat = None
@@ -118,6 +125,7 @@ class StompClient(BaseComponent):
 
     @handler("Disconnect")
     def _disconnect(self, receipt=None, flush=True, reconnect=False):
+        self._stop_reader()
         try:
             if flush:
                 self._subscribed = {}
@@ -176,6 +184,7 @@ class StompClient(BaseComponent):
                 LOG.info("Connected to %s", self._stomp_server)
                 self.fire(Connected())
                 self.start_heartbeats()
+                self._start_reader()
                 return "success"
 
         except StompConnectionError as err:
@@ -208,22 +217,67 @@ class StompClient(BaseComponent):
                 event.success = False
                 self.fire(OnStompError(None, err))
 
-    @handler("generate_events")
-    def generate_events(self, event):
-        event.reduce_time_left(0.1)
+    def _start_reader(self):
+        """Start a thread that waits for data on the connection, and wakes the circuits loop to read it"""
+        self._stop_reader()
+        self._reader_stop = threading.Event()
+        self._frames_read = threading.Event()
+        self._reader = threading.Thread(target=self._wait_for_frames,
+                                        args=(self._client._transport._socket, self._reader_stop, self._frames_read),
+                                        name="stomp-reader")
+        self._reader.daemon = True
+        self._reader.start()
+
+    def _stop_reader(self):
+        """Stop the reader thread (it exits within READER_POLL_INTERVAL)"""
+        if getattr(self, "_reader_stop", None):
+            self._reader_stop.set()
+            self._frames_read.set()
+        self._reader_stop = None
+        self._frames_read = None
+        self._reader = None
+
+    def _wait_for_frames(self, sock, stop, frames_read):
+        """Reader thread: block until the socket is readable, then fire StompReadable,
+           and wait until the circuits thread has read the frames before waiting again.
+           The socket is only read (and written) by the circuits thread.
+        """
+        while not stop.is_set():
+            try:
+                readable, _, _ = select.select([sock], [], [], READER_POLL_INTERVAL)
+            except (select.error, socket.error, ValueError) as err:
+                # The connection was closed
+                LOG.debug("Stomp reader stopped: %s", err)
+                break
+            if readable and not stop.is_set():
+                frames_read.clear()
+                self.fire(StompReadable())
+                while not frames_read.wait(READER_POLL_INTERVAL) and not stop.is_set():
+                    pass
+
+    @handler("StompReadable")
+    def read_frames(self, event):
+        """Read all the frames that are available, and fire them as a batch of events"""
         if not self.connected:
+            self._stop_reader()
             return
         try:
-            if self._client.canRead(0):
+            count = 0
+            while self.connected and self._client.canRead(0):
                 frame = self._client.receiveFrame()
                 LOG.debug("Recieved frame %s", frame)
                 if frame.command == StompSpec.ERROR:
                     self.fire(OnStompError(frame, None))
                 else:
                     self.fire(Message(frame))
+                count += 1
+            LOG.debug("Read %d frames", count)
         except (StompConnectionError, StompError) as err:
             LOG.error("Failed attempt to generate events.")
             self.fire(OnStompError(None, err))
+        finally:
+            if self._frames_read:
+                self._frames_read.set()
 
     @handler("Send")
     def send(self, event, destination, body, headers=None, receipt=None):
@@ -63,6 +63,16 @@ class Send(StompEvent):
                                    destination=destination)
 
 
+class StompReadable(StompEvent):
+    """Data has arrived on the STOMP connection"""
+    pass
+
+
+class StompTaskDone(StompEvent):
+    """A task on the STOMP connection's asyncio loop is done"""
+    pass
+
+
 class ClientHeartbeat(StompEvent):
     pass
 
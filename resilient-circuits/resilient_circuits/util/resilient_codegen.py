@@ -330,10 +330,9 @@ def codegen_from_template(client, export_file, template_file_path, package,
     else:
         # Get the most recent org export that includes actions and tasks
         export_uri = "/configurations/exports/history"
-        export_list = client.get(export_uri)["histories"]
         last_date = 0
         last_id = 0
-        for export in export_list:
+        for export in client.get_stream(export_uri, "histories.item"):
             if export["options"]["actions"] and export["options"]["phases_and_tasks"]:
                 if export["date"] > last_date:
                     last_date = export["date"]
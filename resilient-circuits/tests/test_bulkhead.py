@@ -0,0 +1,156 @@
+# (c) Copyright IBM Corp. 2010, 2018. All Rights Reserved.
+"""Tests for the function worker's concurrency limits"""
+import os
+import threading
+import time
+import pytest
+from circuits import Manager, task
+from resilient_circuits.actions_component import FunctionWorker
+from resilient_circuits.bulkhead import Bulkhead, parse_limits
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestBulkhead:
+    def test_parse_limits(self):
+        assert parse_limits(None) == {}
+        assert parse_limits("fn_a:2, fn_b: 4,") == {"fn_a": 2, "fn_b": 4}
+        assert parse_limits({"fn_a": "3"}) == {"fn_a": 3}
+        with pytest.raises(ValueError):
+            parse_limits("fn_a")
+
+    def test_in_order(self):
+        bulkhead = Bulkhead(2)
+        assert bulkhead.acquire("a") and bulkhead.acquire("b")
+        assert not bulkhead.acquire("c")
+        assert not bulkhead.acquire("d")
+        # A slot is handed straight to the first waiter
+        assert bulkhead.release() == "c"
+        assert not bulkhead.acquire("e")
+        assert bulkhead.release() == "d"
+        assert bulkhead.release() == "e"
+        assert bulkhead.release() is None
+        assert bulkhead.release() is None
+        assert bulkhead.active == 0
+
+    def test_set_limit(self):
+        bulkhead = Bulkhead(1)
+        bulkhead.acquire("a")
+        bulkhead.acquire("b")
+        bulkhead.acquire("c")
+        assert bulkhead.set_limit(2) == ["b"]
+        assert bulkhead.active == 2
+        # Lowering the limit doesn't stop running tasks, but no more are started
+        bulkhead.set_limit(1)
+        assert bulkhead.release() is None
+        assert bulkhead.release() == "c"
+
+
+@pytest.fixture
+def worker():
+    manager = Manager()
+    worker = FunctionWorker(workers=4, channel="functionworker",
+                            function_limits={"fn_slow": 1},
+                            destination_limits={"dest_limited": 2}).register(manager)
+    manager.start()
+    yield manager, worker
+    manager.stop()
+
+
+def fire_task(manager, function_name, destination=None, gate=None, started=None):
+    def _task():
+        started.append(function_name)
+        gate.wait(5)
+        return function_name
+    the_task = task(_task)
+    the_task.function_name = function_name
+    the_task.destination = destination
+    return manager.fire(the_task, "functionworker")
+
+
+class TestFunctionWorker:
+    def test_function_limit(self, worker):
+        manager, worker = worker
+        gate, started = threading.Event(), []
+        values = [fire_task(manager, "fn_slow", gate=gate, started=started) for _ in range(3)]
+        values.append(fire_task(manager, "fn_fast", gate=gate, started=started))
+        assert wait_until(lambda: sorted(started) == ["fn_fast", "fn_slow"])
+        time.sleep(0.2)
+        assert sorted(started) == ["fn_fast", "fn_slow"]
+        stats = worker.stats()
+        assert stats["workers"] == 4
+        assert stats["busy"] == 2
+        assert stats["queued"] == 2
+        assert stats["functions"]["fn_slow"] == {"running": 1, "queued": 2}
+        assert stats["functions"]["fn_fast"] == {"running": 1, "queued": 0}
+        gate.set()
+        assert wait_until(lambda: all(value.result for value in values))
+        assert [value.value for value in values] == ["fn_slow", "fn_slow", "fn_slow", "fn_fast"]
+        assert wait_until(lambda: worker.stats()["busy"] == 0)
+        assert worker.stats()["functions"]["fn_slow"] == {"running": 0, "queued": 0}
+
+    def test_destination_limit(self, worker):
+        manager, worker = worker
+        gate, started = threading.Event(), []
+        values = [fire_task(manager, "fn_{0}".format(num), destination="dest_limited", gate=gate, started=started)
+                  for num in range(3)]
+        assert wait_until(lambda: len(started) == 2)
+        time.sleep(0.2)
+        assert sorted(started) == ["fn_0", "fn_1"]
+        # Raising the limit starts the waiting task
+        worker.set_limits({"fn_slow": 1}, {"dest_limited": 3})
+        assert wait_until(lambda: len(started) == 3)
+        gate.set()
+        assert wait_until(lambda: all(value.result for value in values))
+
+    def test_task_error(self, worker):
+        manager, worker = worker
+        def _fail():
+            raise ValueError("failed")
+        the_task = task(_fail)
+        the_task.function_name = "fn_fail"
+        value = manager.fire(the_task, "functionworker")
+        assert wait_until(lambda: value.result)
+        assert value.errors
+        assert wait_until(lambda: worker.stats()["busy"] == 0)
+
+
+def cpu_time():
+    times = os.times()
+    return times[0] + times[1]
+
+
+def measure_loop_cpu(num_tasks, seconds=1):
+    """The CPU used (as a fraction of wall time) while `num_tasks` tasks are running"""
+    manager = Manager()
+    FunctionWorker(workers=max(1, num_tasks), channel="functionworker").register(manager)
+    manager.start()
+    gate, started = threading.Event(), []
+    try:
+        values = [fire_task(manager, "fn_{0}".format(num), gate=gate, started=started) for num in range(num_tasks)]
+        assert wait_until(lambda: len(started) == num_tasks)
+        # The running tasks are all blocked on the gate, so the CPU used is the loop's
+        start, cpu = time.time(), cpu_time()
+        time.sleep(seconds)
+        loop_cpu = (cpu_time() - cpu) / (time.time() - start)
+        gate.set()
+        assert wait_until(lambda: all(value.result for value in values))
+        return loop_cpu
+    finally:
+        gate.set()
+        manager.stop()
+
+
+def test_loop_cpu_while_running(record_property):
+    """Benchmark: the loop's CPU use doesn't grow with the number of running tasks"""
+    loop_cpu = dict((num_tasks, measure_loop_cpu(num_tasks)) for num_tasks in (0, 1, 10, 50))
+    for num_tasks, cpu in sorted(loop_cpu.items()):
+        record_property("loop_cpu_{0}_tasks".format(num_tasks), round(cpu, 3))
+    # A loop that polled the running tasks would be busy (close to 100%) as soon as there were any
+    assert loop_cpu[50] <= loop_cpu[0] + 0.1, "Loop CPU by number of running tasks: {0}".format(
+        ", ".join("{0}: {1:.1%}".format(num_tasks, cpu) for num_tasks, cpu in sorted(loop_cpu.items())))
@@ -0,0 +1,117 @@
+# (c) Copyright IBM Corp. 2010, 2018. All Rights Reserved.
+"""Tests for functions that run in the process pool"""
+import os
+import threading
+import time
+import pytest
+from circuits import BaseComponent, Manager, handler
+from resilient_circuits.actions_component import FunctionWorker
+from resilient_circuits.action_message import FunctionMessage
+from resilient_circuits import decorators
+from resilient_circuits.decorators import function
+from resilient_circuits import StatusMessage, FunctionResult, FunctionError
+
+
+class ProcessFunctions(BaseComponent):
+    """Functions that run in child processes"""
+    def __init__(self, opts):
+        super(ProcessFunctions, self).__init__()
+        self.opts = opts
+
+    @function("fn_pid", executor="process")
+    def _fn_pid(self, event, *args, **kwargs):
+        yield StatusMessage("starting {0}".format(kwargs["label"]))
+        yield FunctionResult({"pid": os.getpid(),
+                              "function": event.name,
+                              "option": self.opts["option"]})
+
+    @function("fn_error", executor="process")
+    def _fn_error(self, event, *args, **kwargs):
+        yield FunctionError("failed")
+        yield FunctionResult({"unreachable": True})
+
+    @function("fn_raise", executor="process")
+    def _fn_raise(self, event, *args, **kwargs):
+        try:
+            raise KeyError("missing")
+        except KeyError:
+            yield FunctionError()
+
+
+class Recorder(BaseComponent):
+    def init(self):
+        self.events = []
+
+    @handler(channel="*", priority=100)
+    def _on_event(self, event, *args, **kwargs):
+        self.events.append(event)
+
+
+@pytest.fixture(scope="module")
+def app():
+    manager = Manager()
+    FunctionWorker(process=False, channel="functionworker").register(manager)
+    ProcessFunctions({"option": "value"}).register(manager)
+    recorder = Recorder().register(manager)
+    manager.start()
+    yield manager, recorder
+    manager.stop()
+    decorators.shutdown_process_pool()
+
+
+def call_function(app, name, inputs=None, until=None):
+    """Fire a function message and wait for it to complete (or for the `until` event);
+       returns the events it fired
+    """
+    manager, recorder = app
+    del recorder.events[:]
+    message = {"function": {"name": name}, "inputs": inputs or {}}
+    event = FunctionMessage(headers={}, message=message)
+    event.complete = True
+    manager.fire(event, "functions.{0}".format(name))
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        names = [evt.name for evt in recorder.events]
+        if (until or "{0}_complete".format(name)) in names:
+            return event, recorder.events
+        time.sleep(0.05)
+    raise AssertionError("{0} did not complete".format(name))
+
+
+class TestProcessExecutor:
+    def test_usage(self):
+        with pytest.raises(ValueError):
+            function("fn", executor="fibers")
+
+    def test_results(self, app):
+        event, events = call_function(app, "fn_pid", {"label": "one"})
+        assert event.success
+        status = [evt for evt in events if evt.name == "StatusMessageEvent"]
+        assert [evt.text for evt in status] == ["starting one"]
+        results = event.value.value
+        assert len(results) == 1
+        assert results[0].value["pid"] != os.getpid()
+        assert results[0].value["function"] == "fn_pid"
+        assert results[0].value["option"] == "value"
+
+    def test_function_error(self, app):
+        event, events = call_function(app, "fn_error")
+        assert not event.success
+        errors = [evt for evt in events if evt.name == "FunctionErrorEvent"]
+        assert [evt.text for evt in errors] == ["failed"]
+
+    def test_exception(self, app):
+        # As on a worker thread, the exception is raised from the task
+        event, events = call_function(app, "fn_raise", until="exception")
+        exception = [evt for evt in events if evt.name == "exception"][0]
+        assert isinstance(exception.args[1], KeyError)
+
+    def test_component_state(self):
+        component = ProcessFunctions({"option": "value"})
+        component.lock = threading.Lock()
+        state = decorators._component_state(component)
+        assert state["opts"] == {"option": "value"}
+        assert "lock" not in state
+        # Later calls send the current values of the picklable attributes
+        component.opts = {"option": "changed"}
+        assert decorators._component_state(component)["opts"] == {"option": "changed"}
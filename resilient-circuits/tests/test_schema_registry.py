@@ -0,0 +1,99 @@
+# (c) Copyright IBM Corp. 2010, 2018. All Rights Reserved.
+"""Tests for the schema registry shared by all components"""
+import pytest
+import resilient
+import copy
+from resilient_circuits import schema_registry
+from resilient_circuits.actions_component import get_schema
+
+SEVERITY = {"name": "severity_code",
+            "values": [{"value": 4, "label": "Low", "enabled": True},
+                       {"value": 5, "label": "Medium", "enabled": True},
+                       {"value": 6, "label": "Old", "enabled": False}]}
+
+RESPONSES = {"/types/incident/fields": [SEVERITY],
+             "/types/actioninvocation/fields": [{"name": "note"}],
+             "/message_destinations": {"entities": [{"id": 1, "programmatic_name": "fn_queue"}]},
+             "/functions": {"entities": [{"name": "fn1"}, {"name": "fn2"}]},
+             "/functions/fn1": {"name": "fn1", "destination_handle": 1},
+             "/functions/fn2": {"name": "fn2", "destination_handle": 1},
+             "/types/__function/fields": [{"name": "fn_input"}]}
+
+
+class NotFound(object):
+    """Response for a URI that does not exist"""
+    status_code = 404
+    reason = "Not Found"
+    text = ""
+
+
+class FakeClient(object):
+    """Records the URIs that were read"""
+    def __init__(self, responses):
+        self.responses = responses
+        self.requested = []
+
+    def cached_get_many(self, uris):
+        self.requested.append(list(uris))
+        return [self.responses.get(uri, resilient.SimpleHTTPException(NotFound())) for uri in uris]
+
+
+@pytest.fixture(autouse=True)
+def reset_schema(monkeypatch):
+    monkeypatch.setattr(schema_registry, "_registry", schema_registry.SchemaRegistry())
+
+
+class TestSchemaRegistry:
+
+    def test_load(self):
+        client = FakeClient(RESPONSES)
+        schema = get_schema(client)
+        assert list(schema.fields) == ["severity_code"]
+        assert schema.destinations[1]["programmatic_name"] == "fn_queue"
+        assert sorted(schema.functions) == ["fn1", "fn2"]
+        assert list(schema.function_fields) == ["fn_input"]
+        # One batch for the types, one for the function definitions
+        assert client.requested[1] == ["/functions/fn1", "/functions/fn2"]
+
+    def test_shared(self):
+        client = FakeClient(RESPONSES)
+        schema = get_schema(client)
+        assert get_schema(client) is schema
+        assert len(client.requested) == 2
+        assert get_schema(client, refresh=True) is schema
+        assert len(client.requested) == 4
+
+    def test_labels(self):
+        schema = get_schema(FakeClient(RESPONSES))
+        assert schema.get_field_label("severity_code", 4) == "Low"
+        assert schema.get_field_value("severity_code", "Medium") == 5
+        # disabled and unknown values fall back to the value id
+        assert schema.get_field_label("severity_code", 6) == 6
+        assert schema.get_field_label("severity_code", [4, 5]) == [4, 5]
+        assert schema.get_action_field_label("note", u"x") == u"x"
+        assert schema.get_destination_name(1) == "fn_queue"
+        with pytest.raises(KeyError):
+            schema.get_field_label("no_such_field", 4)
+
+    def test_incremental_refresh(self):
+        responses = copy.deepcopy(RESPONSES)
+        client = FakeClient(responses)
+        schema = get_schema(client)
+        action_fields = schema.action_fields
+        functions = schema.functions
+        severity = copy.deepcopy(SEVERITY)
+        severity["values"].append({"value": 7, "label": "High", "enabled": True})
+        responses["/types/incident/fields"] = [severity]
+        responses["/functions/fn2"] = {"name": "fn2", "destination_handle": 2}
+        get_schema(client, refresh=True)
+        assert schema.get_field_label("severity_code", 7) == "High"
+        assert schema.functions["fn2"]["destination_handle"] == 2
+        assert schema.functions is not functions
+        # unchanged definitions are not re-indexed
+        assert schema.action_fields is action_fields
+
+    def test_no_functions(self):
+        responses = dict((uri, value) for uri, value in RESPONSES.items() if not uri.startswith("/functions"))
+        schema = get_schema(FakeClient(responses))
+        assert schema.functions is None
+        assert schema.function_fields is None
@@ -0,0 +1,76 @@
+# (c) Copyright IBM Corp. 2010, 2018. All Rights Reserved.
+"""Tests for the on-disk schema snapshot"""
+import json
+import pytest
+from resilient_circuits import schema_snapshot
+from resilient_circuits.schema_snapshot import SchemaSnapshot
+
+FIELDS = [{"name": "severity_code", "input_type": "select"}]
+
+
+class FakeClient(object):
+    """Just enough of SimpleClient for the snapshot: a cache, an org id, and get_many"""
+    def __init__(self, org_id, responses):
+        self.org_id = org_id
+        self.cache = {}
+        self.responses = responses
+        self.requested = []
+
+    def get_many(self, uris, as_dict=False):
+        self.requested.extend(uris)
+        return dict((uri, self.responses.get(uri, KeyError(uri))) for uri in uris)
+
+    def cached_get_many(self, uris, as_dict=False):
+        results = self.get_many(uris, as_dict)
+        self.cache.update((uri, value) for uri, value in results.items() if not isinstance(value, Exception))
+        return results
+
+
+@pytest.fixture(autouse=True)
+def reset_snapshot():
+    schema_snapshot.reset()
+    yield
+    schema_snapshot.reset()
+
+
+class TestSchemaSnapshot:
+
+    def test_save_and_load(self, tmpdir):
+        path = str(tmpdir.join("snapshot.json"))
+        SchemaSnapshot("resilient.example.com", 201, {"/types/incident/fields": FIELDS}).save(path)
+        snapshot = SchemaSnapshot.load(path)
+        assert snapshot.is_for("resilient.example.com", 201)
+        assert not snapshot.is_for("resilient.example.com", 202)
+        client = FakeClient(201, {})
+        snapshot.prime(client)
+        assert client.cache["/types/incident/fields"] == FIELDS
+
+    def test_wrong_format(self, tmpdir):
+        path = tmpdir.join("snapshot.json")
+        path.write(json.dumps({"format_version": schema_snapshot.SNAPSHOT_FORMAT_VERSION + 1}))
+        with pytest.raises(ValueError):
+            SchemaSnapshot.load(str(path))
+
+    def test_changed_uris(self):
+        old = SchemaSnapshot("host", 201, {"/functions": {"entities": []}, "/actions": {"entities": []}})
+        new = SchemaSnapshot("host", 201, {"/functions": {"entities": []}, "/actions": {"entities": [{"id": 1}]},
+                                           "/message_destinations": {"entities": []}})
+        assert new.changed_uris(old) == ["/actions", "/message_destinations"]
+
+    def test_attach_reads_and_saves(self, tmpdir):
+        path = tmpdir.join("snapshot.json")
+        client = FakeClient(201, {"/types/incident/fields": FIELDS,
+                                  "/functions": {"entities": [{"name": "fn1"}]},
+                                  "/functions/fn1": {"name": "fn1"}})
+        schema_snapshot.attach(client, {"schema_snapshot": str(path), "host": "resilient.example.com"})
+        assert client.cache["/functions/fn1"] == {"name": "fn1"}
+        saved = SchemaSnapshot.load(str(path))
+        assert saved.responses == client.cache
+
+    def test_attach_ignores_other_org(self, tmpdir):
+        path = str(tmpdir.join("snapshot.json"))
+        SchemaSnapshot("resilient.example.com", 202, {"/types/incident/fields": []}).save(path)
+        client = FakeClient(201, {"/types/incident/fields": FIELDS})
+        schema_snapshot.attach(client, {"schema_snapshot": path, "host": "resilient.example.com"})
+        assert client.cache["/types/incident/fields"] == FIELDS
+        assert SchemaSnapshot.load(path).org_id == 201
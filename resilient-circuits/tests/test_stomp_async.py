@@ -0,0 +1,135 @@
+# (c) Copyright IBM Corp. 2010, 2018. All Rights Reserved.
+"""Tests for the asyncio STOMP client, against a minimal STOMP server"""
+import socket
+import sys
+import threading
+import time
+import pytest
+
+pytestmark = pytest.mark.skipif(sys.version_info < (3, 5), reason="requires python3.5 or higher")
+
+
+class FakeStompServer(object):
+    """Accepts one connection, answers CONNECT, sends `messages` once subscribed,
+       and records the frames it receives"""
+    def __init__(self, messages=(), heartbeat=0):
+        self.messages = messages
+        self.heartbeat = heartbeat
+        self.received = b""
+        self.listener = socket.socket()
+        self.listener.bind(("127.0.0.1", 0))
+        self.listener.listen(1)
+        self.port = self.listener.getsockname()[1]
+        self.thread = threading.Thread(target=self.serve)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def serve(self):
+        conn, _ = self.listener.accept()
+        self.conn = conn
+        while b"\x00" not in self.received:
+            self.received += conn.recv(4096)
+        conn.sendall(b"CONNECTED\nversion:1.2\nheart-beat:%d,0\n\n\x00" % self.heartbeat)
+        messages = list(self.messages)
+        while True:
+            data = conn.recv(4096)
+            if not data:
+                break
+            self.received += data
+            if messages and b"SUBSCRIBE\n" in self.received:
+                for message in messages:
+                    conn.sendall(message)
+                messages = []
+
+    def wait_for(self, data, timeout=5):
+        deadline = time.time() + timeout
+        while data not in self.received and time.time() < deadline:
+            time.sleep(0.01)
+        return data in self.received
+
+    def close(self):
+        self.listener.close()
+
+
+MESSAGE = b"MESSAGE\nsubscription:actions.201.fn\nmessage-id:m1\ndestination:/queue/actions.201.fn\n" \
+          b"ack:a1\n\n{}\x00"
+
+
+@pytest.fixture
+def app():
+    from circuits import Component, Manager, handler
+
+    class Recorder(Component):
+        channel = "stomp"
+
+        def init(self):
+            self.events = []
+
+        @handler()
+        def _on_event(self, event, *args, **kwargs):
+            self.events.append(event.name)
+
+    manager = Manager()
+    recorder = Recorder().register(manager)
+    manager.start()
+    yield manager, recorder
+    manager.stop()
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestAsyncStompClient:
+    def test_connect_subscribe_and_receive(self, app):
+        from resilient_circuits.stomp_async import AsyncStompClient
+        from resilient_circuits.stomp_events import Connect, Subscribe
+        manager, recorder = app
+        server = FakeStompServer(messages=[MESSAGE])
+        client = AsyncStompClient("127.0.0.1", server.port, username="user", password="pass",
+                                  use_ssl=False).register(manager)
+        try:
+            manager.fire(Connect(), "stomp")
+            assert wait_until(lambda: "Connect_success" in recorder.events)
+            assert client.connected
+            assert b"login:user" in server.received
+            manager.fire(Subscribe("actions.201.fn"), "stomp")
+            assert server.wait_for(b"SUBSCRIBE\n")
+            assert wait_until(lambda: "Message" in recorder.events)
+            assert recorder.events.index("Connected") < recorder.events.index("Message")
+        finally:
+            client.unregister()
+            server.close()
+
+    def test_connection_failed(self, app):
+        from resilient_circuits.stomp_async import AsyncStompClient
+        from resilient_circuits.stomp_events import Connect
+        manager, recorder = app
+        listener = socket.socket()
+        listener.bind(("127.0.0.1", 0))
+        port = listener.getsockname()[1]
+        listener.close()
+        client = AsyncStompClient("127.0.0.1", port, use_ssl=False).register(manager)
+        try:
+            manager.fire(Connect(), "stomp")
+            assert wait_until(lambda: "ConnectionFailed" in recorder.events)
+            assert not client.connected
+        finally:
+            client.unregister()
+
+    def test_server_heartbeat_timeout(self, app):
+        from resilient_circuits.stomp_async import AsyncStompClient
+        from resilient_circuits.stomp_events import Connect
+        manager, recorder = app
+        server = FakeStompServer(heartbeat=100)
+        client = AsyncStompClient("127.0.0.1", server.port, use_ssl=False, heartbeats=(0, 100)).register(manager)
+        try:
+            manager.fire(Connect(), "stomp")
+            assert wait_until(lambda: "HeartbeatTimeout" in recorder.events)
+            assert not client.socket_connected
+        finally:
+            client.unregister()
+            server.close()
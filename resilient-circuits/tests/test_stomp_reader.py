@@ -0,0 +1,66 @@
+# (c) Copyright IBM Corp. 2010, 2018. All Rights Reserved.
+"""Tests for the event-driven STOMP reader"""
+import socket
+import threading
+import pytest
+from stompest.protocol import StompFrame, StompSpec, StompSession
+from resilient_circuits import stomp_component
+from resilient_circuits.stomp_component import StompClient
+from resilient_circuits.stomp_events import Message, OnStompError, StompReadable
+
+
+class FakeStomp(object):
+    """Just enough of the stompest client: a connected session, and some frames to read"""
+    class Session(object):
+        state = StompSession.CONNECTED
+
+    def __init__(self, frames):
+        self.session = self.Session()
+        self.frames = list(frames)
+
+    def canRead(self, timeout=None):
+        return bool(self.frames)
+
+    def receiveFrame(self):
+        return self.frames.pop(0)
+
+
+@pytest.fixture
+def component(monkeypatch):
+    client = StompClient("localhost", 61614, use_ssl=False)
+    fired = []
+    monkeypatch.setattr(client, "fire", lambda event, *channels: fired.append(event))
+    client.fired = fired
+    return client
+
+
+class TestStompReader:
+    def test_reads_all_frames(self, component):
+        component._client = FakeStomp([StompFrame(StompSpec.MESSAGE, {"message-id": str(n)}, b"{}")
+                                       for n in range(3)] +
+                                      [StompFrame(StompSpec.ERROR, {"message": "bad"}, b"")])
+        component._frames_read = threading.Event()
+        component.read_frames(StompReadable())
+        assert [type(event) for event in component.fired] == [Message, Message, Message, OnStompError]
+        assert component._frames_read.is_set()
+
+    def test_waits_for_data(self, component, monkeypatch):
+        monkeypatch.setattr(stomp_component, "READER_POLL_INTERVAL", 0.05)
+        readable = threading.Event()
+        component.fire = lambda event, *channels: readable.set()
+        server, client = socket.socketpair()
+        stop, frames_read = threading.Event(), threading.Event()
+        reader = threading.Thread(target=component._wait_for_frames, args=(client, stop, frames_read))
+        reader.start()
+        try:
+            # Nothing is fired while the connection is idle
+            assert not readable.wait(0.2)
+            server.sendall(b"\n")
+            assert readable.wait(2)
+            assert not frames_read.is_set()
+        finally:
+            stop.set()
+            reader.join(2)
+            server.close()
+            client.close()
+        assert not reader.is_alive()
@@ -1,8 +1,14 @@
 # (c) Copyright IBM Corp. 2010, 2017. All Rights Reserved.
 """ pytest configuration for co3 tests """
 import argparse
+import sys
 import pytest
 
+collect_ignore = []
+if sys.version_info < (3, 5):
+    # The asyncio client uses async/await syntax
+    collect_ignore.append("tests/test_co3async.py")
+
 
 def pytest_addoption(parser):
     parser.addoption("--config-file",
@@ -27,3 +33,28 @@ def co3_args(request):
 
     args = resilient.ArgumentParser(config_file=config_file).parse_args(args=co3args)
     return args
+
+
+MOCK_BASE_URL = "https://resilient.example.com"
+
+
+@pytest.fixture
+def mock_client():
+    """A SimpleClient connected through a requests_mock adapter, for tests that don't need a server.
+       Register responses for the test on `mock_client.mock_adapter`; org URIs are under /rest/orgs/201.
+    """
+    import requests_mock
+    import resilient
+
+    adapter = requests_mock.Adapter()
+    adapter.register_uri("POST", MOCK_BASE_URL + "/rest/session",
+                         json={"orgs": [{"name": "Test Org", "id": 201, "enabled": True}],
+                               "csrf_token": "token",
+                               "user_id": 1,
+                               "session_ip": "127.0.0.1"},
+                         cookies={"JSESSIONID": "session"})
+    client = resilient.SimpleClient(org_name="Test Org", base_url=MOCK_BASE_URL)
+    client.session.mount("https://", adapter)
+    client.connect("api@example.com", "password")
+    client.mock_adapter = adapter
+    return client
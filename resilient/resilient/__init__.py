@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 # (c) Copyright IBM Corp. 2010, 2017. All Rights Reserved.
 
+import sys
 import pkg_resources
 try:
     __version__ = pkg_resources.get_distribution(__name__).version
@@ -20,3 +21,14 @@ from .co3argparse import parse_parameters, ArgumentParser
 from .co3sslutil import match_hostname
 from .patch import Patch
 from .patch import PatchStatus
+from .retry import RetryPolicy
+from .ratelimit import RateLimiter
+from .breaker import CircuitBreaker, CircuitBreakerOpen
+from .attachment_index import AttachmentIndex
+
+if sys.version_info >= (3, 5):
+    try:
+        from .co3async import AsyncSimpleClient
+    except ImportError:
+        # 'aiohttp' is an optional dependency, "pip install resilient[async]"
+        pass
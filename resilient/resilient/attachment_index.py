@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright IBM Corp. 2010, 2017. All Rights Reserved.
+
+"""Index of uploaded attachments by content hash, so that the same file is not attached twice"""
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+
+LOG = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+
+# Default maximum number of attachments in the index
+DEFAULT_MAX_ENTRIES = 10000
+
+# Default time (seconds) after a change before the index file is saved, so that the changes from
+# many uploads are saved together
+DEFAULT_SAVE_DELAY = 2.0
+
+# The indexes that have a file, to be saved at exit (without keeping them alive until then)
+_saved_indexes = weakref.WeakSet()
+
+
+def hash_file(filepath, chunk_size=65536):
+    """The SHA-256 hex digest of a file, read one chunk at a time"""
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as hashed_file:
+        for chunk in iter(lambda: hashed_file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class AttachmentIndex(object):
+    """Remembers the attachments that were uploaded to each URI (e.g. "/incidents/2095/attachments"),
+    by the SHA-256 of their content.
+
+    The index holds up to `max_entries` attachments; when it is full, the least recently used are
+    forgotten.  If it has a `path`, it is loaded from that file, and saved there `save_delay` seconds
+    after a change (with any other changes made meanwhile) and at exit, so it persists across restarts.
+    An index is safe to share between threads.
+    """
+
+    def __init__(self, path=None, max_entries=DEFAULT_MAX_ENTRIES, confirm=True, save_delay=DEFAULT_SAVE_DELAY):
+        """
+        :param path: optional file to keep the index in
+        :param max_entries: maximum number of attachments to remember
+        :param confirm: Before skipping an upload, check that the attachment still exists
+          (it might have been deleted on the server)
+        :param save_delay: Time (seconds) after a change before the file is saved (0 to save after every change)
+        """
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self.confirm = confirm
+        self.save_delay = save_delay
+        self._lock = threading.Lock()
+        # Held while the file is written, so that saves are written one at a time, in order
+        self._save_lock = threading.Lock()
+        self._save_timer = None
+        self._changes = 0
+        self._saved_changes = 0
+        self._entries = OrderedDict()
+        if path:
+            if os.path.exists(path):
+                self.load()
+            _saved_indexes.add(self)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, uri, sha256):
+        """The attachment (as returned when it was uploaded) with this content at this URI, or None"""
+        key = self._key(uri, sha256)
+        with self._lock:
+            attachment = self._entries.pop(key, None)
+            if attachment is not None:
+                self._entries[key] = attachment
+            return attachment
+
+    def add(self, uri, sha256, attachment):
+        """Remember an uploaded attachment"""
+        key = self._key(uri, sha256)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = attachment
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            save_now = self._changed()
+        if save_now:
+            self.flush()
+
+    def remove(self, uri, sha256):
+        """Forget an attachment"""
+        with self._lock:
+            save_now = self._entries.pop(self._key(uri, sha256), None) is not None and self._changed()
+        if save_now:
+            self.flush()
+
+    def _changed(self):
+        """Count a change to be saved (must hold the lock), and schedule the save.
+           Returns True if the caller should save now (with no `save_delay`).
+        """
+        if not self.path:
+            return False
+        self._changes += 1
+        if self.save_delay <= 0:
+            return True
+        if self._save_timer is None:
+            self._save_timer = threading.Timer(self.save_delay, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+        return False
+
+    def flush(self):
+        """Save the changes to the index file now, if there are any"""
+        if not self.path:
+            return
+        with self._save_lock:
+            with self._lock:
+                if self._save_timer is not None:
+                    self._save_timer.cancel()
+                    self._save_timer = None
+                changes = self._changes
+                if changes == self._saved_changes:
+                    return
+                entries = [[uri, sha256, attachment] for (uri, sha256), attachment in self._entries.items()]
+            # Written without holding the index lock, so uploads aren't held up by the file I/O
+            if self._save(entries):
+                self._saved_changes = changes
+
+    def load(self):
+        """Read the index file.  If it can't be read, the index starts empty."""
+        try:
+            with open(self.path, "r") as index_file:
+                data = json.load(index_file)
+            if data.get("format_version") != INDEX_FORMAT_VERSION:
+                raise ValueError(u"format_version {0}".format(data.get("format_version")))
+            entries = OrderedDict((self._key(uri, sha256), attachment)
+                                  for uri, sha256, attachment in data["entries"])
+        except Exception as exc:
+            LOG.warn(u"Couldn't read attachment index '%s': %s", self.path, exc)
+            entries = OrderedDict()
+        with self._lock:
+            self._entries = entries
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _save(self, entries):
+        """Write the index file, atomically (must hold the save lock).  Returns True if it was written.
+           A failure is logged, not raised: the upload that changed the index has already succeeded.
+        """
+        data = {"format_version": INDEX_FORMAT_VERSION, "entries": entries}
+        temp_path = None
+        try:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            handle, temp_path = tempfile.mkstemp(dir=directory, prefix=".attachment_index")
+            with os.fdopen(handle, "w") as index_file:
+                json.dump(data, index_file)
+            if os.name == "nt" and os.path.exists(self.path):
+                os.remove(self.path)
+            os.rename(temp_path, self.path)
+            return True
+        except Exception as exc:
+            LOG.warn(u"Couldn't save attachment index '%s': %s", self.path, exc)
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+            return False
+
+    @staticmethod
+    def _key(uri, sha256):
+        return uri.split(u"?")[0].rstrip(u"/"), sha256
+
+
+@atexit.register
+def _flush_all():
+    """At exit, save the changes to every index that is still in use"""
+    for index in list(_saved_indexes):
+        index.flush()
@@ -72,14 +72,15 @@ class ExampleArgumentParser(resilient.ArgumentParser):
 
 
 def show_incident_list(client, query_template_file_name):
-    incidents = None
     if query_template_file_name:
         with open(query_template_file_name, 'r') as template_file:
             query = json.loads(template_file.read())
-            # Get the list of incidents
-            incidents = client.post('/incidents/query', query)
     else:
-        incidents = client.get('/incidents')
+        # Open incidents (like 'GET /incidents')
+        query = {"filters": [{"conditions": [{"field_name": "plan_status", "method": "equals", "value": "A"}]}]}
+
+    # Get the list of incidents, one page at a time
+    incidents = client.iter_query('/incidents/query_paged', query, page_size=500)
 
     # Print the incident names
     for inc in incidents:
@@ -104,8 +105,11 @@ def create_incident(client, template_file_name, attachments):
 
     incident_id = incident['id']
     if isinstance(attachments, list) and len(attachments) > 0:
-        for attachment in attachments:
-            upload = client.post_attachment('/incidents/{0}/attachments'.format(incident_id), attachment)
+        uploads = client.post_attachments('/incidents/{0}/attachments'.format(incident_id), attachments)
+        for attachment, upload in zip(attachments, uploads):
+            if isinstance(upload, Exception):
+                print('Failed to attach {0}:  {1}'.format(attachment, upload), file=sys.stderr)
+                continue
             print('Created attachment:  ', file=sys.stderr)
             print(json.dumps(upload, indent=4))
 
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright IBM Corp. 2010, 2017. All Rights Reserved.
+
+"""Circuit breaker for Resilient REST API requests"""
+
+import collections
+import logging
+import threading
+import time
+
+LOG = logging.getLogger(__name__)
+
+_timer = getattr(time, "monotonic", time.time)
+
+# Responses that mean the server is failing, not that the request was wrong
+DEFAULT_FAILURE_STATUSES = (502, 503, 504)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitBreakerOpen(Exception):
+    """Exception for a request that was not sent, because the server is failing"""
+    pass
+
+
+class CircuitBreaker(object):
+    """Stops requests to a server that is failing, so that callers fail fast instead of waiting for timeouts.
+
+    The breaker is "closed" while the server is working.  When at least `failure_rate` of the last
+    `window` requests failed (with a connection error, a timeout, or one of `failure_statuses`), it
+    "opens": requests raise :class:`CircuitBreakerOpen` without being sent.  After `reset_timeout`
+    seconds it is "half-open": one probe request is sent (others still fail fast).  If the probe
+    succeeds, the breaker closes; if not, it opens again.
+
+    A breaker can be shared by many clients and threads.
+    """
+
+    def __init__(self, failure_rate=0.5, window=20, min_requests=10, reset_timeout=30,
+                 failure_statuses=DEFAULT_FAILURE_STATUSES, timer=_timer):
+        """
+        :param failure_rate: The fraction (0 to 1) of failed requests that opens the breaker
+        :param window: The number of recent requests to count
+        :param min_requests: The minimum number of recent requests before the breaker can open
+        :param reset_timeout: Time (seconds) that the breaker stays open before a probe request is allowed
+        :param failure_statuses: HTTP status codes that count as failures
+        :param timer: Function returning the current time in seconds
+        """
+        self.failure_rate = failure_rate
+        self.min_requests = max(1, min_requests)
+        self.reset_timeout = reset_timeout
+        self.failure_statuses = tuple(failure_statuses)
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._outcomes = collections.deque(maxlen=max(window, self.min_requests))
+        self._state = CLOSED
+        self._opened_at = None
+        self._probing = False
+        self._listeners = []
+        self._rejected = 0
+        self._opened = 0
+
+    @property
+    def state(self):
+        """The state: "closed", "open" or "half-open"."""
+        with self._lock:
+            changes = self._check_reset_timeout()
+            state = self._state
+        self._notify(changes)
+        return state
+
+    def add_listener(self, callback):
+        """Register a function that is called as `callback(old_state, new_state)` when the state changes.
+           It is called on the thread whose request changed the state.
+        """
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        """Unregister a function registered by :meth:`add_listener`"""
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def before_request(self):
+        """Call before each request.
+
+        :return: True if the request is a probe (in the half-open state)
+        :raises CircuitBreakerOpen: if the request should not be sent
+        """
+        with self._lock:
+            changes = self._check_reset_timeout()
+            if self._state == CLOSED:
+                probe = False
+            elif self._state == HALF_OPEN and not self._probing:
+                self._probing = probe = True
+            else:
+                self._rejected += 1
+                probe = None
+        self._notify(changes)
+        if probe is None:
+            raise CircuitBreakerOpen(u"The Resilient server is failing; requests are paused for up to {0}s"
+                                     .format(self.reset_timeout))
+        return probe
+
+    def is_failure(self, response=None, exception=None):
+        """Does this response (or exception) count as a failure of the server?"""
+        if exception is not None:
+            return True
+        return response is not None and response.status_code in self.failure_statuses
+
+    def record(self, success, probe=False):
+        """Call after each request that was allowed by :meth:`before_request`.
+
+        :param success: False if the request failed (see :meth:`is_failure`), or None if it
+          failed for a reason that says nothing about the server
+        :param probe: The value returned by :meth:`before_request`
+        """
+        with self._lock:
+            changes = []
+            if probe:
+                self._probing = False
+            if success is None:
+                pass
+            elif self._state == HALF_OPEN and probe:
+                if success:
+                    changes = self._set_state(CLOSED)
+                else:
+                    changes = self._set_state(OPEN)
+            elif self._state == CLOSED:
+                self._outcomes.append(success)
+                failures = self._outcomes.count(False)
+                if len(self._outcomes) >= self.min_requests and \
+                        failures >= self.failure_rate * len(self._outcomes):
+                    changes = self._set_state(OPEN)
+        self._notify(changes)
+
+    def stats(self):
+        """Circuit breaker statistics.
+
+        :return: A dict with the "state", the number of times it "opened", and the number of
+          requests "rejected" while it was open.
+        """
+        with self._lock:
+            changes = self._check_reset_timeout()
+            stats = {"state": self._state,
+                     "opened": self._opened,
+                     "rejected": self._rejected}
+        self._notify(changes)
+        return stats
+
+    def _check_reset_timeout(self):
+        """Open becomes half-open after the reset timeout (must hold the lock)"""
+        if self._state == OPEN and self._timer() - self._opened_at >= self.reset_timeout:
+            return self._set_state(HALF_OPEN)
+        return []
+
+    def _set_state(self, state):
+        """Change the state (must hold the lock).  Returns the listener calls to make, after releasing the lock."""
+        old_state = self._state
+        self._state = state
+        if state == OPEN:
+            self._opened_at = self._timer()
+            if old_state == CLOSED:
+                self._opened += 1
+        elif state == CLOSED:
+            self._outcomes.clear()
+        self._probing = False
+        if old_state == state:
+            return []
+        LOG.warn(u"Circuit breaker %s (was %s)", state, old_state)
+        return [(listener, old_state, state) for listener in self._listeners]
+
+    def _notify(self, changes):
+        for listener, old_state, new_state in changes:
+            try:
+                listener(old_state, new_state)
+            except Exception:
+                LOG.exception(u"Circuit breaker listener failed")
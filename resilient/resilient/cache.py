@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright IBM Corp. 2010, 2017. All Rights Reserved.
+
+"""Thread-safe cache for Resilient REST API responses"""
+
+import fnmatch
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import Future
+
+# Default size budget for the cached responses
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+_timer = getattr(time, "monotonic", time.time)
+
+_Entry = namedtuple("_Entry", "value expires size")
+
+
+def parse_ttl_rules(rules):
+    """Parse per-URI cache TTL rules.
+
+    >>> parse_ttl_rules("/types/*:3600, /incidents/*:30")
+    [('/types/*', 3600), ('/incidents/*', 30)]
+
+    :param rules: comma-separated `pattern:seconds` pairs (or a list of (pattern, seconds)).
+      Patterns are shell-style wildcards, matched against the whole URI (`*` also matches '/').
+    :return: list of (pattern, ttl) tuples
+    """
+    if not rules:
+        return []
+    if not isinstance(rules, (str, type(u""))):
+        return [(pattern, int(ttl)) for pattern, ttl in rules]
+    parsed = []
+    for rule in rules.split(","):
+        rule = rule.strip()
+        if rule:
+            pattern, _, ttl = rule.rpartition(":")
+            if not pattern:
+                raise ValueError(u"Invalid cache TTL rule '{0}', expected 'pattern:seconds'".format(rule))
+            parsed.append((str(pattern.strip()), int(ttl)))
+    return parsed
+
+
+def under_prefix(key, prefix):
+    """Is `key` the URI `prefix`, or below it (`prefix/...` or `prefix?...`)?
+
+    >>> under_prefix("/incidents/12/artifacts", "/incidents/12")
+    True
+    >>> under_prefix("/incidents/123", "/incidents/12")
+    False
+    """
+    return key == prefix or (key.startswith(prefix) and key[len(prefix)] in "/?")
+
+
+def _estimate_size(value):
+    """Size of a value that was not loaded with its size: the length of its JSON"""
+    try:
+        return len(json.dumps(value))
+    except (TypeError, ValueError):
+        return sys.getsizeof(value)
+
+
+class ResponseCache(object):
+    """A cache of API responses that is safe to use from many threads.
+
+    Use :meth:`get_or_load` to read through the cache.  If several threads ask for the
+    same key while it is not cached, only the first calls its loader function; the others
+    wait for that call, and get its result (or its exception).
+
+    The time to live of each entry is from the first of `ttl_rules` that matches its key
+    (for example `[("/types/*", 3600), ("/incidents/*", 30)]`), or `ttl` if none match.
+    A TTL of zero means the entry is not cached.
+    When the cached responses are more than `max_bytes` in total (or more than `maxsize` entries),
+    expired entries and then the least recently used entries are evicted.
+    """
+
+    def __init__(self, maxsize=None, ttl=240, ttl_rules=None, max_bytes=DEFAULT_MAX_BYTES, timer=_timer):
+        """
+        :param maxsize: The maximum number of entries, or None for no limit
+        :param ttl: Default time to live (seconds) for each entry
+        :param ttl_rules: List of (pattern, ttl) for keys that have a different TTL, or a string for
+          :func:`parse_ttl_rules`
+        :param max_bytes: The maximum total size of the cached responses, or None for no limit
+        :param timer: Function returning the current time in seconds
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.ttl_rules = parse_ttl_rules(ttl_rules)
+        self.max_bytes = max_bytes
+        self._timer = timer
+        self._lock = threading.RLock()
+        # Least recently used first
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._pending = {}
+        self._stale = set()
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def __getitem__(self, key):
+        with self._lock:
+            return self._lookup(key)
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def set(self, key, value, size=None):
+        """Add an entry.
+
+        :param key: The cache key
+        :param value: The value
+        :param size: The size (bytes) of the value; if not specified, the size of its JSON is used
+        """
+        if size is None:
+            size = _estimate_size(value)
+        with self._lock:
+            self._store(key, value, size)
+
+    def __delitem__(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def __contains__(self, key):
+        with self._lock:
+            try:
+                self._lookup(key)
+                return True
+            except KeyError:
+                return False
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                return self._lookup(key)
+            except KeyError:
+                return default
+
+    def lookup(self, key):
+        """Get the cached value for `key`, counting a hit, for callers that load the values themselves
+           (such as the asyncio client).  If it is not cached, raises KeyError; the caller then
+           counts its load with :meth:`record_load`.
+        """
+        with self._lock:
+            value = self._lookup(key)
+            self._hits += 1
+            return value
+
+    def record_load(self, coalesced=False):
+        """Count a miss (a load of a value that was not cached), or a request that was coalesced
+           into another caller's load.
+        """
+        with self._lock:
+            if coalesced:
+                self._coalesced += 1
+            else:
+                self._misses += 1
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._stale.update(self._pending)
+
+    def ttl_for(self, key):
+        """The time to live for `key`"""
+        for pattern, ttl in self.ttl_rules:
+            if fnmatch.fnmatchcase(key, pattern):
+                return ttl
+        return self.ttl
+
+    def invalidate(self, prefix):
+        """Remove the entry for `prefix`, and for all keys below it: `prefix/...`, and `prefix?...`.
+           Responses that are being loaded for these keys are not cached.
+
+        :param prefix: A URI (without query string) whose cached responses are no longer valid
+        :return: The number of entries removed
+        """
+        with self._lock:
+            keys = [key for key in self._entries if under_prefix(key, prefix)]
+            for key in keys:
+                self._remove(key)
+            self._stale.update(key for key in self._pending if under_prefix(key, prefix))
+            self._invalidations += len(keys)
+            return len(keys)
+
+    def _lookup(self, key):
+        """Get the value for key (must hold the lock).  Raises KeyError if not cached, or expired."""
+        entry = self._entries.pop(key)
+        if entry.expires <= self._timer():
+            self._bytes -= entry.size
+            raise KeyError(key)
+        # Now the most recently used
+        self._entries[key] = entry
+        return entry.value
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _store(self, key, value, size):
+        """Add an entry (must hold the lock)"""
+        self._remove(key)
+        ttl = self.ttl_for(key)
+        if ttl <= 0 or (self.max_bytes is not None and size > self.max_bytes):
+            return
+        self._entries[key] = _Entry(value, self._timer() + ttl, size)
+        self._bytes += size
+        if self._over_budget():
+            now = self._timer()
+            for expired in [k for k, entry in self._entries.items() if entry.expires <= now]:
+                self._remove(expired)
+            while self._over_budget():
+                _, entry = self._entries.popitem(last=False)
+                self._bytes -= entry.size
+                self._evictions += 1
+
+    def _over_budget(self):
+        return (self.max_bytes is not None and self._bytes > self.max_bytes) or \
+               (self.maxsize is not None and len(self._entries) > self.maxsize)
+
+    def get_or_load(self, key, loader, with_size=False):
+        """Get the cached value for `key`, calling `loader()` to get it if it is not cached.
+           Concurrent calls for the same key share a single call to `loader`.
+
+        :param key: The cache key
+        :param loader: Function (with no arguments) that returns the value for the key
+        :param with_size: If True, `loader` returns a tuple of (value, size in bytes)
+        :return: The value
+        :raises: Whatever exception `loader` raised; in that case nothing is cached.
+        """
+        with self._lock:
+            try:
+                value = self._lookup(key)
+                self._hits += 1
+                return value
+            except KeyError:
+                pass
+            pending = self._pending.get(key)
+            if pending is None:
+                self._misses += 1
+                pending = self._pending[key] = Future()
+                pending.set_running_or_notify_cancel()
+                loading = True
+            else:
+                self._coalesced += 1
+                loading = False
+        if not loading:
+            # Another thread is loading this key; wait for it
+            return pending.result()
+
+        loaded = False
+        error = None
+        try:
+            if with_size:
+                value, size = loader()
+            else:
+                value = loader()
+                size = _estimate_size(value)
+            loaded = True
+        except Exception as exc:
+            error = exc
+            raise
+        finally:
+            # However the load ends (even with KeyboardInterrupt or GeneratorExit), don't leave
+            # the waiting threads, and the later callers for this key, blocked on it
+            with self._lock:
+                del self._pending[key]
+                if key in self._stale or not loaded:
+                    # invalidated while it was loading, or failed
+                    self._stale.discard(key)
+                else:
+                    self._store(key, value, size)
+            if loaded:
+                pending.set_result(value)
+            else:
+                pending.set_exception(error or RuntimeError(u"Loading '{0}' was interrupted".format(key)))
+        return value
+
+    def stats(self):
+        """Cache statistics.
+
+        :return: A dict with the number of "hits", "misses" (loads), requests "coalesced" into another
+          thread's load, "evictions" to keep within the size limits, "invalidations", and the current
+          number of entries ("size") and their total "bytes".
+        """
+        with self._lock:
+            return {"hits": self._hits,
+                    "misses": self._misses,
+                    "coalesced": self._coalesced,
+                    "evictions": self._evictions,
+                    "invalidations": self._invalidations,
+                    "size": len(self._entries),
+                    "maxsize": self.maxsize,
+                    "bytes": self._bytes,
+                    "max_bytes": self.max_bytes}
@@ -12,19 +12,31 @@ import os
 import sys
 import logging
 import datetime
+import functools
 import unicodedata
 import requests
 import importlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from . import co3base
 from .patch import PatchStatus
 from argparse import Namespace
 from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.poolmanager import PoolManager
 from requests_toolbelt.multipart.encoder import MultipartEncoder
-from cachetools import cachedmethod
-from cachetools.ttl import TTLCache
+from .cache import ResponseCache, DEFAULT_MAX_BYTES
+from .retry import RetryPolicy
+from .ratelimit import RateLimiter
+from .breaker import CircuitBreaker
+from .attachment_index import AttachmentIndex, hash_file
 from .co3base import ensure_unicode, get_proxy_dict, NoChange
 
+try:
+    # Optional: incremental JSON parsing for get_stream
+    import ijson
+except ImportError:
+    ijson = None
+
 try:
     # Python 3
     import urllib.parse as urlparse
@@ -93,6 +105,36 @@ def get_client(opts):
                           "proxies": proxy,
                           "base_url": url,
                           "verify": verify}
+    # Connection pool and cache settings, if specified
+    for name in ("pool_connections", "pool_maxsize", "pool_block", "tcp_keepalive", "tcp_nodelay",
+                 "cache_ttl", "cache_ttl_rules", "cache_max_bytes", "json_backend"):
+        if opts.get(name) is not None:
+            simple_client_args[name] = opts[name]
+    # Retry settings, if specified
+    retry_args = dict((arg, opts["retry_" + name])
+                      for name, arg in (("attempts", "max_attempts"), ("backoff", "backoff"),
+                                        ("max_backoff", "max_backoff"), ("deadline", "deadline"),
+                                        ("statuses", "retry_statuses"))
+                      if opts.get("retry_" + name) is not None)
+    if retry_args:
+        simple_client_args["retry_policy"] = RetryPolicy(**retry_args)
+    # Rate limit, if specified
+    if opts.get("rate_limit"):
+        simple_client_args["rate_limiter"] = RateLimiter(opts["rate_limit"], burst=opts.get("rate_limit_burst"))
+    # Attachment de-duplication, if enabled
+    if opts.get("attachment_index"):
+        index_args = {}
+        if opts.get("attachment_index_size"):
+            index_args["max_entries"] = opts["attachment_index_size"]
+        simple_client_args["attachment_index"] = AttachmentIndex(os.path.expanduser(opts["attachment_index"]),
+                                                                 **index_args)
+    # Circuit breaker, if enabled
+    if opts.get("circuit_breaker_failure_rate"):
+        breaker_args = dict((arg, opts["circuit_breaker_" + arg])
+                            for arg in ("window", "min_requests", "reset_timeout")
+                            if opts.get("circuit_breaker_" + arg) is not None)
+        simple_client_args["circuit_breaker"] = CircuitBreaker(failure_rate=opts["circuit_breaker_failure_rate"],
+                                                               **breaker_args)
     if opts.get("log_http_responses"):
         LOG.warn("Logging all HTTP Responses from Resilient to %s", opts["log_http_responses"])
         simple_client = LoggingSimpleClient
@@ -163,10 +205,76 @@ def _raise_if_error(response):
         raise SimpleHTTPException(response)
 
 
+def _map_concurrently(func, items, max_workers):
+    """Helper to call func(item) for each item, using up to max_workers threads.
+
+    :param func: function of one argument
+    :param items: list of arguments
+    :param max_workers: maximum number of simultaneous calls
+    :return: list of the results, in the same order as `items`.  If a call raised an exception,
+      the exception is in the list instead of a result.
+    """
+    def call(item):
+        try:
+            return func(item)
+        except Exception as ex:
+            return ex
+
+    if len(items) <= 1 or max_workers <= 1:
+        return [call(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(call, items))
+
+
+class _ResponseReader(object):
+    """Helper: a file-like object that reads the body of a streamed Response, one chunk at a time"""
+    def __init__(self, response, chunk_size):
+        self._chunks = response.iter_content(chunk_size)
+        self._buffer = b""
+
+    def read(self, size=-1):
+        if not self._buffer:
+            self._buffer = next(self._chunks, b"")
+        if size is None or size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def _items_at_path(value, path):
+    """Helper: the items at an ijson-style `path` (e.g. "histories.item") of a decoded JSON value.
+
+    >>> list(_items_at_path({"histories": [{"id": 1}, {"id": 2}]}, "histories.item"))
+    [{'id': 1}, {'id': 2}]
+    """
+    if not path:
+        yield value
+        return
+    key, _, rest = path.partition(".")
+    if key == "item" and isinstance(value, list):
+        children = value
+    elif isinstance(value, dict) and key in value:
+        children = [value[key]]
+    else:
+        children = []
+    for child in children:
+        for item in _items_at_path(child, rest):
+            yield item
+
+
 class SimpleClient(co3base.BaseClient):
-    """Python helper class for using the Resilient REST API."""
+    """Python helper class for using the Resilient REST API.
+
+    A SimpleClient is safe to share between threads.  All threads use the same pool of connections
+    and the same response cache.  When the session expires, one thread re-authenticates and the others
+    wait for it, then retry their requests with the new session.
+    """
 
-    def __init__(self, org_name=None, base_url=None, proxies=None, verify=None, cache_ttl=240):
+    def __init__(self, org_name=None, base_url=None, proxies=None, verify=None, cache_ttl=240,
+                 pool_connections=co3base.DEFAULT_POOLSIZE, pool_maxsize=co3base.DEFAULT_POOLSIZE,
+                 pool_block=co3base.DEFAULT_POOLBLOCK, tcp_keepalive=False, tcp_nodelay=True,
+                 cache_ttl_rules=None, cache_max_bytes=DEFAULT_MAX_BYTES, retry_policy=None, rate_limiter=None,
+                 circuit_breaker=None, json_backend=None, attachment_index=None):
         """
 
         :param org_name: The name of the organization to use.
@@ -174,9 +282,38 @@ class SimpleClient(co3base.BaseClient):
         :param proxies: A dictionary of HTTP proxies to use, if any.
         :param verify: The path to a PEM file containing the trusted CAs, or False to disable all TLS verification
         :param cache_ttl: Time to live for cached API responses
+        :param pool_connections: The number of connection pools to cache
+        :param pool_maxsize: The maximum number of connections to keep open to the server.  This should be
+          at least the number of threads that use the client at the same time.
+        :param pool_block: If True, wait for a free connection rather than open more than pool_maxsize
+        :param tcp_keepalive: Enable TCP keep-alive on connections to the server
+        :param tcp_nodelay: Disable Nagle's algorithm on connections to the server
+        :param cache_ttl_rules: Time to live for cached responses whose URI matches a pattern, instead of cache_ttl.
+          A list of (pattern, seconds), or a string such as "/types/*:3600, /incidents/*:30".
+        :param cache_max_bytes: Maximum total size of the cached responses
+        :param retry_policy: The :class:`resilient.retry.RetryPolicy` for requests that fail with transient
+          errors, and for updates that get conflicts.  The default retries idempotent requests up to 3 times.
+        :param rate_limiter: A :class:`resilient.ratelimit.RateLimiter` to limit the rate of requests to
+          the server; requests over the limit wait for their turn.  The default is no limit.
+        :param circuit_breaker: A :class:`resilient.breaker.CircuitBreaker` that makes requests fail fast,
+          with :class:`resilient.breaker.CircuitBreakerOpen`, while the server is failing.  The default is none.
+        :param json_backend: The JSON library for request and response bodies: "json"
+          (the standard library, the default), "orjson", "ujson", or "auto" for the fastest that is installed.
+        :param attachment_index: A :class:`resilient.attachment_index.AttachmentIndex` of uploaded attachments.
+          If set, :meth:`post_attachment()` does not upload a file whose content is already attached.
         """
-        super(SimpleClient, self).__init__(org_name, base_url, proxies, verify)
-        self.cache = TTLCache(maxsize=128, ttl=cache_ttl)
+        super(SimpleClient, self).__init__(org_name, base_url, proxies, verify,
+                                           pool_connections=pool_connections,
+                                           pool_maxsize=pool_maxsize,
+                                           pool_block=pool_block,
+                                           tcp_keepalive=tcp_keepalive,
+                                           tcp_nodelay=tcp_nodelay,
+                                           retry_policy=retry_policy,
+                                           rate_limiter=rate_limiter,
+                                           circuit_breaker=circuit_breaker,
+                                           json_backend=json_backend)
+        self.cache = ResponseCache(ttl=cache_ttl, ttl_rules=cache_ttl_rules, max_bytes=cache_max_bytes)
+        self.attachment_index = attachment_index
 
     def connect(self, email, password, timeout=None):
         """
@@ -207,6 +344,27 @@ class SimpleClient(co3base.BaseClient):
     def _get_cache(self):
         return self.cache
 
+    def get_cache_stats(self):
+        """Statistics for the cache used by :meth:`cached_get()`.
+
+        :return: A dict with the number of "hits", "misses", "coalesced" requests (which waited for
+          another thread's request for the same URI), "evictions", "invalidations", and the number of
+          entries ("size") and their total "bytes".
+        """
+        return self.cache.stats()
+
+    def _invalidate_cache(self, uri):
+        """Remove cached responses for a resource that this client has changed (and for its children)"""
+        self._get_cache().invalidate(ensure_unicode(uri).split(u"?")[0])
+
+    def _load_for_cache(self, uri, co3_context_token=None, timeout=None):
+        """Get the value and size of a resource, for the cache"""
+        try:
+            response = self._get_response(uri, co3_context_token, timeout)
+        except co3base.BasicHTTPException as ex:
+            _raise_if_error(ex.get_response())
+        return self.json_codec.loads(response.content), len(response.content)
+
     def get(self, uri, co3_context_token=None, timeout=None):
         """Gets the specified URI.
 
@@ -228,10 +386,146 @@ class SimpleClient(co3base.BaseClient):
             _raise_if_error(ex.get_response())
         return response
 
-    @cachedmethod(_get_cache, key=_keyfunc)
     def cached_get(self, uri, co3_context_token=None, timeout=None):
-        """ Same as :meth:`get()`, but checks cache first """
-        return self.get(uri, co3_context_token, timeout)
+        """ Same as :meth:`get()`, but checks cache first.
+        If several threads ask for the same uri at once, only one request is made.
+        """
+        return self._get_cache().get_or_load(self._keyfunc(uri, co3_context_token, timeout),
+                                             lambda: self._load_for_cache(uri, co3_context_token, timeout),
+                                             with_size=True)
+
+    def get_stream(self, uri, path="item", co3_context_token=None, timeout=None, chunk_size=65536):
+        """Gets the specified URI, and yields the items at `path` in the response as they arrive.
+
+        This is for very large responses, such as an organization export or a big search result.
+        If the `ijson` package is installed ("pip install resilient[streaming]"), the response is parsed
+        while it is read, so memory use depends on the size of one item, not of the whole response.
+        Otherwise the whole response is read and decoded first.
+
+        .. code-block:: python
+
+            for export in client.get_stream("/configurations/exports/history", "histories.item"):
+                print(export["id"])
+
+        :param uri: Relative URI of the resource to fetch.
+        :param path: The location of the items in the response, as dot-separated keys, where "item"
+          means each element of a list.  For example, "item" for the elements of a top-level list, or
+          "histories.item" for the elements of the "histories" list.  An empty path yields the whole value.
+        :param co3_context_token: The Co3ContextToken from an Action Module message, if available.
+        :param timeout: optional timeout (seconds)
+        :param chunk_size: The number of bytes to read at a time
+        :return: A generator of the items
+        :raises SimpleHTTPException: if an HTTP exception occurs.
+        """
+        try:
+            response = self._get_response(uri, co3_context_token, timeout, stream=ijson is not None)
+        except co3base.BasicHTTPException as ex:
+            _raise_if_error(ex.get_response())
+        try:
+            if ijson is None:
+                items = _items_at_path(self.json_codec.loads(response.content), path)
+            else:
+                reader = _ResponseReader(response, chunk_size)
+                try:
+                    # ijson 3.1 and later can return floats, as the other JSON decoders do, instead of Decimals
+                    items = ijson.items(reader, path, use_float=True)
+                except TypeError:
+                    items = ijson.items(reader, path)
+            for item in items:
+                yield item
+        finally:
+            response.close()
+
+    def get_many(self, uris, co3_context_token=None, timeout=None, max_workers=8, as_dict=False):
+        """Gets each of the specified URIs, running up to `max_workers` requests at the same time.
+
+        :param uris: List of relative URIs of the resources to fetch.
+        :param co3_context_token: The Co3ContextToken from an Action Module message, if available.
+        :param timeout: optional timeout (seconds) for each request
+        :param max_workers: maximum number of requests in flight at once
+        :param as_dict: if True, return an ordered dict of {uri: value} instead of a list
+        :return: A list of the values returned by the server, in the same order as `uris`.
+          Errors are reported per URI: if a request failed, its exception (usually a
+          :class:`SimpleHTTPException`) is returned in place of the value.
+        """
+        uris = list(uris)
+        results = _map_concurrently(lambda uri: self.get(uri, co3_context_token, timeout), uris, max_workers)
+        if as_dict:
+            return OrderedDict(zip(uris, results))
+        return results
+
+    def cached_get_many(self, uris, co3_context_token=None, timeout=None, max_workers=8, as_dict=False):
+        """ Same as :meth:`get_many()`, but checks cache first """
+        uris = list(uris)
+        unique_uris = list(OrderedDict.fromkeys(uris))
+        cache = self._get_cache()
+        # Threads are only needed if something is not in the cache
+        if all(self._keyfunc(uri) in cache for uri in unique_uris):
+            max_workers = 1
+        results = dict(zip(unique_uris,
+                           _map_concurrently(lambda uri: self.cached_get(uri, co3_context_token, timeout),
+                                             unique_uris, max_workers)))
+        if as_dict:
+            return OrderedDict((uri, results[uri]) for uri in uris)
+        return [results[uri] for uri in uris]
+
+    def iter_query(self, uri, query=None, page_size=100, co3_context_token=None, timeout=None, prefetch=True):
+        """Iterate over the results of a paged query, such as :samp:`/incidents/query_paged`.
+
+        The pages are requested one at a time, by posting the query with its `start` and `length`
+        set.  While the rows of one page are being used, the next page is read in the background;
+        rows are not kept after they are returned, so memory use does not grow with the number of results.
+
+        .. code-block:: python
+
+            query = {"filters": [{"conditions": [{"field_name": "plan_status", "method": "equals", "value": "A"}]}]}
+            for incident in client.iter_query("/incidents/query_paged", query, page_size=500):
+                print(incident["id"])
+
+        :param uri: Relative URI of the paged query endpoint.
+        :param query: The query (e.g. a QueryDTO with `filters` and `sorts`), as a dictionary
+        :param page_size: The number of rows to request in each page
+        :param co3_context_token: The Co3ContextToken from an Action Module message, if available.
+        :param timeout: optional timeout (seconds) for each page
+        :param prefetch: Read the next page in the background
+        :return: A generator of the rows
+        :raises SimpleHTTPException: if an HTTP exception occurs.
+        """
+        query = dict(query or {})
+        start = query.get("start", 0)
+
+        def get_page(page_start):
+            return self.post(uri, dict(query, start=page_start, length=page_size), co3_context_token, timeout)
+
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        next_page = None
+        try:
+            page = get_page(start)
+            while True:
+                if isinstance(page, list):
+                    # not a paged response; this is all the results
+                    rows, total = page, None
+                else:
+                    rows = page.get("data") or []
+                    total = page.get("recordsFiltered", page.get("recordsTotal"))
+                page = None
+                start += len(rows)
+                more = len(rows) >= page_size > 0 and (total is None or start < total)
+                if more and executor:
+                    next_page = executor.submit(get_page, start)
+                # Yield from the end of the reversed list, so that each row is released once it has been used
+                rows.reverse()
+                while rows:
+                    yield rows.pop()
+                if not more:
+                    return
+                page = next_page.result() if next_page else get_page(start)
+                next_page = None
+        finally:
+            if next_page:
+                next_page.cancel()
+            if executor:
+                executor.shutdown(wait=False)
 
     def get_const(self, co3_context_token=None, timeout=None):
         """
@@ -255,7 +549,7 @@ class SimpleClient(co3base.BaseClient):
                                          verify=self.verify,
                                          timeout=timeout)
         _raise_if_error(response)
-        return json.loads(response.text)
+        return self.json_codec.loads(response.content)
 
     def get_content(self, uri, co3_context_token=None, timeout=None):
         """Gets the specified URI.
@@ -278,6 +572,35 @@ class SimpleClient(co3base.BaseClient):
             _raise_if_error(ex.get_response())
         return response
 
+    def download(self, uri, dest=None, co3_context_token=None, timeout=None, chunk_size=65536):
+        """Gets the specified URI (such as the contents of an attachment), and writes it to `dest`.
+
+        Unlike :meth:`get_content()`, the response is streamed: it is written one chunk at a time,
+        so a large attachment is never all in memory.
+
+        .. code-block:: python
+
+            result = client.download("/incidents/2095/attachments/12/contents", "/tmp/sample.bin")
+            print(result["size"], result["sha256"])
+
+        :param uri: Relative URI of the resource to fetch.
+        :param dest: A path, or a file object opened for writing in binary mode, or None to write to
+          a new temporary file (which the caller must remove).
+        :param co3_context_token: The Co3ContextToken from an Action Module message, if available.
+        :param timeout: optional timeout (seconds)
+        :param chunk_size: The number of bytes to read and write at a time
+        :return: A dict with the "path" that was written (None for a file object with no name),
+          and the "size" and "sha256" hex digest of the content.
+        :raises SimpleHTTPException: if an HTTP exception occurs.
+        """
+        # Call download from BaseClient. Convert exception if there is any
+        result = None
+        try:
+            result = super(SimpleClient, self).download(uri, dest, co3_context_token, timeout, chunk_size)
+        except co3base.BasicHTTPException as ex:
+            _raise_if_error(ex.get_response())
+        return result
+
     def post(self, uri, payload, co3_context_token=None, timeout=None):
         """Posts to the specified URI.
 
@@ -304,9 +627,9 @@ class SimpleClient(co3base.BaseClient):
         """Internal method used to call the underlying server patch endpoint"""
         url = u"{0}/rest/orgs/{1}{2}".format(self.base_url, self.org_id, ensure_unicode(uri))
         if isinstance(patch, dict):
-            payload_json = json.dumps(patch)
+            payload_json = self.json_codec.dumps(patch)
         else:
-            payload_json = json.dumps(patch.to_dict())
+            payload_json = self.json_codec.dumps(patch.to_dict())
 
         hdrs = {"handle_format": "names"}
         response = self._execute_request(self.session.patch,
@@ -426,15 +749,69 @@ class SimpleClient(co3base.BaseClient):
         :param timeout: optional timeout (seconds)
         :return: The response object.
         """
-        response = self._patch(uri, patch, co3_context_token, timeout)
-
-        while self._handle_patch_response(response, patch, callback):
+        try:
             response = self._patch(uri, patch, co3_context_token, timeout)
 
+            retry = self.retry_policy.begin()
+            while self._handle_patch_response(response, patch, callback):
+                # Wait before retrying a server CONFLICT; a patch that the callback adjusted is re-issued now
+                if response.status_code == 409 and not retry.retry(conflict=True):
+                    _raise_if_error(response)
+                response = self._patch(uri, patch, co3_context_token, timeout)
+        finally:
+            self._invalidate_cache(uri)
+
         return response
 
+    def patch_many(self, patches, callback=None, co3_context_token=None, timeout=None, max_workers=8,
+                   overwrite_conflict=False):
+        """
+        PATCH requests to many URIs, running up to `max_workers` requests at the same time.  Each patch is
+        applied as by :meth:`patch_with_callback()`: if it fails because of field conflicts, the callback is
+        invoked for that object, and the adjusted patch is re-issued.  Requests are made within the client's
+        rate limit, and retried according to its retry policy.
+
+        .. code-block:: python
+
+            patches = [("/incidents/{0}".format(inc["id"]), resilient.Patch.from_diff(inc, updated[inc["id"]]))
+                       for inc in incidents]
+            for uri, status in client.patch_many(patches, overwrite_conflict=True).items():
+                if isinstance(status, Exception) or not status.is_success():
+                    LOG.error(u"%s: %s", uri, status)
+
+        :param patches: List of (uri, patch) pairs, where each :class:`Patch` is for a different URI.
+        :param callback: Function/lambda to invoke when a patch conflict is detected, as for
+          :meth:`patch_with_callback()`.  It is called from the worker threads.  If omitted, conflicts
+          are handled according to `overwrite_conflict`, as for :meth:`patch()`.
+        :param co3_context_token: the Co3ContextToken from an Action Module message, if available.
+        :param timeout: optional timeout (seconds) for each request
+        :param max_workers: maximum number of requests in flight at once
+        :param overwrite_conflict: if there is no callback, always overwrite fields in conflict
+        :return: An ordered dict of {uri: :class:`PatchStatus`}, in the same order as `patches`.
+          Errors are reported per URI: if a patch failed (e.g. with a :class:`PatchConflictException`),
+          its exception is in place of the status.
+        :raises ValueError: if a URI is in `patches` more than once.
+        """
+        patches = list(patches)
+        uris = [uri for uri, patch in patches]
+        if len(set(uris)) != len(uris):
+            raise ValueError("Each URI can only be patched once in patch_many")
+        if callback is None:
+            if overwrite_conflict:
+                callback = SimpleClient._patch_overwrite_callback
+            else:
+                callback = SimpleClient._patch_raise_callback
+
+        def apply_patch(uri_patch):
+            uri, patch = uri_patch
+            response = self.patch_with_callback(uri, patch, callback, co3_context_token, timeout)
+            return PatchStatus(response.json())
+
+        return OrderedDict(zip(uris, _map_concurrently(apply_patch, patches, max_workers)))
+
     def post_attachment(self, uri, filepath,
-                        filename=None, mimetype=None, data=None, co3_context_token=None, timeout=None):
+                        filename=None, mimetype=None, data=None, co3_context_token=None, timeout=None,
+                        progress_callback=None):
         """
         Upload a file to the specified URI
         e.g. "/incidents/<id>/attachments" (for incident attachments)
@@ -447,16 +824,110 @@ class SimpleClient(co3base.BaseClient):
         :param data: optional dict with additional MIME parts (not required for file attachments; used in artifacts)
         :param co3_context_token: the Co3ContextToken from an Action Module message, if available.
         :param timeout: optional timeout (seconds)
+        :param progress_callback: optional function, called as `progress_callback(bytes_sent, total_bytes)`
+          as the file is sent
+        :return: The attachment.  If the client has an `attachment_index`, and a file with the same
+          content was already attached at this URI, it is not uploaded again: the existing attachment is returned.
         """
+        # Only plain attachments are de-duplicated; `data` is used for artifacts
+        index = self.attachment_index if data is None else None
+        sha256 = None
+        if index is not None:
+            sha256 = hash_file(filepath)
+            existing = self._find_attachment(index, uri, sha256, co3_context_token, timeout)
+            if existing is not None:
+                LOG.debug(u"Not uploading %s: it is already attached as %s", filepath, existing.get("id"))
+                return existing
         # Call BaseClient post_attachment. Convert exception if there is any
         response = None
         try:
             response = super(SimpleClient, self).post_attachment(uri, filepath, filename, mimetype, data,
-                                                                 co3_context_token, timeout)
+                                                                 co3_context_token, timeout, progress_callback)
         except co3base.BasicHTTPException as ex:
             _raise_if_error(ex.get_response())
+        if index is not None:
+            index.add(uri, sha256, response)
         return response
 
+    def _find_attachment(self, index, uri, sha256, co3_context_token=None, timeout=None):
+        """The attachment in the index with this content, if it still exists"""
+        attachment = index.get(uri, sha256)
+        if attachment is None or not index.confirm:
+            return attachment
+        try:
+            attachments = self.get(uri, co3_context_token, timeout)
+        except SimpleHTTPException as ex:
+            LOG.warn(u"Couldn't confirm attachment %s: %s", attachment.get("id"), ex)
+            attachments = []
+        for current in attachments:
+            if current.get("id") == attachment.get("id"):
+                return current
+        # It was deleted
+        index.remove(uri, sha256)
+        return None
+
+    def post_attachments(self, uri, filepaths, co3_context_token=None, timeout=None, max_workers=4,
+                         progress_callback=None):
+        """Upload several files to the specified URI, running up to `max_workers` uploads at the same time.
+        Each file is streamed from disk, so memory use does not depend on the size of the files.
+
+        .. code-block:: python
+
+            def progress(filepath, bytes_sent, total_bytes):
+                LOG.info(u"%s: %d%%", filepath, 100 * bytes_sent // total_bytes)
+
+            results = client.post_attachments("/incidents/2095/attachments", paths, progress_callback=progress)
+
+        :param uri: Relative URI of the resource to post, e.g. "/incidents/<id>/attachments"
+        :param filepaths: List of paths of the files to post
+        :param co3_context_token: the Co3ContextToken from an Action Module message, if available.
+        :param timeout: optional timeout (seconds) for each upload
+        :param max_workers: maximum number of uploads in flight at once
+        :param progress_callback: optional function, called as `progress_callback(filepath, bytes_sent, total_bytes)`
+          as each file is sent.  It is called from the upload threads, so it should only record the
+          progress (e.g. for a function to report with a StatusMessage), and return quickly.
+        :return: A list of the attachments created, in the same order as `filepaths`.  Errors are reported
+          per file: if an upload failed, its exception is returned in place of the attachment.
+        """
+        return self._post_files(lambda filepath, callback: self.post_attachment(uri, filepath,
+                                                                                co3_context_token=co3_context_token,
+                                                                                timeout=timeout,
+                                                                                progress_callback=callback),
+                                filepaths, max_workers, progress_callback)
+
+    def post_artifact_files(self, uri, artifact_type, filepaths, description=None, co3_context_token=None,
+                            timeout=None, max_workers=4, progress_callback=None):
+        """Post several file artifacts to the specified URI, running up to `max_workers` uploads at the same time.
+
+        :param uri: Relative URI of the resource to post, e.g. "/incidents/<id>/artifacts/files"
+        :param artifact_type: the artifact type name ("Malware Sample", etc) or type ID
+        :param filepaths: List of paths of the files to post
+        :param description: optional description for the artifacts
+        :param co3_context_token: the Co3ContextToken from an Action Module message, if available.
+        :param timeout: optional timeout (seconds) for each upload
+        :param max_workers: maximum number of uploads in flight at once
+        :param progress_callback: optional function, called as `progress_callback(filepath, bytes_sent, total_bytes)`
+          as each file is sent (see :meth:`post_attachments()`).
+        :return: A list of the artifacts created, in the same order as `filepaths`.  Errors are reported
+          per file: if an upload failed, its exception is returned in place of the artifact.
+        """
+        return self._post_files(lambda filepath, callback: self.post_artifact_file(uri, artifact_type, filepath,
+                                                                                   description=description,
+                                                                                   co3_context_token=co3_context_token,
+                                                                                   timeout=timeout,
+                                                                                   progress_callback=callback),
+                                filepaths, max_workers, progress_callback)
+
+    @staticmethod
+    def _post_files(post_file, filepaths, max_workers, progress_callback):
+        """Helper to call post_file(filepath, callback) concurrently, with a per-file progress callback"""
+        def post(filepath):
+            callback = None
+            if progress_callback:
+                callback = lambda bytes_sent, total_bytes: progress_callback(filepath, bytes_sent, total_bytes)
+            return post_file(filepath, callback)
+        return _map_concurrently(post, list(filepaths), max_workers)
+
     def search(self, payload, co3_context_token=None, timeout=None):
         """
         Posts to the SearchExREST endpoint.
@@ -471,7 +942,7 @@ class SimpleClient(co3base.BaseClient):
         :raises SimpleHTTPException: if an HTTP exception occurs.
         """
         url = u"{0}/rest/search_ex".format(self.base_url)
-        payload_json = json.dumps(payload)
+        payload_json = self.json_codec.dumps(payload)
         response = self._execute_request(self.session.post,
                                          url,
                                          data=payload_json,
@@ -481,7 +952,7 @@ class SimpleClient(co3base.BaseClient):
                                          verify=self.verify,
                                          timeout=timeout)
         _raise_if_error(response)
-        return json.loads(response.text)
+        return self.json_codec.loads(response.content)
 
     def get_put(self, uri, apply_func, co3_context_token=None, timeout=None):
         """Safely performs an update operation by a GET, calls your `apply_func` callback, then PUT
@@ -506,6 +977,8 @@ class SimpleClient(co3base.BaseClient):
             res = super(SimpleClient, self).get_put(uri, apply_func, co3_context_token, timeout)
         except co3base.BasicHTTPException as ex:
             _raise_if_error(ex.get_response())
+        finally:
+            self._invalidate_cache(uri)
         return res
 
     def put(self, uri, payload, co3_context_token=None, timeout=None):
@@ -528,6 +1001,8 @@ class SimpleClient(co3base.BaseClient):
             response = super(SimpleClient, self).put(uri, payload, co3_context_token, timeout)
         except co3base.BasicHTTPException as ex:
             _raise_if_error(ex.get_response())
+        finally:
+            self._invalidate_cache(uri)
         return response
 
     def delete(self, uri, co3_context_token=None, timeout=None):
@@ -548,6 +1023,8 @@ class SimpleClient(co3base.BaseClient):
             response = super(SimpleClient, self).delete(uri, co3_context_token, timeout)
         except co3base.BasicHTTPException as ex:
             _raise_if_error(ex.get_response())
+        finally:
+            self._invalidate_cache(uri)
         return response
 
 
@@ -596,6 +1073,7 @@ class LoggingSimpleClient(SimpleClient):
         """Execute a HTTP request and log response.
            If unauthorized (likely due to a session timeout), retry.
         """
+        @functools.wraps(operation)
         def wrapped_operation(url, **kwargs):
             return operation(url, hooks=dict(response=self._log_response),
                              **kwargs)
@@ -16,6 +16,8 @@ if sys.version_info.major == 2:
     from resilient import ensure_unicode, get_proxy_dict
 else:
     from resilient.co3 import ensure_unicode, get_proxy_dict
+from resilient.cache import DEFAULT_MAX_BYTES
+from resilient.attachment_index import DEFAULT_MAX_ENTRIES
 
 try:
     # For all python < 3.2
@@ -114,11 +116,32 @@ class ArgumentParser(argparse.ArgumentParser):
         default_org = self.getopt("resilient", "org")
         default_cafile = self.getopt("resilient", "cafile")
         default_cache_ttl = int(self.getopt("resilient", "cache_ttl") or 0)
+        default_cache_ttl_rules = self.getopt("resilient", "cache_ttl_rules")
+        default_cache_max_bytes = int(self.getopt("resilient", "cache_max_bytes") or DEFAULT_MAX_BYTES)
         default_proxy_host = self.getopt("resilient", "proxy_host")
         default_proxy_port = self.getopt("resilient", "proxy_port") or 0
         default_proxy_user = self.getopt("resilient", "proxy_user")
         default_proxy_password = self.getopt("resilient", "proxy_password")
         default_stomp_prefetch_limit = int(self.getopt("resilient", "stomp_prefetch_limit") or 20)
+        default_pool_connections = int(self.getopt("resilient", "pool_connections") or 10)
+        default_pool_maxsize = int(self.getopt("resilient", "pool_maxsize") or 10)
+        default_pool_block = self._is_true(self.getopt("resilient", "pool_block"))
+        default_tcp_keepalive = self._is_true(self.getopt("resilient", "tcp_keepalive"))
+        default_tcp_nodelay = self._is_true(self.getopt("resilient", "tcp_nodelay") or "true")
+        default_retry_attempts = int(self.getopt("resilient", "retry_attempts") or 3)
+        default_retry_backoff = float(self.getopt("resilient", "retry_backoff") or 0.5)
+        default_retry_max_backoff = float(self.getopt("resilient", "retry_max_backoff") or 30)
+        default_retry_deadline = float(self.getopt("resilient", "retry_deadline") or 0)
+        default_retry_statuses = self.getopt("resilient", "retry_statuses") or "502,503,504"
+        default_rate_limit = self.getopt("resilient", "rate_limit")
+        default_rate_limit_burst = self.getopt("resilient", "rate_limit_burst")
+        default_json_backend = self.getopt("resilient", "json_backend") or "json"
+        default_circuit_breaker_failure_rate = float(self.getopt("resilient", "circuit_breaker_failure_rate") or 0)
+        default_circuit_breaker_window = int(self.getopt("resilient", "circuit_breaker_window") or 20)
+        default_circuit_breaker_min_requests = int(self.getopt("resilient", "circuit_breaker_min_requests") or 10)
+        default_circuit_breaker_reset_timeout = float(self.getopt("resilient", "circuit_breaker_reset_timeout") or 30)
+        default_attachment_index = self.getopt("resilient", "attachment_index")
+        default_attachment_index_size = int(self.getopt("resilient", "attachment_index_size") or DEFAULT_MAX_ENTRIES)
 
         self.add_argument("--email",
                           default=default_email,
@@ -161,6 +184,16 @@ class ArgumentParser(argparse.ArgumentParser):
                           type=int,
                           help="TTL for API responses when using cached_get")
 
+        self.add_argument("--cache-ttl-rules",
+                          default=default_cache_ttl_rules,
+                          help="TTL for cached API responses whose URI matches a pattern, "
+                               "e.g. '/types/*:3600, /incidents/*:30'")
+
+        self.add_argument("--cache-max-bytes",
+                          default=default_cache_max_bytes,
+                          type=int,
+                          help="Maximum total size of cached API responses")
+
         self.add_argument("--proxy_host",
                           default=default_proxy_host,
                           help="HTTP Proxy host for Resilient Connection.")
@@ -183,6 +216,109 @@ class ArgumentParser(argparse.ArgumentParser):
                           type=int,
                           help="MAX number of Action Module messages to send before ACK is required")
 
+        self.add_argument("--pool-connections",
+                          default=default_pool_connections,
+                          type=int,
+                          help="Number of HTTP connection pools to cache")
+
+        self.add_argument("--pool-maxsize",
+                          default=default_pool_maxsize,
+                          type=int,
+                          help="Maximum number of HTTP connections to keep open to the Resilient server")
+
+        self.add_argument("--pool-block",
+                          default=default_pool_block,
+                          type=self._is_true,
+                          help="Wait for a free HTTP connection rather than open more than pool-maxsize (true/false)")
+
+        self.add_argument("--tcp-keepalive",
+                          default=default_tcp_keepalive,
+                          type=self._is_true,
+                          help="Enable TCP keep-alive on connections to the Resilient server (true/false)")
+
+        self.add_argument("--tcp-nodelay",
+                          default=default_tcp_nodelay,
+                          type=self._is_true,
+                          help="Disable Nagle's algorithm on connections to the Resilient server (true/false)")
+
+        self.add_argument("--retry-attempts",
+                          default=default_retry_attempts,
+                          type=int,
+                          help="Maximum number of attempts for requests that fail with transient errors "
+                               "(1 for no retry)")
+
+        self.add_argument("--retry-backoff",
+                          default=default_retry_backoff,
+                          type=float,
+                          help="Maximum wait (seconds) before the first retry, doubled for each retry")
+
+        self.add_argument("--retry-max-backoff",
+                          default=default_retry_max_backoff,
+                          type=float,
+                          help="Maximum wait (seconds) before any retry")
+
+        self.add_argument("--retry-deadline",
+                          default=default_retry_deadline,
+                          type=float,
+                          help="Do not retry a request after this many seconds (0 for no limit)")
+
+        self.add_argument("--retry-statuses",
+                          default=default_retry_statuses,
+                          help="HTTP status codes that are retried, e.g. '502,503,504'")
+
+        self.add_argument("--rate-limit",
+                          default=default_rate_limit,
+                          help="Maximum REST API requests per second: a number for all requests, "
+                               "or for each class of request, e.g. 'read:20, write:5, search:1'")
+
+        self.add_argument("--rate-limit-burst",
+                          default=default_rate_limit_burst,
+                          type=int,
+                          help="Number of REST API requests that can be made at once, within the rate limit")
+
+        self.add_argument("--json-backend",
+                          default=default_json_backend,
+                          choices=["auto", "orjson", "ujson", "json"],
+                          help="JSON library for REST API requests and responses ('auto' for the fastest installed)")
+
+        self.add_argument("--circuit-breaker-failure-rate",
+                          default=default_circuit_breaker_failure_rate,
+                          type=float,
+                          help="Stop REST API requests when this fraction (0 to 1) of recent requests failed "
+                               "(0 to disable the circuit breaker)")
+
+        self.add_argument("--circuit-breaker-window",
+                          default=default_circuit_breaker_window,
+                          type=int,
+                          help="Number of recent REST API requests counted by the circuit breaker")
+
+        self.add_argument("--circuit-breaker-min-requests",
+                          default=default_circuit_breaker_min_requests,
+                          type=int,
+                          help="Minimum number of recent REST API requests before the circuit breaker can open")
+
+        self.add_argument("--circuit-breaker-reset-timeout",
+                          default=default_circuit_breaker_reset_timeout,
+                          type=float,
+                          help="Seconds before a probe request is sent, after the circuit breaker opens")
+
+        self.add_argument("--attachment-index",
+                          default=default_attachment_index,
+                          help="File to record uploaded attachments by content hash, so that the same "
+                               "content is not attached twice")
+
+        self.add_argument("--attachment-index-size",
+                          default=default_attachment_index_size,
+                          type=int,
+                          help="Maximum number of attachments in the attachment index")
+
+    @staticmethod
+    def _is_true(value):
+        if value:
+            return value.lower()[0] in ("1", "t", "y")
+        else:
+            return False
+
     def parse_args(self, args=None, namespace=None):
         """
         Parse the configuration options and command-line arguments.
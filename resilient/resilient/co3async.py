@@ -0,0 +1,615 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright IBM Corp. 2010, 2017. All Rights Reserved.
+
+"""asyncio client for Resilient REST API (Python 3.5+, requires 'aiohttp')"""
+
+import asyncio
+import json
+import logging
+import mimetypes
+import os
+import ssl
+import aiohttp
+from .cache import ResponseCache, DEFAULT_MAX_BYTES, under_prefix
+from .co3 import SimpleClient, _raise_if_error
+from .co3base import ensure_unicode, select_org, NoChange
+from .retry import RetryPolicy
+from .jsoncodec import get_codec
+
+LOG = logging.getLogger(__name__)
+
+
+class AsyncResponse(object):
+    """A fully-read HTTP response from the AsyncSimpleClient.
+
+    This has the subset of the `requests.Response` interface that is used by
+    :class:`SimpleHTTPException` and the patch conflict callbacks.
+    """
+    def __init__(self, response, content, json_codec=None):
+        self.status_code = response.status
+        self.reason = response.reason
+        self.url = str(response.url)
+        self.headers = response.headers
+        self.cookies = {name: morsel.value for name, morsel in response.cookies.items()}
+        self.content = content
+        self.encoding = response.get_encoding() if content else "utf-8"
+        self._json_codec = json_codec or get_codec("json")
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors="replace")
+
+    def json(self):
+        return self._json_codec.loads(self.content)
+
+
+class AsyncSimpleClient(object):
+    """asyncio helper class for using the Resilient REST API.
+
+    This has the same methods as :class:`SimpleClient`, but each is a coroutine.
+    All requests share one pool of HTTP connections, so many requests can be in flight at once
+    from a single thread:
+
+    .. code-block:: python
+
+        async with AsyncSimpleClient(org_name=org, base_url=url) as client:
+            await client.connect(email, password)
+            incidents = await asyncio.gather(*[client.get("/incidents/{}".format(inc_id))
+                                               for inc_id in incident_ids])
+
+    The client must only be used from the event loop that it was first used on.
+    """
+
+    def __init__(self, org_name=None, base_url=None, proxies=None, verify=None, cache_ttl=240,
+                 pool_maxsize=100, cache_ttl_rules=None, cache_max_bytes=DEFAULT_MAX_BYTES, retry_policy=None,
+                 rate_limiter=None, circuit_breaker=None, json_backend=None):
+        """
+        :param org_name: The name of the organization to use.
+        :param base_url: The base URL of the Resilient server, e.g. 'https://app.resilientsystems.com/'
+        :param proxies: A dictionary of HTTP proxies to use, if any.
+        :param verify: The path to a PEM file containing the trusted CAs, or False to disable all TLS verification
+        :param cache_ttl: Time to live for cached API responses
+        :param pool_maxsize: Maximum number of simultaneous connections to the server
+        :param cache_ttl_rules: Time to live for cached responses whose URI matches a pattern, instead of cache_ttl
+        :param cache_max_bytes: Maximum total size of the cached responses
+        :param retry_policy: The :class:`resilient.retry.RetryPolicy` for requests that fail with transient
+          errors, and for updates that get conflicts
+        :param rate_limiter: A :class:`resilient.ratelimit.RateLimiter` to limit the rate of requests to the server
+        :param circuit_breaker: A :class:`resilient.breaker.CircuitBreaker` that makes requests fail fast while
+          the server is failing
+        :param json_backend: The JSON library for request and response bodies: "json"
+          (the standard library, the default), "orjson", "ujson", or "auto" for the fastest that is installed.
+        """
+        self.headers = {'content-type': 'application/json'}
+        self.cookies = None
+        self.org_id = None
+        self.user_id = None
+        self.all_orgs = None
+        self.base_url = u'https://app.resilientsystems.com/'
+        self.org_name = ensure_unicode(org_name)
+        self.proxies = dict(proxies) if proxies else None
+        if base_url:
+            self.base_url = ensure_unicode(base_url)
+        self.verify = True if verify is None else ensure_unicode(verify)
+        self.authdata = None
+        self.pool_maxsize = pool_maxsize
+        self.cache = ResponseCache(ttl=cache_ttl, ttl_rules=cache_ttl_rules, max_bytes=cache_max_bytes)
+        self.retry_policy = retry_policy or RetryPolicy(retry_exceptions=(aiohttp.ClientConnectionError,
+                                                                          asyncio.TimeoutError))
+        self.rate_limiter = rate_limiter
+        self.circuit_breaker = circuit_breaker
+        self.json_codec = get_codec(json_backend)
+        self.session = None
+        self._pending_gets = {}
+        self._connect_lock = None
+        self._session_generation = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def _ssl_context(self):
+        """The `ssl` parameter for aiohttp, from our `verify` setting"""
+        if self.verify is False:
+            return False
+        if self.verify is True:
+            return None
+        return ssl.create_default_context(cafile=self.verify)
+
+    def _get_session(self):
+        """The aiohttp session, created on first use so that it binds to the running loop"""
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.pool_maxsize, ssl=self._ssl_context())
+            # Session cookies are managed explicitly (see _connect), not by a cookie jar
+            self.session = aiohttp.ClientSession(connector=connector,
+                                                 cookie_jar=aiohttp.DummyCookieJar())
+        return self.session
+
+    async def close(self):
+        """Close all pooled connections."""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def make_headers(self, co3_context_token=None, additional_headers=None):
+        """Makes a headers dict, including the X-Co3ContextToken (if co3_context_token is specified)."""
+        headers = self.headers.copy()
+        if co3_context_token is not None:
+            headers['X-Co3ContextToken'] = co3_context_token
+        if isinstance(additional_headers, dict):
+            headers.update(additional_headers)
+        return headers
+
+    def _org_url(self, uri):
+        return u"{0}/rest/orgs/{1}{2}".format(self.base_url, self.org_id, ensure_unicode(uri))
+
+    async def _request(self, method, url, data=None, co3_context_token=None, additional_headers=None,
+                       timeout=None):
+        """Send one request, and read the whole response.
+
+        Headers and cookies are built here (not by the caller) so that a request that is
+        re-sent after re-authentication uses the new session.
+        `data` can be a function, called for each attempt, for payloads that can't be re-sent.
+        """
+        if self.rate_limiter:
+            wait = self.rate_limiter.reserve(method, url)
+            if wait > 0:
+                await asyncio.sleep(wait)
+        if callable(data):
+            data = data()
+        headers = self.make_headers(co3_context_token, additional_headers)
+        if isinstance(data, aiohttp.FormData):
+            # aiohttp sets the multipart content-type, with its boundary
+            headers.pop('content-type', None)
+        proxy = self.proxies.get('https') if self.proxies else None
+        breaker = self.circuit_breaker
+        probe = breaker.before_request() if breaker else False
+        try:
+            async with self._get_session().request(method, url,
+                                                   data=data,
+                                                   headers=headers,
+                                                   cookies=self.cookies,
+                                                   proxy=proxy,
+                                                   timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                content = await response.read()
+                result = AsyncResponse(response, content, self.json_codec)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+            if breaker:
+                breaker.record(not breaker.is_failure(exception=exc), probe)
+            raise
+        except BaseException:
+            if breaker:
+                breaker.record(None, probe)
+            raise
+        if breaker:
+            breaker.record(not breaker.is_failure(response=result), probe)
+        return result
+
+    async def _execute_request(self, method, url, **kwargs):
+        """Execute a HTTP request.
+           If unauthorized (likely due to a session timeout), re-authenticate and retry.
+           If the request is idempotent, and fails with a transient error, retry it
+           according to the retry policy.
+        """
+        retry = self.retry_policy.begin()
+        while True:
+            try:
+                generation = self._session_generation
+                response = await self._request(method, url, **kwargs)
+                if response.status_code == 401:  # unauthorized, re-auth and try again
+                    await self._reconnect(generation)
+                    response = await self._request(method, url, **kwargs)
+            except Exception as exc:
+                delay = retry.next_delay() if self.retry_policy.is_retryable(method, exception=exc) else None
+                if delay is None:
+                    raise
+                LOG.info(u"Retrying %s %s after error: %s", method, url, exc)
+            else:
+                delay = retry.next_delay() if self.retry_policy.is_retryable(method, response=response) else None
+                if delay is None:
+                    return response
+                LOG.info(u"Retrying %s %s after status %s", method, url, response.status_code)
+            await asyncio.sleep(delay)
+
+    async def _reconnect(self, generation):
+        """Re-authenticate, unless another request already did so since `generation`.
+           Many requests in flight can see a 401 for the same expired session; only one reconnects.
+        """
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if generation == self._session_generation:
+                await self._connect()
+
+    async def connect(self, email, password, timeout=None):
+        """
+        Connect and authenticate to the Resilient REST API service.
+
+        :param email: The email address to use for authentication.
+        :param password: The password.
+        :param timeout: optional timeout (seconds)
+        :return: The Resilient session object.
+        :raises SimpleHTTPException: if an HTTP exception occurs.
+        """
+        self.authdata = {
+            u'email': ensure_unicode(email),
+            u'password': ensure_unicode(password)
+        }
+        return await self._connect(timeout=timeout)
+
+    async def _connect(self, timeout=None):
+        """Establish a session"""
+        response = await self._request("POST", u"{0}/rest/session".format(self.base_url),
+                                       data=self.json_codec.dumps(self.authdata),
+                                       timeout=timeout)
+        _raise_if_error(response)
+        session = response.json()
+        selected_org = select_org(session, self.org_name)
+
+        self.all_orgs = [org for org in session['orgs'] if org.get("enabled")]
+        self.org_id = selected_org['id']
+
+        # set the X-sess-id token, which is used to prevent CSRF attacks.
+        headers = self.headers.copy()
+        headers['X-sess-id'] = session['csrf_token']
+        self.headers = headers
+        self.cookies = {
+            'JSESSIONID': response.cookies['JSESSIONID']
+        }
+        self.user_id = session["user_id"]
+        self._session_generation += 1
+        return session
+
+    async def get(self, uri, co3_context_token=None, timeout=None):
+        """Gets the specified URI.
+
+        Note that this URI is relative to :samp:`<base_url>/rest/orgs/<org_id>`.
+
+        :param uri: Relative URI of the resource to fetch.
+        :param co3_context_token: The Co3ContextToken from an Action Module message, if available.
+        :param timeout: optional timeout (seconds)
+        :return: A dictionary or array with the value returned by the server.
+        :raises SimpleHTTPException: if an HTTP exception occurs.
+        """
+        response = await self._execute_request("GET", self._org_url(uri),
+                                               co3_context_token=co3_context_token,
+                                               timeout=timeout)
+        _raise_if_error(response)
+        return response.json()
+
+    async def _load_for_cache(self, uri, co3_context_token=None, timeout=None):
+        """Get the value and size of a resource, for the cache"""
+        response = await self._execute_request("GET", self._org_url(uri),
+                                               co3_context_token=co3_context_token,
+                                               timeout=timeout)
+        _raise_if_error(response)
+        return response.json(), len(response.content)
+
+    async def cached_get(self, uri, co3_context_token=None, timeout=None):
+        """Same as :meth:`get()`, but checks cache first.
+           Concurrent calls for the same uri share a single request.
+        """
+        try:
+            return self.cache.lookup(uri)
+        except KeyError:
+            pass
+        task = self._pending_gets.get(uri)
+        self.cache.record_load(coalesced=task is not None)
+        if task is None:
+            task = asyncio.ensure_future(self._load_for_cache(uri, co3_context_token, timeout))
+            self._pending_gets[uri] = task
+            task.add_done_callback(lambda done: self._cache_result(uri, done))
+        # shield, so that one caller being cancelled does not cancel the others
+        value, _ = await asyncio.shield(task)
+        return value
+
+    def _cache_result(self, uri, task):
+        if self._pending_gets.get(uri) is not task:
+            # invalidated while it was loading
+            return
+        del self._pending_gets[uri]
+        if not task.cancelled() and task.exception() is None:
+            value, size = task.result()
+            self.cache.set(uri, value, size)
+
+    def _invalidate_cache(self, uri):
+        """Remove cached responses for a resource that this client has changed (and for its children)"""
+        prefix = ensure_unicode(uri).split(u"?")[0]
+        self.cache.invalidate(prefix)
+        for key in [key for key in self._pending_gets if under_prefix(key, prefix)]:
+            del self._pending_gets[key]
+
+    def get_rate_limit_stats(self):
+        """Statistics for the rate limit (see :meth:`resilient.ratelimit.RateLimiter.stats`)"""
+        return self.rate_limiter.stats() if self.rate_limiter else {}
+
+    def get_circuit_breaker_stats(self):
+        """Statistics for the circuit breaker (see :meth:`resilient.breaker.CircuitBreaker.stats`)"""
+        return self.circuit_breaker.stats() if self.circuit_breaker else {}
+
+    def get_retry_stats(self):
+        """Statistics for retries (see :meth:`resilient.retry.RetryPolicy.stats`)"""
+        return self.retry_policy.stats()
+
+    def get_cache_stats(self):
+        """Statistics for the cache used by :meth:`cached_get()`."""
+        return self.cache.stats()
+
+    async def get_const(self, co3_context_token=None, timeout=None):
+        """
+        Get the ConstREST endpoint.
+
+        :param co3_context_token: The Co3ContextToken from an Action Module message, if available.
+        :param timeout: optional timeout (seconds)
+        :return: ConstDTO as a dictionary
+        :raises SimpleHTTPException: if an HTTP exception occurs.
+        """
+        response = await self._execute_request("GET", u"{0}/rest/const".format(self.base_url),
+                                               co3_context_token=co3_context_token,
+                                               timeout=timeout)
+        _raise_if_error(response)
+        return response.json()
+
+    async def get_content(self, uri, co3_context_token=None, timeout=None):
+        """Gets the specified URI.
+
+        :param uri: Relative URI of the resource to fetch.
+        :param co3_context_token: The Co3ContextToken from an Action Module message, if available.
+        :param timeout: optional timeout (seconds)
+        :return: The raw value returned by the server for this resource.
+        :raises SimpleHTTPException: if an HTTP exception occurs.
+        """
+        response = await self._execute_request("GET", self._org_url(uri),
+                                               co3_context_token=co3_context_token,
+                                               timeout=timeout)
+        _raise_if_error(response)
+        return response.content
+
+    async def post(self, uri, payload, co3_context_token=None, timeout=None):
+        """Posts to the specified URI.
+
+        :param uri: Relative URI of the resource to post.
+        :param payload: A dictionary value to be posted.
+        :param co3_context_token: The Co3ContextToken from an Action Module message, if available.
+        :param timeout: optional timeout (seconds)
+        :return: A dictionary or array with the value returned by the server.
+        :raises SimpleHTTPException: if an HTTP exception occurs.
+        """
+        response = await self._execute_request("POST", self._org_url(uri),
+                                               data=self.json_codec.dumps(payload),
+                                               co3_context_token=co3_context_token,
+                                               timeout=timeout)
+        _raise_if_error(response)
+        return response.json()
+
+    async def _patch(self, uri, patch, co3_context_token=None, timeout=None):
+        """Internal method used to call the underlying server patch endpoint"""
+        if isinstance(patch, dict):
+            payload_json = self.json_codec.dumps(patch)
+        else:
+            payload_json = self.json_codec.dumps(patch.to_dict())
+
+        return await self._execute_request("PATCH", self._org_url(uri),
+                                           data=payload_json,
+                                           co3_context_token=co3_context_token,
+                                           additional_headers={"handle_format": "names"},
+                                           timeout=timeout)
+
+    # The conflict handling is the same as for the synchronous client
+    _handle_patch_response = SimpleClient._handle_patch_response
+
+    async def patch(self, uri, patch, co3_context_token=None, timeout=None, overwrite_conflict=False):
+        """
+        PATCH request to the specified URI.
+
+        :param uri: Relative URI of the resource to patch.
+        :param patch: The :class:`Patch` object to apply
+        :param co3_context_token: the Co3ContextToken from an Action Module message, if available.
+        :param timeout: optional timeout (seconds)
+        :param overwrite_conflict: always overwrite fields in conflict.  Note that if True, the passed-in patch
+                object will be modified if necessary.
+        :return: The response object.
+        :raises SimpleHTTPException: if an HTTP exception or patch conflict occurs.
+        """
+        if overwrite_conflict:
+            callback = SimpleClient._patch_overwrite_callback
+        else:
+            callback = SimpleClient._patch_raise_callback
+
+        return await self.patch_with_callback(uri, patch, callback, co3_context_token, timeout)
+
+    async def patch_with_callback(self, uri, patch, callback, co3_context_token=None, timeout=None):
+        """
+        PATCH request to the specified URI.  If the patch application fails because of field conflicts,
+        the specified callback is invoked, allowing the caller to adjust the patch as necessary.
+
+        :param uri: Relative URI of the resource to patch.
+        :param patch: The :class:`Patch` object to apply
+        :param callback: Function/lambda to invoke when a patch conflict is detected.  The function/lambda must be
+          of the following form: `def my_callback(response, patch_status, patch)`.
+          If your callback raises :class:`NoChange`, the update is skipped.
+        :param co3_context_token: the Co3ContextToken from an Action Module message, if available.
+        :param timeout: optional timeout (seconds)
+        :return: The response object.
+        """
+        try:
+            response = await self._patch(uri, patch, co3_context_token, timeout)
+
+            retry = self.retry_policy.begin()
+            while self._handle_patch_response(response, patch, callback):
+                # Wait before retrying a server CONFLICT; a patch that the callback adjusted is re-issued now
+                if response.status_code == 409:
+                    delay = retry.next_delay(conflict=True)
+                    if delay is None:
+                        _raise_if_error(response)
+                    await asyncio.sleep(delay)
+                response = await self._patch(uri, patch, co3_context_token, timeout)
+        finally:
+            self._invalidate_cache(uri)
+
+        return response
+
+    async def post_attachment(self, uri, filepath,
+                              filename=None, mimetype=None, data=None, co3_context_token=None, timeout=None):
+        """
+        Upload a file to the specified URI
+        e.g. "/incidents/<id>/attachments" (for incident attachments)
+        or,  "/tasks/<id>/attachments" (for task attachments)
+
+        :param uri: Relative URI of the resource to post.
+        :param filepath: the path of the file to post
+        :param filename: optional name of the file when posted
+        :param mimetype: optional override for the guessed MIME type
+        :param data: optional dict with additional MIME parts (not required for file attachments; used in artifacts)
+        :param co3_context_token: the Co3ContextToken from an Action Module message, if available.
+        :param timeout: optional timeout (seconds)
+        """
+        filepath = ensure_unicode(filepath)
+        if filename:
+            filename = ensure_unicode(filename)
+        mime_type = mimetype or mimetypes.guess_type(filename or filepath)[0] or "application/octet-stream"
+        attachment_name = filename or os.path.basename(filepath)
+        with open(filepath, 'rb') as filehandle:
+            def make_form():
+                # A form can only be sent once, so make a new one for each attempt
+                filehandle.seek(0)
+                form = aiohttp.FormData()
+                form.add_field('file', filehandle, filename=attachment_name, content_type=mime_type)
+                for name, value in (data or {}).items():
+                    form.add_field(name, value)
+                return form
+
+            response = await self._execute_request("POST", self._org_url(uri),
+                                                   data=make_form,
+                                                   co3_context_token=co3_context_token,
+                                                   timeout=timeout)
+        _raise_if_error(response)
+        return response.json()
+
+    async def post_artifact_file(self, uri, artifact_type, artifact_filepath,
+                                 description=None, value=None, mimetype=None, co3_context_token=None, timeout=None):
+        """
+        Post a file artifact to the specified URI
+        e.g. "/incidents/<id>/artifacts/files"
+
+        :param uri: The REST URI for posting
+        :param artifact_type: the artifact type name ("IP Address", etc) or type ID
+        :param artifact_filepath: the path of the file to post
+        :param description: optional description for the artifact
+        :param value: optional value for the artifact
+        :param mimetype: optional override for the guessed MIME type
+        :param co3_context_token: Action Module context token, if responding to an Action Module event
+        :param timeout: optional timeout (seconds)
+        """
+        artifact = {
+            "type": artifact_type,
+            "value": value or "",
+            "description": description or ""
+        }
+        mimedata = {
+            "artifact": json.dumps(artifact)
+        }
+        return await self.post_attachment(uri,
+                                          artifact_filepath,
+                                          mimetype=mimetype,
+                                          data=mimedata,
+                                          co3_context_token=co3_context_token,
+                                          timeout=timeout)
+
+    async def search(self, payload, co3_context_token=None, timeout=None):
+        """
+        Posts to the SearchExREST endpoint.
+
+        :param payload: The SearchExInputDTO parameters for performing a search, as a dictionary
+        :param co3_context_token: the Co3ContextToken from an Action Module message, if available.
+        :param timeout: optional timeout (seconds)
+        :return: List of results, as an array of SearchExResultDTO
+        :raises SimpleHTTPException: if an HTTP exception occurs.
+        """
+        response = await self._execute_request("POST", u"{0}/rest/search_ex".format(self.base_url),
+                                               data=self.json_codec.dumps(payload),
+                                               co3_context_token=co3_context_token,
+                                               timeout=timeout)
+        _raise_if_error(response)
+        return response.json()
+
+    async def get_put(self, uri, apply_func, co3_context_token=None, timeout=None):
+        """Safely performs an update operation by a GET, calls your `apply_func` callback, then PUT
+        with the updated value.  If the put call returns a 409 error, these steps are retried.
+
+        :param uri: Relative URI of the resource to get and update.
+        :param apply_func: A callback function that you implement to update the resource.  The function must be
+          of the following form: `def my_apply_func(object_to_update)`, and update the object.
+          If your callback raises :class:`NoChange`, the update is skipped.
+        :param co3_context_token: The Co3ContextToken from an Action Module message, if available.
+        :param timeout: optional timeout (seconds)
+        :return: A dictionary or array with the value returned by the PUT operation.
+        :raises SimpleHTTPException: if an HTTP exception occurs.
+        """
+        try:
+            return await self._get_put(uri, apply_func, co3_context_token, timeout)
+        finally:
+            self._invalidate_cache(uri)
+
+    async def _get_put(self, uri, apply_func, co3_context_token=None, timeout=None):
+        """Internal helper to do the get/apply/put loop"""
+        url = self._org_url(uri)
+        retry = self.retry_policy.begin()
+        while True:
+            response = await self._execute_request("GET", url,
+                                                   co3_context_token=co3_context_token,
+                                                   timeout=timeout)
+            _raise_if_error(response)
+            payload = response.json()
+            try:
+                apply_func(payload)
+            except NoChange:
+                return payload
+            response = await self._execute_request("PUT", url,
+                                                   data=self.json_codec.dumps(payload),
+                                                   co3_context_token=co3_context_token,
+                                                   timeout=timeout)
+            delay = retry.next_delay(conflict=True) if response.status_code == 409 else None
+            if delay is None:
+                _raise_if_error(response)
+                return response.json()
+            LOG.info("Retrying get_put due to server CONFLICT")
+            await asyncio.sleep(delay)
+
+    async def put(self, uri, payload, co3_context_token=None, timeout=None):
+        """Directly performs an update operation by PUT to the specified URI.
+
+        :param uri: Relative URI of the resource to update.
+        :param payload: The object to update.
+        :param co3_context_token: The Co3ContextToken from an Action Module message, if available.
+        :param timeout: optional timeout (seconds)
+        :return: A dictionary or array with the value returned by the server.
+        :raises SimpleHTTPException: if an HTTP exception occurs.
+        """
+        response = await self._execute_request("PUT", self._org_url(uri),
+                                               data=self.json_codec.dumps(payload),
+                                               co3_context_token=co3_context_token,
+                                               timeout=timeout)
+        self._invalidate_cache(uri)
+        _raise_if_error(response)
+        return response.json()
+
+    async def delete(self, uri, co3_context_token=None, timeout=None):
+        """Deletes the specified URI.
+
+        :param uri: Relative URI of the resource to delete.
+        :param co3_context_token: The Co3ContextToken from an Action Module message, if available.
+        :param timeout: optional timeout (seconds)
+        :raises SimpleHTTPException: if an HTTP exception occurs.
+        """
+        response = await self._execute_request("DELETE", self._org_url(uri),
+                                               co3_context_token=co3_context_token,
+                                               timeout=timeout)
+        self._invalidate_cache(uri)
+        if response.status_code == 204:
+            # 204 - No content is OK for a delete
+            return None
+        _raise_if_error(response)
+        return response.json()
@@ -4,18 +4,25 @@
 """Base client for Resilient REST API"""
 from __future__ import print_function
 
+import hashlib
 import json
 import ssl
 import mimetypes
 import os
 import sys
 import logging
+import socket
+import tempfile
+import threading
 import unicodedata
 import requests
 
-from requests.adapters import HTTPAdapter
+from requests.adapters import HTTPAdapter, DEFAULT_POOLSIZE, DEFAULT_POOLBLOCK
 from requests.packages.urllib3.poolmanager import PoolManager
-from requests_toolbelt.multipart.encoder import MultipartEncoder
+from requests.packages.urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from requests_toolbelt.multipart.encoder import MultipartEncoder, MultipartEncoderMonitor
+from .retry import RetryPolicy
+from .jsoncodec import get_codec
 
 try:
     # Python 3
@@ -27,18 +34,128 @@ except:
 LOG = logging.getLogger(__name__)
 
 
+# Idle time and probe interval (seconds) for TCP keep-alive, where the platform allows them to be set
+TCP_KEEPALIVE_IDLE = 60
+TCP_KEEPALIVE_INTERVAL = 10
+
+
+def get_socket_options(tcp_keepalive=False, tcp_nodelay=True):
+    """Socket options for the connections to the Resilient server.
+
+    Args:
+      tcp_keepalive - enable TCP keep-alive probes on idle connections.
+      tcp_nodelay - disable Nagle's algorithm (the urllib3 default).
+    Returns:
+      A list of (level, option, value) tuples for `socket.setsockopt`.
+    """
+    options = []
+    if tcp_nodelay:
+        options.append((socket.IPPROTO_TCP, socket.TCP_NODELAY, 1))
+    if tcp_keepalive:
+        options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+        if hasattr(socket, "TCP_KEEPIDLE"):
+            options.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, TCP_KEEPALIVE_IDLE))
+        if hasattr(socket, "TCP_KEEPINTVL"):
+            options.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, TCP_KEEPALIVE_INTERVAL))
+    return options
+
+
+class PoolStats(object):
+    """Thread-safe counts of connection pool activity:
+       connections created, reused from the pool, and discarded because the pool was full.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {"created": 0, "reused": 0, "discarded": 0}
+
+    def increment(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def as_dict(self):
+        with self._lock:
+            return dict(self._counts)
+
+
+class _StatsPoolMixin(object):
+    """Connection pool that records its activity in `pool_stats`"""
+    pool_stats = None
+
+    def _new_conn(self):
+        conn = super(_StatsPoolMixin, self)._new_conn()
+        conn._resilient_new = True
+        self.pool_stats.increment("created")
+        return conn
+
+    def _get_conn(self, timeout=None):
+        conn = super(_StatsPoolMixin, self)._get_conn(timeout)
+        if getattr(conn, "_resilient_new", False):
+            conn._resilient_new = False
+        else:
+            self.pool_stats.increment("reused")
+        return conn
+
+    def _put_conn(self, conn):
+        if conn is not None and self.pool is not None and self.pool.full():
+            self.pool_stats.increment("discarded")
+        super(_StatsPoolMixin, self)._put_conn(conn)
+
+
 class TLSHttpAdapter(HTTPAdapter):
     """
     Adapter that ensures that we use the best available SSL/TLS version.
     Some environments default to SSLv3, so we need to specifically ask for
     the highest protocol version that both the client and server support.
     Despite the name, SSLv23 can select "TLS" protocols as well as "SSL".
+
+    The adapter also applies the socket options, and counts connection pool activity in `pool_stats`.
     """
-    def init_poolmanager(self, connections, maxsize, block=False):
+    def __init__(self, pool_connections=DEFAULT_POOLSIZE, pool_maxsize=DEFAULT_POOLSIZE,
+                 pool_block=DEFAULT_POOLBLOCK, tcp_keepalive=False, tcp_nodelay=True, **kwargs):
+        """
+        Args:
+          pool_connections - the number of connection pools (one per host) to cache.
+          pool_maxsize - the maximum number of connections to keep in each pool.
+          pool_block - when all the connections in a pool are in use, wait for one (rather
+            than making a new connection that is discarded after use).
+          tcp_keepalive - enable TCP keep-alive on the connections.
+          tcp_nodelay - disable Nagle's algorithm on the connections.
+        """
+        # (these are needed by init_poolmanager, which is called by HTTPAdapter.__init__)
+        self.socket_options = get_socket_options(tcp_keepalive, tcp_nodelay)
+        self.pool_stats = PoolStats()
+        self._pool_classes = {
+            "http": type("StatsHTTPConnectionPool", (_StatsPoolMixin, HTTPConnectionPool),
+                         {"pool_stats": self.pool_stats}),
+            "https": type("StatsHTTPSConnectionPool", (_StatsPoolMixin, HTTPSConnectionPool),
+                          {"pool_stats": self.pool_stats})
+        }
+        super(TLSHttpAdapter, self).__init__(pool_connections=pool_connections,
+                                             pool_maxsize=pool_maxsize,
+                                             pool_block=pool_block,
+                                             **kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
         self.poolmanager = PoolManager(num_pools=connections,
                                        maxsize=maxsize,
                                        block=block,
-                                       ssl_version=ssl.PROTOCOL_SSLv23)
+                                       ssl_version=ssl.PROTOCOL_SSLv23,
+                                       socket_options=self.socket_options,
+                                       **pool_kwargs)
+        self._count_connections(self.poolmanager)
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        if proxy not in self.proxy_manager:
+            proxy_kwargs.setdefault("socket_options", self.socket_options)
+            manager = super(TLSHttpAdapter, self).proxy_manager_for(proxy, **proxy_kwargs)
+            self._count_connections(manager)
+        return self.proxy_manager[proxy]
+
+    def _count_connections(self, manager):
+        """Use the counting pool classes, unless the manager has its own (e.g. SOCKS proxies)"""
+        pool_classes = getattr(manager, "pool_classes_by_scheme", None)
+        if pool_classes == {"http": HTTPConnectionPool, "https": HTTPSConnectionPool}:
+            manager.pool_classes_by_scheme = self._pool_classes
 
 
 class BasicHTTPException(Exception):
@@ -68,6 +185,38 @@ class NoChange(Exception):
     pass
 
 
+def _write_chunks(chunks, dest):
+    """Write an iterable of bytes to a path, file object, or (if dest is None) a new temporary file.
+       Returns a dict with the "path", "size" and "sha256" of what was written.
+       If a path or temporary file is only partly written, it is removed.
+    """
+    if dest is None:
+        fileobj = tempfile.NamedTemporaryFile(prefix="resilient-", delete=False)
+        path, owned = fileobj.name, True
+    elif hasattr(dest, "write"):
+        fileobj = dest
+        path, owned = getattr(dest, "name", None), False
+    else:
+        fileobj = open(dest, "wb")
+        path, owned = dest, True
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        for chunk in chunks:
+            if chunk:
+                fileobj.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+    except Exception:
+        if owned:
+            fileobj.close()
+            os.remove(path)
+        raise
+    if owned:
+        fileobj.close()
+    return {"path": path, "size": size, "sha256": digest.hexdigest()}
+
+
 def ensure_unicode(input_value):
     """ if input_value is type str, convert to unicode with utf-8 encoding """
     if sys.version_info.major >= 3:
@@ -102,16 +251,72 @@ def get_proxy_dict(opts):
     return proxy
 
 
+def select_org(session, org_name):
+    """Select the organization named `org_name` from a Resilient session object.
+
+    Args:
+      session - the session object (dict) returned by a POST to /rest/session.
+      org_name - the name of the organization to use.
+    Returns:
+      The organization (dict) from the session's list of orgs.
+    Raises:
+      Exception - if the org is not found, or is not accessible.
+    """
+    orgs = session['orgs']
+    selected_org = None
+    if orgs is None or len(orgs) == 0:
+        raise Exception("User is a member of no orgs")
+    elif org_name:
+        org_names = []
+        for org in orgs:
+            name = org['name']
+            org_names.append(name)
+            if ensure_unicode(name) == org_name:
+                selected_org = org
+    else:
+        org_names = [org['name'] for org in orgs]
+        msg = u"Please specify the organization name to which you want to connect.  " + \
+              u"The user is a member of the following organizations: '{0}'"
+        raise Exception(msg.format(u"', '".join(org_names)))
+
+    if selected_org is None:
+        msg = u"The user is not a member of the specified organization '{0}'."
+        raise Exception(msg.format(org_name))
+
+    if not selected_org.get("enabled", False):
+        msg = "This organization is not accessible to you.\n\n" \
+              "This can occur because of one of the following:\n\n" \
+              "The organization does not allow access from your current IP address.\n" \
+              "The organization requires authentication with a different provider than you are currently using.\n" \
+              "Your IP address is {0}"
+        raise Exception(msg.format(session["session_ip"]))
+
+    return selected_org
+
+
 class BaseClient(object):
     """Helper for using Resilient REST API."""
 
-    def __init__(self, org_name=None, base_url=None, proxies=None, verify=None):
+    def __init__(self, org_name=None, base_url=None, proxies=None, verify=None,
+                 pool_connections=DEFAULT_POOLSIZE, pool_maxsize=DEFAULT_POOLSIZE, pool_block=DEFAULT_POOLBLOCK,
+                 tcp_keepalive=False, tcp_nodelay=True, retry_policy=None, rate_limiter=None,
+                 circuit_breaker=None, json_backend=None):
         """
         Args:
           org_name - the name of the organization to use.
           base_url - the base URL to use.
           proxies - HTTP proxies to use, if any.
           verify - The name of a PEM file to use as the list of trusted CAs.
+          pool_connections - the number of connection pools to cache.
+          pool_maxsize - the maximum number of connections to keep open to the server.
+          pool_block - wait for a free connection, rather than open one more than pool_maxsize.
+          tcp_keepalive - enable TCP keep-alive on connections to the server.
+          tcp_nodelay - disable Nagle's algorithm on connections to the server.
+          retry_policy - the RetryPolicy for failed requests and update conflicts (default: RetryPolicy()).
+          rate_limiter - a RateLimiter for requests to the server, or None for no limit.
+          circuit_breaker - a CircuitBreaker to stop requests while the server is failing, or None.
+          json_backend - the JSON library for request and response bodies: "json" (the default),
+          "orjson", "ujson", or "auto" for the fastest that is installed.
         """
         self.headers = {'content-type': 'application/json'}
         self.cookies = None
@@ -130,8 +335,19 @@ class BaseClient(object):
         if verify is None:
             self.verify = True
         self.authdata = None
+        # Held while re-authenticating, so that only one thread does it (see _execute_request)
+        self._connect_lock = threading.Lock()
         self.session = requests.Session()
-        self.session.mount(u'https://', TLSHttpAdapter())
+        self.adapter = TLSHttpAdapter(pool_connections=pool_connections,
+                                      pool_maxsize=pool_maxsize,
+                                      pool_block=pool_block,
+                                      tcp_keepalive=tcp_keepalive,
+                                      tcp_nodelay=tcp_nodelay)
+        self.session.mount(u'https://', self.adapter)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.rate_limiter = rate_limiter
+        self.circuit_breaker = circuit_breaker
+        self.json_codec = get_codec(json_backend)
 
     def connect(self, email, password, timeout=None):
         """Performs connection, which includes authentication.
@@ -154,53 +370,57 @@ class BaseClient(object):
     def _connect(self, timeout=None):
         """Establish a session"""
         response = self.session.post(u"{0}/rest/session".format(self.base_url),
-                                     data=json.dumps(self.authdata),
+                                     data=self.json_codec.dumps(self.authdata),
                                      proxies=self.proxies,
                                      headers=self.make_headers(),
                                      verify=self.verify,
                                      timeout=timeout)
         BasicHTTPException.raise_if_error(response)
-        session = json.loads(response.text)
+        session = self.json_codec.loads(response.content)
         orgs = session['orgs']
-        selected_org = None
-        if orgs is None or len(orgs) == 0:
-            raise Exception("User is a member of no orgs")
-        elif self.org_name:
-            org_names = []
-            for org in orgs:
-                org_name = org['name']
-                org_names.append(org_name)
-                if ensure_unicode(org_name) == self.org_name:
-                    selected_org = org
-        else:
-            org_names = [org['name'] for org in orgs]
-            msg = u"Please specify the organization name to which you want to connect.  " + \
-                  u"The user is a member of the following organizations: '{0}'"
-            raise Exception(msg.format(u"', '".join(org_names)))
-
-        if selected_org is None:
-            msg = u"The user is not a member of the specified organization '{0}'."
-            raise Exception(msg.format(self.org_name))
-
-        if not selected_org.get("enabled", False):
-            msg = "This organization is not accessible to you.\n\n" \
-                  "This can occur because of one of the following:\n\n" \
-                  "The organization does not allow access from your current IP address.\n" \
-                  "The organization requires authentication with a different provider than you are currently using.\n" \
-                  "Your IP address is {0}"
-            raise Exception(msg.format(session["session_ip"]))
+        selected_org = select_org(session, self.org_name)
 
         self.all_orgs = [org for org in orgs if org.get("enabled")]
         self.org_id = selected_org['id']
 
         # set the X-sess-id token, which is used to prevent CSRF attacks.
-        self.headers['X-sess-id'] = session['csrf_token']
+        # (other threads may be reading these; replace, rather than update, the dicts)
+        headers = self.headers.copy()
+        headers['X-sess-id'] = session['csrf_token']
+        self.headers = headers
         self.cookies = {
             'JSESSIONID': response.cookies['JSESSIONID']
         }
         self.user_id = session["user_id"]
         return session
 
+    def get_rate_limit_stats(self):
+        """Rate limit statistics.
+
+        Returns:
+          A dict of {request class: counts} with the number of "requests", the number that
+          "waited" for their turn, and the total "wait_time" in seconds (empty if there is no rate limit).
+        """
+        return self.rate_limiter.stats() if self.rate_limiter else {}
+
+    def get_retry_stats(self):
+        """Retry statistics.
+
+        Returns:
+          A dict with the number of "retries" after failed requests, "conflict_retries" after
+          update conflicts, and requests that failed after they "gave_up" retrying.
+        """
+        return self.retry_policy.stats()
+
+    def get_pool_stats(self):
+        """Connection pool statistics.
+
+        Returns:
+          A dict with the number of connections "created", "reused" from the pool,
+          and "discarded" because the pool was full (if this is high, increase pool_maxsize).
+        """
+        return self.adapter.pool_stats.as_dict()
+
     def make_headers(self, co3_context_token=None, additional_headers=None):
         """Makes a headers dict, including the X-Co3ContextToken (if co3_context_token is specified)."""
         headers = self.headers.copy()
@@ -212,14 +432,75 @@ class BaseClient(object):
 
     def _execute_request(self, operation, url, **kwargs):
         """Execute a HTTP request.
-           If unauthorized (likely due to a session timeout), retry.
+           If unauthorized (likely due to a session timeout), re-authenticate and retry
+           with the new session.
+           If the request is idempotent, and fails with a transient error, retry it
+           according to the retry policy.
+           If there is a rate limit, wait for a turn before each request.
+           If there is a circuit breaker and it is open, raise CircuitBreakerOpen.
         """
-        result = operation(url, **kwargs)
-        if result.status_code == 401:  # unauthorized, re-auth and try again
-            self._connect()
+        method = getattr(operation, "__name__", "").upper()
+        retry = self.retry_policy.begin()
+        while True:
+            try:
+                result = self._send(operation, method, url, kwargs)
+                if result.status_code == 401:  # unauthorized, re-auth and try again
+                    result.close()
+                    self._reconnect(kwargs.get("cookies"))
+                    kwargs["cookies"] = self.cookies
+                    if kwargs.get("headers") and "X-sess-id" in self.headers:
+                        kwargs["headers"] = dict(kwargs["headers"], **{"X-sess-id": self.headers["X-sess-id"]})
+                    result = self._send(operation, method, url, kwargs)
+            except Exception as exc:
+                if not (self.retry_policy.is_retryable(method, exception=exc) and retry.retry()):
+                    raise
+                LOG.info(u"Retrying %s %s after error: %s", method, url, exc)
+                continue
+            delay = retry.next_delay() if self.retry_policy.is_retryable(method, response=result) else None
+            if delay is None:
+                return result
+            # Release the connection (for a streamed response, it is held until the body is read)
+            result.close()
+            LOG.info(u"Retrying %s %s after status %s", method, url, result.status_code)
+            retry.wait(delay)
+
+    def _send(self, operation, method, url, kwargs):
+        """Send one request, within the rate limit and the circuit breaker"""
+        if self.rate_limiter:
+            self.rate_limiter.acquire(method, url)
+        breaker = self.circuit_breaker
+        if breaker is None:
+            return operation(url, **kwargs)
+        probe = breaker.before_request()
+        try:
             result = operation(url, **kwargs)
+        except requests.exceptions.RequestException as exc:
+            breaker.record(not breaker.is_failure(exception=exc), probe)
+            raise
+        except Exception:
+            breaker.record(None, probe)
+            raise
+        breaker.record(not breaker.is_failure(response=result), probe)
         return result
 
+    def get_circuit_breaker_stats(self):
+        """Circuit breaker statistics.
+
+        Returns:
+          A dict with the "state", the number of times it "opened", and the number of requests
+          "rejected" while it was open (empty if there is no circuit breaker).
+        """
+        return self.circuit_breaker.stats() if self.circuit_breaker else {}
+
+    def _reconnect(self, expired_cookies):
+        """Re-authenticate after a request with the session `expired_cookies` was unauthorized.
+           When the session expires, many threads can get a 401 at the same time: the first
+           re-authenticates, and the others wait for it and then use its new session.
+        """
+        with self._connect_lock:
+            if self.cookies is expired_cookies:
+                self._connect()
+
     def get(self, uri, co3_context_token=None, timeout=None):
         """Gets the specified URI.  Note that this URI is relative to <base_url>/rest/orgs/<org_id>.  So
         for example, if you specify a uri of /incidents, the actual URL would be something like this:
@@ -232,6 +513,16 @@ class BaseClient(object):
           timeout: number of seconds to wait for response
         Returns:
           A dictionary or array with the value returned by the server.
+        Raises:
+          BasicHTTPException - if an HTTP exception occurs.
+        """
+        response = self._get_response(uri, co3_context_token, timeout)
+        return self.json_codec.loads(response.content)
+
+    def _get_response(self, uri, co3_context_token=None, timeout=None, stream=False):
+        """Gets the specified URI, and returns the Response object.
+        If `stream` is True, the body is not read until it is used (and the caller must close the response).
+
         Raises:
           BasicHTTPException - if an HTTP exception occurs.
         """
@@ -242,9 +533,10 @@ class BaseClient(object):
                                          cookies=self.cookies,
                                          headers=self.make_headers(co3_context_token),
                                          verify=self.verify,
-                                         timeout=timeout)
+                                         timeout=timeout,
+                                         stream=stream)
         BasicHTTPException.raise_if_error(response)
-        return json.loads(response.text)
+        return response
 
     def get_content(self, uri, co3_context_token=None, timeout=None):
         """Gets the specified URI.  Note that this URI is relative to <base_url>/rest/orgs/<org_id>.  So
@@ -261,17 +553,32 @@ class BaseClient(object):
         Raises:
           BasicHTTPException - if an HTTP exception occurs.
         """
-        url = u"{0}/rest/orgs/{1}{2}".format(self.base_url, self.org_id, ensure_unicode(uri))
-        response = self._execute_request(self.session.get,
-                                         url,
-                                         proxies=self.proxies,
-                                         cookies=self.cookies,
-                                         headers=self.make_headers(co3_context_token),
-                                         verify=self.verify,
-                                         timeout=timeout)
-        BasicHTTPException.raise_if_error(response)
+        response = self._get_response(uri, co3_context_token, timeout)
         return response.content
 
+    def download(self, uri, dest=None, co3_context_token=None, timeout=None, chunk_size=65536):
+        """Gets the specified URI (such as the contents of an attachment), and writes it to `dest`.
+        The response is written one chunk at a time, so it is never all in memory.
+
+        Args:
+          uri
+          dest: a path, or a file object opened for writing in binary mode, or None to write
+            to a new temporary file (which the caller must remove)
+          co3_context_token
+          timeout: number of seconds to wait for response
+          chunk_size: number of bytes to read and write at a time
+        Returns:
+          A dict with the "path" that was written (None for a file object with no name), and the
+          "size" and "sha256" hex digest of the content.
+        Raises:
+          BasicHTTPException - if an HTTP exception occurs.
+        """
+        response = self._get_response(uri, co3_context_token, timeout, stream=True)
+        try:
+            return _write_chunks(response.iter_content(chunk_size), dest)
+        finally:
+            response.close()
+
     def post(self, uri, payload, co3_context_token=None, timeout=None):
         """
         Posts to the specified URI.
@@ -290,7 +597,7 @@ class BaseClient(object):
           BasicHTTPException - if an HTTP exception occurs.
         """
         url = u"{0}/rest/orgs/{1}{2}".format(self.base_url, self.org_id, ensure_unicode(uri))
-        payload_json = json.dumps(payload)
+        payload_json = self.json_codec.dumps(payload)
         response = self._execute_request(self.session.post,
                                          url,
                                          data=payload_json,
@@ -300,10 +607,11 @@ class BaseClient(object):
                                          verify=self.verify,
                                          timeout=timeout)
         BasicHTTPException.raise_if_error(response)
-        return json.loads(response.text)
+        return self.json_codec.loads(response.content)
 
     def post_attachment(self, uri, filepath,
-                        filename=None, mimetype=None, data=None, co3_context_token=None, timeout=None):
+                        filename=None, mimetype=None, data=None, co3_context_token=None, timeout=None,
+                        progress_callback=None):
         """
         Upload a file to the specified URI
         e.g. "/incidents/<id>/attachments" (for incident attachments)
@@ -316,6 +624,8 @@ class BaseClient(object):
         :param data: optional dict with additional MIME parts (not required for file attachments; used in artifacts)
         :param co3_context_token: Action Module context token, if responding to an Action Module event
         :param timeout: optional timeout (seconds)
+        :param progress_callback: optional function, called as `progress_callback(bytes_sent, total_bytes)`
+          as the file is sent
         """
         filepath = ensure_unicode(filepath)
         if filename:
@@ -327,6 +637,9 @@ class BaseClient(object):
             multipart_data = {'file': (attachment_name, filehandle, mime_type)}
             multipart_data.update(data or {})
             encoder = MultipartEncoder(fields=multipart_data)
+            if progress_callback:
+                encoder = MultipartEncoderMonitor(encoder,
+                                                  lambda monitor: progress_callback(monitor.bytes_read, monitor.len))
             headers = self.make_headers(co3_context_token,
                                         additional_headers={'content-type': encoder.content_type})
             response = self._execute_request(self.session.post,
@@ -338,10 +651,11 @@ class BaseClient(object):
                                              verify=self.verify,
                                              timeout=timeout)
             BasicHTTPException.raise_if_error(response)
-            return json.loads(response.text)
+            return self.json_codec.loads(response.content)
 
     def post_artifact_file(self, uri, artifact_type, artifact_filepath,
-                           description=None, value=None, mimetype=None, co3_context_token=None, timeout=None):
+                           description=None, value=None, mimetype=None, co3_context_token=None, timeout=None,
+                           progress_callback=None):
         """
         Post a file artifact to the specified URI
         e.g. "/incidents/<id>/artifacts/files"
@@ -354,6 +668,8 @@ class BaseClient(object):
         :param mimetype: optional override for the guessed MIME type
         :param co3_context_token: Action Module context token, if responding to an Action Module event
         :param timeout: optional timeout (seconds)
+        :param progress_callback: optional function, called as `progress_callback(bytes_sent, total_bytes)`
+          as the file is sent
 
         """
         artifact = {
@@ -369,11 +685,12 @@ class BaseClient(object):
                                     mimetype=mimetype,
                                     data=mimedata,
                                     co3_context_token=co3_context_token,
-                                    timeout=timeout)
+                                    timeout=timeout,
+                                    progress_callback=progress_callback)
 
     def _get_put(self, uri, apply_func, co3_context_token=None, timeout=None):
-        """Internal helper to do a get/apply/put loop
-        (for situations where the put might return a 409/conflict status code)
+        """Internal helper to do one get/apply/put
+        (the put might return a 409/conflict status code, which raises BasicHTTPException)
         """
         url = u"{0}/rest/orgs/{1}{2}".format(self.base_url, self.org_id, ensure_unicode(uri))
         response = self._execute_request(self.session.get,
@@ -384,12 +701,12 @@ class BaseClient(object):
                                          verify=self.verify,
                                          timeout=timeout)
         BasicHTTPException.raise_if_error(response)
-        payload = json.loads(response.text)
+        payload = self.json_codec.loads(response.content)
         try:
             apply_func(payload)
         except NoChange:
             return payload
-        payload_json = json.dumps(payload)
+        payload_json = self.json_codec.dumps(payload)
         response = self._execute_request(self.session.put,
                                          url,
                                          data=payload_json,
@@ -398,16 +715,12 @@ class BaseClient(object):
                                          headers=self.make_headers(co3_context_token),
                                          verify=self.verify,
                                          timeout=timeout)
-        if response.status_code == 200:
-            return json.loads(response.text)
-        elif response.status_code == 409:
-            return None
         BasicHTTPException.raise_if_error(response)
-        return None
+        return self.json_codec.loads(response.content)
 
     def get_put(self, uri, apply_func, co3_context_token=None, timeout=None):
         """Performs a get, calls apply_func on the returned value, then calls self.put.
-        If the put call returns a 409 error, then retry.
+        If the put call returns a 409 error, then retry (up to the retry policy's max_conflict_attempts).
 
         Args:
           uri - the URI to use.  Note that this is expected to be relative to the org.
@@ -421,11 +734,14 @@ class BaseClient(object):
         Raises:
           Exception if the get or put returns an unexpected status code.
         """
+        retry = self.retry_policy.begin()
         while True:
-            obj = self._get_put(uri, apply_func, co3_context_token=co3_context_token, timeout=timeout)
-            if obj:
-                return obj
-        return None
+            try:
+                return self._get_put(uri, apply_func, co3_context_token=co3_context_token, timeout=timeout)
+            except BasicHTTPException as ex:
+                if ex.get_response().status_code != 409 or not retry.retry(conflict=True):
+                    raise
+                LOG.info(u"Retrying get_put due to server CONFLICT")
 
     def put(self, uri, payload, co3_context_token=None, timeout=None):
         """
@@ -445,7 +761,7 @@ class BaseClient(object):
           BasicHTTPException - if an HTTP exception occurs.
         """
         url = u"{0}/rest/orgs/{1}{2}".format(self.base_url, self.org_id, ensure_unicode(uri))
-        payload_json = json.dumps(payload)
+        payload_json = self.json_codec.dumps(payload)
         response = self._execute_request(self.session.put,
                                          url,
                                          data=payload_json,
@@ -455,7 +771,7 @@ class BaseClient(object):
                                          verify=self.verify,
                                          timeout=timeout)
         BasicHTTPException.raise_if_error(response)
-        return json.loads(response.text)
+        return self.json_codec.loads(response.content)
 
     def delete(self, uri, co3_context_token=None, timeout=None):
         """Deletes the specified URI.
@@ -481,4 +797,4 @@ class BaseClient(object):
             # 204 - No content is OK for a delete
             return None
         BasicHTTPException.raise_if_error(response)
-        return json.loads(response.text)
+        return self.json_codec.loads(response.content)
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright IBM Corp. 2010, 2017. All Rights Reserved.
+
+"""JSON encoding and decoding of REST API request and response bodies.
+
+The standard library `json` module is the default.  If `orjson` or `ujson` is installed
+("pip install resilient[fastjson]"), it can be chosen instead: they are much faster for large
+responses, but differ from the standard library in some details (e.g. float formatting).
+All codecs encode straight to (UTF-8) bytes, and decode from bytes, so the client does not make
+a decoded copy of each response body.
+"""
+
+import json
+import logging
+import sys
+
+LOG = logging.getLogger(__name__)
+
+AUTO = "auto"
+DEFAULT = "json"
+
+
+class JSONCodec(object):
+    """Standard library JSON codec"""
+    name = "json"
+
+    def dumps(self, obj):
+        """Encode an object as JSON (UTF-8 bytes)"""
+        return json.dumps(obj).encode("utf-8")
+
+    def loads(self, data):
+        """Decode JSON from bytes (or text)"""
+        if isinstance(data, bytes) and sys.version_info[:2] in ((3, 4), (3, 5)):
+            # json.loads accepts bytes from Python 3.6 (and as str on Python 2)
+            data = data.decode("utf-8")
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    """JSON codec using `orjson`"""
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+        # Allow non-string (e.g. integer) dict keys, as the standard library does
+        self._options = orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj):
+        return self._orjson.dumps(obj, option=self._options)
+
+    def loads(self, data):
+        return self._orjson.loads(data)
+
+
+class UjsonCodec(JSONCodec):
+    """JSON codec using `ujson`"""
+    name = "ujson"
+
+    def __init__(self):
+        import ujson
+        self._ujson = ujson
+
+    def dumps(self, obj):
+        encoded = self._ujson.dumps(obj, ensure_ascii=False)
+        return encoded if isinstance(encoded, bytes) else encoded.encode("utf-8")
+
+    def loads(self, data):
+        return self._ujson.loads(data)
+
+
+# In order of preference
+CODECS = (OrjsonCodec, UjsonCodec, JSONCodec)
+
+
+def get_codec(backend=None):
+    """Get a JSON codec.
+
+    >>> get_codec("json").loads(b'{"id": 1}')
+    {'id': 1}
+
+    :param backend: "json" (the standard library, the default), "orjson", "ujson", or "auto" for
+      the fastest that is installed.  If the named backend is not installed, the standard library is used.
+    :return: A :class:`JSONCodec`
+    """
+    backend = (backend or DEFAULT).lower()
+    for codec_class in CODECS:
+        if backend in (AUTO, codec_class.name):
+            try:
+                return codec_class()
+            except ImportError:
+                if backend != AUTO:
+                    LOG.warn(u"JSON backend '%s' is not installed, using 'json'", backend)
+    if backend not in [AUTO] + [codec_class.name for codec_class in CODECS]:
+        raise ValueError(u"Unknown JSON backend '{0}'".format(backend))
+    return JSONCodec()
@@ -45,6 +45,53 @@ class Patch(object):
         # downside.
         self.changes = collections.OrderedDict()
 
+    @classmethod
+    def from_diff(cls, old_object, new_object, version=None, ignore_fields=None):
+        """
+        Creates a patch with the changes from `old_object` to `new_object`, such as an incident as it was
+        read from the server and a modified copy of it.  Only the fields whose value changed are in the patch,
+        with their value in `old_object` as the old value.
+
+        Nested dicts (such as the custom fields in `properties`) are compared field by field, and their changed
+        fields are patched as e.g. "properties.my_field".  A field whose value is a dict in `old_object` but not
+        in `new_object` can't be patched, and is skipped.  Fields that are missing from `new_object` are unchanged.
+
+        .. code-block:: python
+
+            incident = client.get("/incidents/2095")
+            updated = copy.deepcopy(incident)
+            updated["properties"]["severity_score"] = 9
+            patch = resilient.Patch.from_diff(incident, updated)
+            client.patch("/incidents/2095", patch)
+
+        :param old_object: The last known state of the object being patched.
+        :param new_object: The object with the new values.
+        :param version: The last known version of the object being patched.  If omitted then the 'vers' item in
+             old_object is used, as for the constructor.
+        :param ignore_fields: optional list of (dotted) field names to leave out of the patch.
+        :return: A new Patch.
+        """
+        patch = cls(old_object, version)
+        ignore_fields = set(ignore_fields or [])
+        ignore_fields.add("vers")
+        patch._add_diff(old_object, new_object, "", ignore_fields)
+        return patch
+
+    def _add_diff(self, old_object, new_object, prefix, ignore_fields):
+        """Helper to add the changes between two dicts, with field names starting with `prefix`"""
+        for name, new_value in new_object.items():
+            field_name = prefix + name
+            if field_name in ignore_fields:
+                continue
+            old_value = old_object.get(name) if isinstance(old_object, dict) else None
+            if isinstance(new_value, dict):
+                self._add_diff(old_value, new_value, field_name + ".", ignore_fields)
+            elif isinstance(old_value, dict):
+                # Same as _get_base_value: a dict-valued field is not a patchable field
+                continue
+            elif new_value != old_value:
+                self.changes[field_name] = Change(field_name, new_value, old_value)
+
     def _get_base_value(self, field_name):
         """
         Helper to get the value for a field from the previous_object (base object) passed into
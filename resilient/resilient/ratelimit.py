@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright IBM Corp. 2010, 2017. All Rights Reserved.
+
+"""Client-side rate limits for Resilient REST API requests"""
+
+import threading
+import time
+
+_timer = getattr(time, "monotonic", time.time)
+
+# Request classes that can have their own rate
+READ = "read"
+WRITE = "write"
+SEARCH = "search"
+ALL = "all"
+
+_READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def request_class(method, url):
+    """The class of a request, for rate limits: "search", "read", or "write".
+
+    >>> request_class("POST", "https://resilient.example.com/rest/search_ex")
+    'search'
+    >>> request_class("GET", "https://resilient.example.com/rest/orgs/201/incidents/2")
+    'read'
+    >>> request_class("PUT", "https://resilient.example.com/rest/orgs/201/incidents/2")
+    'write'
+    """
+    path = url.split("?")[0]
+    if "/search_ex" in path or path.endswith("/query") or "/query_paged" in path:
+        return SEARCH
+    if (method or "").upper() in _READ_METHODS:
+        return READ
+    return WRITE
+
+
+def parse_rates(rates):
+    """Parse rate limits (requests per second).
+
+    >>> parse_rates("10")
+    {'all': 10.0}
+    >>> sorted(parse_rates("read:20, write:5, search:1").items())
+    [('read', 20.0), ('search', 1.0), ('write', 5.0)]
+
+    :param rates: A number (for all requests), or comma-separated `class:rate` pairs (or a dict of them)
+    :return: dict of {request class: rate}
+    :raises ValueError: for an unknown request class, or a rate that is not positive
+    """
+    if not rates and rates != 0:
+        return {}
+    if isinstance(rates, dict):
+        parsed = dict((name, float(rate)) for name, rate in rates.items())
+    elif isinstance(rates, (int, float)):
+        parsed = {ALL: float(rates)}
+    else:
+        parsed = {}
+        for rule in rates.split(","):
+            rule = rule.strip()
+            if rule:
+                name, _, rate = rule.rpartition(":")
+                name = name.strip() or ALL
+                if name not in (READ, WRITE, SEARCH, ALL):
+                    raise ValueError(u"Invalid rate limit class '{0}', expected read, write, search or all"
+                                     .format(name))
+                parsed[str(name)] = float(rate)
+    for name, rate in parsed.items():
+        _check_positive(rate, "rate", name)
+    return parsed
+
+
+def _check_positive(value, what, name):
+    if not value > 0:
+        raise ValueError(u"Invalid {0} for rate limit class '{1}': {2} (must be greater than 0)"
+                         .format(what, name, value))
+
+
+class TokenBucket(object):
+    """A token bucket: allows `rate` requests per second on average, and bursts of up to `burst` requests.
+
+    A caller that finds the bucket empty reserves the next token, and waits for it; so callers
+    get their turn in the order that they arrived.
+    """
+
+    def __init__(self, rate, burst=None, timer=_timer, name=ALL):
+        """
+        :param rate: The number of requests per second
+        :param burst: The number of requests that can be made at once (default: one second's worth)
+        :param timer: Function returning the current time in seconds
+        :param name: The class of requests that the bucket limits (for error messages)
+        :raises ValueError: if the rate or burst is not positive
+        """
+        self.rate = float(rate)
+        _check_positive(self.rate, "rate", name)
+        self.burst = float(burst if burst is not None else max(1.0, self.rate))
+        _check_positive(self.burst, "burst", name)
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._updated = timer()
+
+    def reserve(self):
+        """Take a token.
+
+        :return: The time (seconds) that the caller must wait before it can make its request
+        """
+        with self._lock:
+            now = self._timer()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+class RateLimiter(object):
+    """Rate limits for the requests of a client (or several clients): for all requests,
+       or separately for each class of request (see :func:`request_class`).
+
+    A request that is over the limit waits for its turn.  The number of requests that waited,
+    and the total time waited, are counted (see :meth:`stats`).
+    """
+
+    def __init__(self, rates, burst=None, sleep=time.sleep, timer=_timer):
+        """
+        :param rates: Requests per second: a number for all requests, or a dict (or a string for
+          :func:`parse_rates`) of rates for "read", "write" and "search" requests.
+          Requests of a class that has no rate are not limited.
+        :param burst: The number of requests that can be made at once (default: one second's worth)
+        :param sleep: Function to wait for a number of seconds
+        :param timer: Function returning the current time in seconds
+        """
+        self.rates = parse_rates(rates)
+        self._buckets = dict((name, TokenBucket(rate, burst, timer, name)) for name, rate in self.rates.items())
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._stats = dict((name, {"requests": 0, "waited": 0, "wait_time": 0.0}) for name in self._buckets)
+
+    def reserve(self, method, url):
+        """Take a token for a request.
+
+        :return: The time (seconds) that the caller must wait before it makes the request
+        """
+        name = request_class(method, url)
+        if name not in self._buckets:
+            name = ALL
+        bucket = self._buckets.get(name)
+        if bucket is None:
+            return 0.0
+        wait = bucket.reserve()
+        with self._lock:
+            stats = self._stats[name]
+            stats["requests"] += 1
+            if wait > 0:
+                stats["waited"] += 1
+                stats["wait_time"] += wait
+        return wait
+
+    def acquire(self, method, url):
+        """Wait until a request can be made.
+
+        :return: The time (seconds) waited
+        """
+        wait = self.reserve(method, url)
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    def stats(self):
+        """Rate limit statistics.
+
+        :return: A dict of {request class: counts}, with the number of "requests", the number that
+          "waited" for their turn, and the total "wait_time" (seconds).
+        """
+        with self._lock:
+            return dict((name, dict(stats)) for name, stats in self._stats.items())
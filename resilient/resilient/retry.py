@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright IBM Corp. 2010, 2017. All Rights Reserved.
+
+"""Retry policy for Resilient REST API requests"""
+
+import logging
+import random
+import threading
+import time
+import requests
+
+LOG = logging.getLogger(__name__)
+
+# Responses that usually mean the server (or a proxy in front of it) is briefly unavailable
+DEFAULT_RETRY_STATUSES = (502, 503, 504)
+
+# Exceptions that usually mean the connection failed, or was reset
+DEFAULT_RETRY_EXCEPTIONS = (requests.exceptions.ConnectionError,)
+
+# Requests that can safely be sent again
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+_timer = getattr(time, "monotonic", time.time)
+
+
+def parse_statuses(statuses):
+    """Parse a list of HTTP status codes.
+
+    >>> parse_statuses("502, 503,504")
+    (502, 503, 504)
+
+    :param statuses: comma-separated status codes (or a list of them)
+    :return: tuple of ints
+    """
+    if not statuses:
+        return ()
+    if isinstance(statuses, (str, type(u""))):
+        statuses = [status for status in statuses.split(",") if status.strip()]
+    return tuple(int(status) for status in statuses)
+
+
+class RetryPolicy(object):
+    """When, and how long to wait before, a request is retried.
+
+    A request is retried if its method is idempotent, and it failed with one of `retry_statuses`
+    or `retry_exceptions`.  Update operations that get a conflict (409) from the server are retried
+    up to `max_conflict_attempts` times.  Before each retry the client waits for a random time (the
+    "jitter", so that many clients do not all retry at once) up to `backoff` seconds, doubling
+    for each retry, up to `max_backoff`.  No retry starts after `deadline` seconds from the first attempt.
+
+    A policy can be shared by many clients and threads.
+    """
+
+    def __init__(self, max_attempts=3, backoff=0.5, max_backoff=30, deadline=None,
+                 retry_statuses=DEFAULT_RETRY_STATUSES, retry_exceptions=DEFAULT_RETRY_EXCEPTIONS,
+                 retry_methods=IDEMPOTENT_METHODS, max_conflict_attempts=20,
+                 sleep=time.sleep, timer=_timer):
+        """
+        :param max_attempts: The maximum number of attempts for each request (1 means no retries)
+        :param backoff: The maximum wait (seconds) before the first retry
+        :param max_backoff: The maximum wait (seconds) before any retry
+        :param deadline: The time (seconds) after which a request is not retried, or None for no limit
+        :param retry_statuses: HTTP status codes that are retried (a list, or a comma-separated string)
+        :param retry_exceptions: Exception classes that are retried
+        :param retry_methods: HTTP methods that are retried
+        :param max_conflict_attempts: The maximum number of attempts for an update that gets conflicts
+        :param sleep: Function to wait for a number of seconds
+        :param timer: Function returning the current time in seconds
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.deadline = deadline or None
+        self.retry_statuses = parse_statuses(retry_statuses)
+        self.retry_exceptions = tuple(retry_exceptions)
+        self.retry_methods = tuple(method.upper() for method in retry_methods)
+        self.max_conflict_attempts = max(1, max_conflict_attempts)
+        self._sleep = sleep
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._retries = 0
+        self._conflict_retries = 0
+        self._gave_up = 0
+
+    def begin(self):
+        """Start a request (that may be retried).
+
+        :return: A :class:`RetryState`, to use for each retry of this request
+        """
+        return RetryState(self)
+
+    def is_retryable(self, method, response=None, exception=None):
+        """Should a request that got this `response` (or raised this `exception`) be retried?"""
+        if (method or "").upper() not in self.retry_methods:
+            return False
+        if exception is not None:
+            return isinstance(exception, self.retry_exceptions)
+        return response is not None and response.status_code in self.retry_statuses
+
+    def backoff_delay(self, retry_number):
+        """The time to wait before a retry (the first retry is number 1)"""
+        ceiling = min(self.max_backoff, self.backoff * (2 ** (retry_number - 1)))
+        return random.uniform(0, ceiling)
+
+    def stats(self):
+        """Retry statistics.
+
+        :return: A dict with the number of "retries" (after a failed request), "conflict_retries"
+          (after an update conflict), and requests that failed after they "gave_up" retrying.
+        """
+        with self._lock:
+            return {"retries": self._retries,
+                    "conflict_retries": self._conflict_retries,
+                    "gave_up": self._gave_up}
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+class RetryState(object):
+    """The retries of one request (see :meth:`RetryPolicy.begin`)"""
+
+    def __init__(self, policy):
+        self.policy = policy
+        self.start = policy._timer()
+        self.attempts = 1
+        self.conflict_attempts = 1
+
+    def next_delay(self, conflict=False):
+        """Count a retry, and get the time to wait before it.
+
+        :param conflict: True if the retry is because of an update conflict
+        :return: The time (seconds) to wait before retrying, or None if the request should not be retried
+        """
+        policy = self.policy
+        if conflict:
+            attempts, limit = self.conflict_attempts, policy.max_conflict_attempts
+        else:
+            attempts, limit = self.attempts, policy.max_attempts
+        delay = policy.backoff_delay(attempts)
+        if attempts >= limit or \
+                (policy.deadline is not None and policy._timer() + delay - self.start > policy.deadline):
+            policy._count("_gave_up")
+            return None
+        if conflict:
+            self.conflict_attempts += 1
+            policy._count("_conflict_retries")
+        else:
+            self.attempts += 1
+            policy._count("_retries")
+        return delay
+
+    def retry(self, conflict=False):
+        """Wait before a retry.
+
+        :param conflict: True if the retry is because of an update conflict
+        :return: True if the request should be retried, False if not (out of attempts or time)
+        """
+        delay = self.next_delay(conflict)
+        if delay is None:
+            return False
+        self.wait(delay)
+        return True
+
+    def wait(self, delay):
+        """Wait for a delay from :meth:`next_delay`"""
+        self.policy._sleep(delay)
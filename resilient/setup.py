@@ -94,12 +94,12 @@ setup(
         'requests>=2.6.0',
         'requests-toolbelt>=0.6.0',
         'requests-mock>=1.2.0',
-        'six',
-        'cachetools'
+        'six'
     ],
     extras_require={
         ':python_version < "3.2"': [
-            'configparser'
+            'configparser',
+            'futures'
         ],
         ':"Debian" in platform_version': [
             'keyring<=9.1'
@@ -110,6 +110,18 @@ setup(
         ],
         ':python_version == "2.6"': [
             'keyring==5.4'
+        ],
+        'async:python_version >= "3.5"': [
+            'aiohttp>=3.0'
+        ],
+        'fastjson:python_version >= "3.6"': [
+            'orjson'
+        ],
+        'fastjson:python_version < "3.6"': [
+            'ujson'
+        ],
+        'streaming': [
+            'ijson'
         ]
     },
     tests_require=["pytest", ],
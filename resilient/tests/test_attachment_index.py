@@ -0,0 +1,107 @@
+# (c) Copyright IBM Corp. 2010, 2017. All Rights Reserved.
+""" Tests for de-duplicated attachment uploads """
+from __future__ import print_function
+import gc
+import weakref
+import pytest
+from resilient import attachment_index
+from resilient.attachment_index import AttachmentIndex, hash_file
+
+ORG_URL = "https://resilient.example.com/rest/orgs/201"
+ATTACHMENTS_URI = "/incidents/2095/attachments"
+
+
+@pytest.fixture
+def server(mock_client):
+    """Incident attachments that the mock server knows about"""
+    attachments = []
+
+    def post(request, context):
+        attachment = {"id": len(attachments) + 1, "name": "attachment"}
+        attachments.append(attachment)
+        return attachment
+
+    mock_client.mock_adapter.register_uri("POST", ORG_URL + ATTACHMENTS_URI, json=post)
+    mock_client.mock_adapter.register_uri("GET", ORG_URL + ATTACHMENTS_URI, json=lambda request, context: attachments)
+    return attachments
+
+
+@pytest.fixture
+def payload(tmpdir):
+    path = tmpdir.join("payload.eml")
+    path.write_binary(b"Subject: hello\n\nbody\n")
+    return str(path)
+
+
+class TestAttachmentIndex:
+    def test_lru_bound(self):
+        index = AttachmentIndex(max_entries=2)
+        index.add("/incidents/1/attachments", "a", {"id": 1})
+        index.add("/incidents/1/attachments", "b", {"id": 2})
+        assert index.get("/incidents/1/attachments", "a") == {"id": 1}
+        index.add("/incidents/1/attachments", "c", {"id": 3})
+        assert len(index) == 2
+        assert index.get("/incidents/1/attachments", "b") is None
+        assert index.get("/incidents/1/attachments/", "a") == {"id": 1}
+
+    def test_persists(self, tmpdir):
+        path = str(tmpdir.join("index.json"))
+        AttachmentIndex(path, save_delay=0).add("/incidents/1/attachments", "a", {"id": 1})
+        assert AttachmentIndex(path).get("/incidents/1/attachments", "a") == {"id": 1}
+
+    def test_saves_changes_together(self, tmpdir):
+        path = tmpdir.join("index.json")
+        index = AttachmentIndex(str(path), save_delay=60)
+        for sha256 in ("a", "b", "c"):
+            index.add("/incidents/1/attachments", sha256, {"id": sha256})
+        assert not path.exists()
+        index.flush()
+        assert len(AttachmentIndex(str(path))) == 3
+        # Nothing changed since the last save
+        path.remove()
+        index.flush()
+        assert not path.exists()
+
+    def test_not_kept_alive(self, tmpdir):
+        index = AttachmentIndex(str(tmpdir.join("index.json")))
+        assert index in attachment_index._saved_indexes
+        index = weakref.ref(index)
+        gc.collect()
+        assert index() is None
+
+    def test_bad_file(self, tmpdir):
+        path = tmpdir.join("index.json")
+        path.write("not json")
+        assert len(AttachmentIndex(str(path))) == 0
+
+
+class TestDeduplicatedUpload:
+    def test_skips_duplicate(self, mock_client, server, payload, tmpdir):
+        mock_client.attachment_index = AttachmentIndex(str(tmpdir.join("index.json")))
+        first = mock_client.post_attachment(ATTACHMENTS_URI, payload)
+        second = mock_client.post_attachment(ATTACHMENTS_URI, payload)
+        assert first == second
+        assert len(server) == 1
+        assert mock_client.attachment_index.get(ATTACHMENTS_URI, hash_file(payload)) == first
+
+    def test_uploads_again_if_deleted(self, mock_client, server, payload):
+        mock_client.attachment_index = AttachmentIndex()
+        mock_client.post_attachment(ATTACHMENTS_URI, payload)
+        del server[:]
+        mock_client.post_attachment(ATTACHMENTS_URI, payload)
+        assert len(server) == 1
+
+    def test_without_confirm(self, mock_client, server, payload):
+        mock_client.attachment_index = AttachmentIndex(confirm=False)
+        first = mock_client.post_attachment(ATTACHMENTS_URI, payload)
+        calls = mock_client.mock_adapter.call_count
+        assert mock_client.post_attachment(ATTACHMENTS_URI, payload) == first
+        assert mock_client.mock_adapter.call_count == calls
+
+    def test_different_content(self, mock_client, server, payload, tmpdir):
+        mock_client.attachment_index = AttachmentIndex()
+        other = tmpdir.join("other.eml")
+        other.write_binary(b"Subject: other\n")
+        mock_client.post_attachment(ATTACHMENTS_URI, payload)
+        mock_client.post_attachment(ATTACHMENTS_URI, str(other))
+        assert len(server) == 2
@@ -0,0 +1,91 @@
+# (c) Copyright IBM Corp. 2010, 2017. All Rights Reserved.
+""" Tests for the REST API circuit breaker """
+from __future__ import print_function
+import pytest
+import resilient
+from resilient.breaker import CircuitBreaker, CircuitBreakerOpen
+from resilient.retry import RetryPolicy
+
+ORG_URL = "https://resilient.example.com/rest/orgs/201"
+
+
+class FakeTimer(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def timer():
+    return FakeTimer()
+
+
+@pytest.fixture
+def breaker(timer):
+    return CircuitBreaker(failure_rate=0.5, window=4, min_requests=4, reset_timeout=10, timer=timer)
+
+
+class TestCircuitBreaker:
+    def test_opens_on_failure_rate(self, breaker):
+        changes = []
+        breaker.add_listener(lambda old_state, new_state: changes.append(new_state))
+        for success in (True, False, True):
+            breaker.before_request()
+            breaker.record(success)
+        assert breaker.state == "closed"
+        breaker.before_request()
+        breaker.record(False)
+        assert breaker.state == "open"
+        assert changes == ["open"]
+        with pytest.raises(CircuitBreakerOpen):
+            breaker.before_request()
+        assert breaker.stats() == {"state": "open", "opened": 1, "rejected": 1}
+
+    def test_half_open_allows_one_probe(self, breaker, timer):
+        for _ in range(4):
+            breaker.before_request()
+            breaker.record(False)
+        timer.now = 10
+        assert breaker.before_request() is True
+        with pytest.raises(CircuitBreakerOpen):
+            breaker.before_request()
+        breaker.record(True, probe=True)
+        assert breaker.state == "closed"
+        assert breaker.before_request() is False
+
+    def test_failed_probe_reopens(self, breaker, timer):
+        for _ in range(4):
+            breaker.before_request()
+            breaker.record(False)
+        timer.now = 10
+        probe = breaker.before_request()
+        breaker.record(False, probe)
+        assert breaker.state == "open"
+        timer.now = 15
+        with pytest.raises(CircuitBreakerOpen):
+            breaker.before_request()
+
+
+class TestClientCircuitBreaker:
+    def test_fails_fast_while_open(self, mock_client, breaker):
+        mock_client.retry_policy = RetryPolicy(max_attempts=1)
+        mock_client.circuit_breaker = breaker
+        mock_client.mock_adapter.register_uri("GET", ORG_URL + "/incidents/1", status_code=503, text="down")
+        for _ in range(4):
+            with pytest.raises(resilient.SimpleHTTPException):
+                mock_client.get("/incidents/1")
+        calls = mock_client.mock_adapter.call_count
+        with pytest.raises(CircuitBreakerOpen):
+            mock_client.get("/incidents/1")
+        assert mock_client.mock_adapter.call_count == calls
+        assert mock_client.get_circuit_breaker_stats()["state"] == "open"
+
+    def test_client_errors_are_not_failures(self, mock_client, breaker):
+        mock_client.circuit_breaker = breaker
+        mock_client.mock_adapter.register_uri("GET", ORG_URL + "/incidents/1", status_code=404, text="no")
+        for _ in range(6):
+            with pytest.raises(resilient.SimpleHTTPException):
+                mock_client.get("/incidents/1")
+        assert breaker.state == "closed"
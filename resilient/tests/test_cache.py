@@ -0,0 +1,155 @@
+# (c) Copyright IBM Corp. 2010, 2017. All Rights Reserved.
+""" Tests for the response cache """
+from __future__ import print_function
+import threading
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from resilient.cache import ResponseCache
+
+ORG_URL = "https://resilient.example.com/rest/orgs/201"
+
+
+class TestResponseCache:
+    def test_single_flight(self):
+        cache = ResponseCache()
+        calls = []
+
+        def loader():
+            calls.append(1)
+            time.sleep(0.2)
+            return {"fields": []}
+
+        with ThreadPoolExecutor(max_workers=20) as executor:
+            results = list(executor.map(lambda _: cache.get_or_load("/types/incident/fields", loader), range(20)))
+        assert len(calls) == 1
+        assert all(result is results[0] for result in results)
+        stats = cache.stats()
+        assert stats["misses"] == 1
+        assert stats["hits"] + stats["coalesced"] == 19
+
+    def test_error_not_cached(self):
+        cache = ResponseCache()
+        started = threading.Event()
+
+        def failing_loader():
+            started.set()
+            time.sleep(0.1)
+            raise ValueError("server error")
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            first = executor.submit(cache.get_or_load, "key", failing_loader)
+            started.wait()
+            second = executor.submit(cache.get_or_load, "key", lambda: "unexpected")
+            for future in (first, second):
+                with pytest.raises(ValueError):
+                    future.result()
+        assert "key" not in cache
+        assert cache.get_or_load("key", lambda: "value") == "value"
+
+    def test_interrupted_load(self):
+        cache = ResponseCache()
+
+        def interrupted_loader():
+            raise KeyboardInterrupt()
+
+        with pytest.raises(KeyboardInterrupt):
+            cache.get_or_load("key", interrupted_loader)
+        # The key isn't left pending, so later callers load it
+        assert cache.get_or_load("key", lambda: "value") == "value"
+
+    def test_eviction(self):
+        cache = ResponseCache(maxsize=2)
+        cache["a"] = 1
+        cache["b"] = 2
+        assert cache["a"] == 1
+        cache["c"] = 3
+        # "b" was least recently used
+        assert "b" not in cache
+        assert "a" in cache
+        assert cache.stats()["evictions"] == 1
+        cache.clear()
+        assert len(cache) == 0
+
+    def test_client_coalesces(self, mock_client):
+        def slow_fields(request, context):
+            time.sleep(0.2)
+            return [{"name": "description"}]
+
+        mock_client.mock_adapter.register_uri("GET", ORG_URL + "/types/incident/fields", json=slow_fields)
+        count = mock_client.mock_adapter.call_count
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            results = list(executor.map(lambda _: mock_client.cached_get("/types/incident/fields"), range(10)))
+        assert results == [[{"name": "description"}]] * 10
+        assert mock_client.mock_adapter.call_count == count + 1
+        assert mock_client.get_cache_stats()["misses"] == 1
+
+
+class FakeTimer(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCachePolicy:
+    def test_ttl_rules(self):
+        timer = FakeTimer()
+        cache = ResponseCache(ttl=60, ttl_rules="/types/*:3600, /incidents/*:5, /actions:0", timer=timer)
+        cache["/types/incident/fields"] = []
+        cache["/incidents/1"] = {"id": 1}
+        cache["/message_destinations"] = {}
+        cache["/actions"] = {}
+        assert "/actions" not in cache
+        timer.now += 10
+        assert "/incidents/1" not in cache
+        assert "/message_destinations" in cache
+        timer.now += 100
+        assert "/message_destinations" not in cache
+        assert "/types/incident/fields" in cache
+
+    def test_byte_budget(self):
+        cache = ResponseCache(max_bytes=100)
+        cache.set("a", "A", size=40)
+        cache.set("b", "B", size=40)
+        assert cache["a"] == "A"
+        cache.set("c", "C", size=40)
+        # "b" was least recently used
+        assert "b" not in cache
+        assert cache.stats()["bytes"] == 80
+        cache.set("too big", "X", size=101)
+        assert "too big" not in cache
+        assert cache.stats()["evictions"] == 1
+
+    def test_invalidate(self):
+        cache = ResponseCache()
+        for key in ("/incidents/1", "/incidents/1?handle_format=names", "/incidents/1/artifacts",
+                    "/incidents/12", "/incidents"):
+            cache[key] = {}
+        assert cache.invalidate("/incidents/1") == 3
+        assert "/incidents/12" in cache
+        assert "/incidents" in cache
+
+    def test_invalidate_while_loading(self):
+        cache = ResponseCache()
+
+        def loader():
+            cache.invalidate("/incidents/1")
+            return {"stale": True}
+
+        assert cache.get_or_load("/incidents/1", loader) == {"stale": True}
+        assert "/incidents/1" not in cache
+
+    def test_client_writes_invalidate(self, mock_client):
+        mock_client.mock_adapter.register_uri("GET", ORG_URL + "/incidents/1", json={"id": 1, "name": "old"})
+        mock_client.mock_adapter.register_uri("PUT", ORG_URL + "/incidents/1", json={"id": 1, "name": "new"})
+        mock_client.mock_adapter.register_uri("DELETE", ORG_URL + "/incidents/1/comments/2", status_code=204)
+        mock_client.mock_adapter.register_uri("GET", ORG_URL + "/incidents/1/comments", json=[])
+
+        assert mock_client.cached_get("/incidents/1")["name"] == "old"
+        assert mock_client.cached_get("/incidents/1/comments") == []
+        assert mock_client.get_cache_stats()["bytes"] > 0
+        mock_client.put("/incidents/1?handle_format=names", {"id": 1, "name": "new"})
+        assert "/incidents/1" not in mock_client.cache
+        assert "/incidents/1/comments" not in mock_client.cache
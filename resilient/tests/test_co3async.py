@@ -0,0 +1,131 @@
+# (c) Copyright IBM Corp. 2010, 2017. All Rights Reserved.
+""" Tests for the asyncio client, against a local aiohttp server """
+import asyncio
+import pytest
+import resilient
+
+web = pytest.importorskip("aiohttp.web")
+from aiohttp.test_utils import TestServer
+
+
+class FakeResilient(object):
+    """Minimal REST server: a session endpoint and one incident"""
+    def __init__(self):
+        self.sessions = 0
+        self.put_conflicts = 0
+        self.patch_conflicts = 0
+        self.incident = {"id": 1, "name": "test", "vers": 1}
+        self.app = web.Application()
+        self.app.router.add_post("/rest/session", self.session)
+        self.app.router.add_route("*", "/rest/orgs/201/incidents/1", self.incident_handler)
+
+    def authorized(self, request):
+        return request.cookies.get("JSESSIONID") == "session{0}".format(self.sessions)
+
+    async def session(self, request):
+        self.sessions += 1
+        response = web.json_response({"orgs": [{"name": "Test Org", "id": 201, "enabled": True}],
+                                      "csrf_token": "token{0}".format(self.sessions),
+                                      "user_id": 1,
+                                      "session_ip": "127.0.0.1"})
+        response.set_cookie("JSESSIONID", "session{0}".format(self.sessions))
+        return response
+
+    async def incident_handler(self, request):
+        if not self.authorized(request):
+            return web.Response(status=401, text="unauthorized")
+        if request.method == "PUT":
+            if self.put_conflicts:
+                self.put_conflicts -= 1
+                return web.Response(status=409, text="conflict")
+            self.incident = await request.json()
+            self.incident["vers"] += 1
+        elif request.method == "PATCH":
+            if self.patch_conflicts:
+                self.patch_conflicts -= 1
+                return web.Response(status=409, text="conflict")
+            for change in (await request.json())["changes"]:
+                self.incident[change["field"]] = change["new_value"]["object"]
+            return web.json_response({"success": True, "field_failures": [], "message": None})
+        elif request.method == "DELETE":
+            return web.Response(status=204)
+        return web.json_response(self.incident)
+
+
+def run(coro):
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+@pytest.fixture
+def fake():
+    fake = FakeResilient()
+    server = TestServer(fake.app)
+    run(server.start_server())
+    fake.base_url = str(server.make_url("")).rstrip("/")
+    yield fake
+    run(server.close())
+
+
+class TestAsyncSimpleClient:
+    def test_get_and_reauth(self, fake):
+        async def test():
+            async with resilient.AsyncSimpleClient(org_name="Test Org", base_url=fake.base_url) as client:
+                await client.connect("a@example.com", "password")
+                assert client.org_id == 201
+                assert (await client.get("/incidents/1"))["name"] == "test"
+
+                # Expire the session; many requests in flight should share one re-authentication
+                fake.sessions += 1
+                results = await asyncio.gather(*[client.get("/incidents/1") for _ in range(10)])
+                assert all(result["name"] == "test" for result in results)
+                assert fake.sessions == 3
+        run(test())
+
+    def test_cached_get(self, fake):
+        async def test():
+            async with resilient.AsyncSimpleClient(org_name="Test Org", base_url=fake.base_url) as client:
+                await client.connect("a@example.com", "password")
+                first, second = await asyncio.gather(client.cached_get("/incidents/1"),
+                                                     client.cached_get("/incidents/1"))
+                assert first is second
+                fake.incident = {"id": 1, "name": "changed", "vers": 2}
+                assert (await client.cached_get("/incidents/1"))["name"] == "test"
+                stats = client.get_cache_stats()
+                assert (stats["misses"], stats["coalesced"], stats["hits"]) == (1, 1, 1)
+        run(test())
+
+    def test_get_put_conflict(self, fake):
+        fake.put_conflicts = 2
+
+        def apply_func(incident):
+            incident["name"] = "updated"
+
+        async def test():
+            async with resilient.AsyncSimpleClient(org_name="Test Org", base_url=fake.base_url) as client:
+                await client.connect("a@example.com", "password")
+                result = await client.get_put("/incidents/1", apply_func)
+                assert result["name"] == "updated"
+                assert fake.put_conflicts == 0
+        run(test())
+
+    def test_patch_conflict(self, fake):
+        fake.patch_conflicts = 1
+
+        async def test():
+            async with resilient.AsyncSimpleClient(org_name="Test Org", base_url=fake.base_url) as client:
+                await client.connect("a@example.com", "password")
+                patch = resilient.Patch(fake.incident)
+                patch.add_value("name", "patched")
+                response = await client.patch("/incidents/1", patch)
+                assert response.status_code == 200
+                assert fake.incident["name"] == "patched"
+                assert await client.delete("/incidents/1") is None
+        run(test())
+
+    def test_error(self, fake):
+        async def test():
+            async with resilient.AsyncSimpleClient(org_name="Test Org", base_url=fake.base_url) as client:
+                await client.connect("a@example.com", "password")
+                with pytest.raises(resilient.SimpleHTTPException):
+                    await client.get("/incidents/2")
+        run(test())
@@ -0,0 +1,63 @@
+# (c) Copyright IBM Corp. 2010, 2017. All Rights Reserved.
+""" Tests for streamed downloads """
+from __future__ import print_function
+import hashlib
+import io
+import os
+import pytest
+import requests
+import resilient
+
+ORG_URL = "https://resilient.example.com/rest/orgs/201"
+CONTENTS_URI = "/incidents/2095/attachments/12/contents"
+
+CONTENT = os.urandom(100000)
+SHA256 = hashlib.sha256(CONTENT).hexdigest()
+
+
+@pytest.fixture
+def attachment(mock_client):
+    mock_client.mock_adapter.register_uri("GET", ORG_URL + CONTENTS_URI,
+                                          body=io.BytesIO(CONTENT))
+    return mock_client
+
+
+class TestDownload:
+    def test_to_path(self, attachment, tmpdir):
+        path = str(tmpdir.join("sample.bin"))
+        result = attachment.download(CONTENTS_URI, path, chunk_size=4096)
+        assert result == {"path": path, "size": len(CONTENT), "sha256": SHA256}
+        with open(path, "rb") as sample:
+            assert sample.read() == CONTENT
+
+    def test_to_file_object(self, attachment):
+        dest = io.BytesIO()
+        result = attachment.download(CONTENTS_URI, dest)
+        assert dest.getvalue() == CONTENT
+        assert result == {"path": None, "size": len(CONTENT), "sha256": SHA256}
+
+    def test_to_temporary_file(self, attachment):
+        result = attachment.download(CONTENTS_URI)
+        try:
+            with open(result["path"], "rb") as sample:
+                assert sample.read() == CONTENT
+        finally:
+            os.remove(result["path"])
+
+    def test_error(self, mock_client, tmpdir):
+        mock_client.mock_adapter.register_uri("GET", ORG_URL + CONTENTS_URI, status_code=404, text="no")
+        path = tmpdir.join("sample.bin")
+        with pytest.raises(resilient.SimpleHTTPException):
+            mock_client.download(CONTENTS_URI, str(path))
+        assert not path.exists()
+
+    def test_partial_file_removed(self, mock_client, tmpdir):
+        class BrokenBody(io.BytesIO):
+            def read(self, *args, **kwargs):
+                raise IOError("connection reset")
+
+        mock_client.mock_adapter.register_uri("GET", ORG_URL + CONTENTS_URI, body=BrokenBody(CONTENT))
+        path = tmpdir.join("sample.bin")
+        with pytest.raises((IOError, requests.exceptions.RequestException)):
+            mock_client.download(CONTENTS_URI, str(path))
+        assert not path.exists()
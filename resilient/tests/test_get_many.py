@@ -0,0 +1,59 @@
+# (c) Copyright IBM Corp. 2010, 2017. All Rights Reserved.
+""" Tests for the concurrent batch GET methods """
+from __future__ import print_function
+import threading
+import time
+import resilient
+
+ORG_URL = "https://resilient.example.com/rest/orgs/201"
+
+
+class TestGetMany:
+    def test_order_and_errors(self, mock_client):
+        for inc_id in range(1, 5):
+            mock_client.mock_adapter.register_uri("GET", "{0}/incidents/{1}".format(ORG_URL, inc_id),
+                                                  json={"id": inc_id})
+        mock_client.mock_adapter.register_uri("GET", ORG_URL + "/incidents/5", status_code=404, text="no")
+
+        uris = ["/incidents/{0}".format(inc_id) for inc_id in range(1, 6)]
+        results = mock_client.get_many(uris, max_workers=3)
+        assert [result["id"] for result in results[:4]] == [1, 2, 3, 4]
+        assert isinstance(results[4], resilient.SimpleHTTPException)
+
+        results = mock_client.get_many(uris, as_dict=True)
+        assert list(results.keys()) == uris
+        assert results["/incidents/2"] == {"id": 2}
+
+    def test_concurrent(self, mock_client):
+        lock = threading.Lock()
+        active = [0, 0]
+
+        def slow_response(request, context):
+            with lock:
+                active[0] += 1
+                active[1] = max(active)
+            time.sleep(0.1)
+            with lock:
+                active[0] -= 1
+            return {"path": request.path}
+
+        mock_client.mock_adapter.register_uri("GET", ORG_URL + "/tasks/1", json=slow_response)
+        mock_client.mock_adapter.register_uri("GET", ORG_URL + "/tasks/2", json=slow_response)
+        mock_client.mock_adapter.register_uri("GET", ORG_URL + "/tasks/3", json=slow_response)
+
+        results = mock_client.get_many(["/tasks/1", "/tasks/2", "/tasks/3"], max_workers=3)
+        assert len(results) == 3
+        assert active[1] > 1
+
+    def test_cached_get_many(self, mock_client):
+        mock_client.mock_adapter.register_uri("GET", ORG_URL + "/types/incident/fields", json=[{"name": "a"}])
+        mock_client.mock_adapter.register_uri("GET", ORG_URL + "/functions", json={"entities": []})
+
+        assert mock_client.cached_get("/functions") == {"entities": []}
+        count = mock_client.mock_adapter.call_count
+
+        results = mock_client.cached_get_many(["/types/incident/fields", "/functions", "/types/incident/fields"])
+        assert results == [[{"name": "a"}], {"entities": []}, [{"name": "a"}]]
+        assert mock_client.mock_adapter.call_count == count + 1
+        assert mock_client.cached_get("/types/incident/fields") == [{"name": "a"}]
+        assert mock_client.mock_adapter.call_count == count + 1
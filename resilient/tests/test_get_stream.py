@@ -0,0 +1,45 @@
+# (c) Copyright IBM Corp. 2010, 2017. All Rights Reserved.
+""" Tests for streaming JSON responses """
+from __future__ import print_function
+import json
+import pytest
+import resilient
+from resilient import co3
+
+ORG_URL = "https://resilient.example.com/rest/orgs/201"
+
+HISTORY = {"histories": [{"id": export_id, "date": 1000 * export_id, "options": {"actions": True}}
+                         for export_id in range(1, 101)],
+           "score": 2.5}
+
+
+@pytest.fixture(params=["ijson", "none"])
+def parser(request, monkeypatch):
+    """Run each test with ijson, and with the fallback that decodes the whole response"""
+    if request.param == "ijson":
+        pytest.importorskip("ijson")
+    else:
+        monkeypatch.setattr(co3, "ijson", None)
+    return request.param
+
+
+class TestGetStream:
+    def test_items(self, mock_client, parser):
+        mock_client.mock_adapter.register_uri("GET", ORG_URL + "/configurations/exports/history",
+                                              content=json.dumps(HISTORY).encode("utf-8"))
+        items = list(mock_client.get_stream("/configurations/exports/history", "histories.item", chunk_size=16))
+        assert items == HISTORY["histories"]
+
+    def test_top_level_list(self, mock_client, parser):
+        mock_client.mock_adapter.register_uri("GET", ORG_URL + "/incidents", json=[{"id": 1}, {"id": 2}])
+        assert list(mock_client.get_stream("/incidents")) == [{"id": 1}, {"id": 2}]
+
+    def test_scalar_and_missing(self, mock_client, parser):
+        mock_client.mock_adapter.register_uri("GET", ORG_URL + "/configurations/exports/history", json=HISTORY)
+        assert list(mock_client.get_stream("/configurations/exports/history", "score")) == [2.5]
+        assert list(mock_client.get_stream("/configurations/exports/history", "other.item")) == []
+
+    def test_error(self, mock_client, parser):
+        mock_client.mock_adapter.register_uri("GET", ORG_URL + "/incidents", status_code=404, text="no")
+        with pytest.raises(resilient.SimpleHTTPException):
+            list(mock_client.get_stream("/incidents"))
@@ -0,0 +1,51 @@
+# (c) Copyright IBM Corp. 2010, 2017. All Rights Reserved.
+""" Tests for the paged query iterator """
+from __future__ import print_function
+import json
+import pytest
+import resilient
+
+ORG_URL = "https://resilient.example.com/rest/orgs/201"
+
+
+def paged_incidents(count):
+    """requests_mock callback for /incidents/query_paged, with `count` incidents"""
+    def callback(request, context):
+        query = json.loads(request.body.decode("utf-8"))
+        start, length = query["start"], query["length"]
+        return {"recordsTotal": count,
+                "recordsFiltered": count,
+                "data": [{"id": inc_id, "name": "incident {0}".format(inc_id)}
+                         for inc_id in range(start, min(start + length, count))]}
+    return callback
+
+
+class TestIterQuery:
+    @pytest.mark.parametrize("prefetch", [True, False])
+    def test_all_pages(self, mock_client, prefetch):
+        mock_client.mock_adapter.register_uri("POST", ORG_URL + "/incidents/query_paged", json=paged_incidents(25))
+        ids = [inc["id"] for inc in mock_client.iter_query("/incidents/query_paged", {"filters": []},
+                                                            page_size=10, prefetch=prefetch)]
+        assert ids == list(range(25))
+        queries = [json.loads(request.body.decode("utf-8")) for request in mock_client.mock_adapter.request_history
+                   if request.path.endswith("query_paged")]
+        assert [(query["start"], query["length"]) for query in queries] == [(0, 10), (10, 10), (20, 10)]
+        assert all(query["filters"] == [] for query in queries)
+
+    def test_exact_multiple(self, mock_client):
+        mock_client.mock_adapter.register_uri("POST", ORG_URL + "/incidents/query_paged", json=paged_incidents(20))
+        assert len(list(mock_client.iter_query("/incidents/query_paged", page_size=10))) == 20
+        # recordsFiltered says there are no more; no request for an empty third page
+        assert mock_client.mock_adapter.call_count == 3
+
+    def test_stop_early(self, mock_client):
+        mock_client.mock_adapter.register_uri("POST", ORG_URL + "/incidents/query_paged", json=paged_incidents(1000))
+        rows = mock_client.iter_query("/incidents/query_paged", page_size=10)
+        assert next(rows)["id"] == 0
+        rows.close()
+        assert mock_client.mock_adapter.call_count <= 3
+
+    def test_error(self, mock_client):
+        mock_client.mock_adapter.register_uri("POST", ORG_URL + "/incidents/query_paged", status_code=400, text="bad")
+        with pytest.raises(resilient.SimpleHTTPException):
+            list(mock_client.iter_query("/incidents/query_paged"))
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright IBM Corp. 2010, 2017. All Rights Reserved.
+""" Tests for the JSON codecs """
+from __future__ import print_function
+import json
+import pytest
+from resilient.jsoncodec import get_codec
+
+ORG_URL = "https://resilient.example.com/rest/orgs/201"
+
+VALUE = {"name": u"Café incident", "id": 2095, "score": 2.5, "tags": [None, True, False], "nested": {"a": []}}
+
+
+@pytest.mark.parametrize("backend", ["json", "ujson", "orjson"])
+def test_round_trip(backend):
+    pytest.importorskip(backend)
+    codec = get_codec(backend)
+    assert codec.name == backend
+    encoded = codec.dumps(VALUE)
+    assert isinstance(encoded, bytes)
+    assert json.loads(encoded.decode("utf-8")) == VALUE
+    assert codec.loads(encoded) == VALUE
+    assert codec.loads(json.dumps(VALUE).encode("utf-8")) == VALUE
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        get_codec("simplejson")
+
+
+def test_client_bodies(mock_client):
+    mock_client.mock_adapter.register_uri("POST", ORG_URL + "/incidents", json={"id": 2095, "name": VALUE["name"]})
+    assert mock_client.post("/incidents", VALUE) == {"id": 2095, "name": VALUE["name"]}
+    request = mock_client.mock_adapter.last_request
+    assert json.loads(request.body.decode("utf-8")) == VALUE
+
+
+def test_default_backend():
+    # The standard library is the default even when a faster library is installed
+    assert get_codec().name == "json"
+    assert get_codec("auto").name in ("orjson", "ujson", "json")
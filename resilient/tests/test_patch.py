@@ -125,6 +125,38 @@ class TestPatch:
 
         assert not patch.has_changes()
 
+    def test_from_diff(self):
+        existing = {"vers": 7, "name": "inc", "description": None, "severity_code": 4,
+                    "incident_type_ids": [1, 2], "properties": {"a": 1, "b": "x"}, "hipaa": {"hipaa_acquired": True}}
+        updated = {"vers": 8, "name": "inc", "description": "new", "severity_code": 4,
+                   "incident_type_ids": [1, 2, 3], "properties": {"a": 1, "b": "y", "c": 5}, "hipaa": None}
+
+        patch = resilient.Patch.from_diff(existing, updated)
+
+        dto = patch.to_dict()
+        assert dto["version"] == 7
+        assert [change["field"] for change in dto["changes"]] == \
+            ["description", "incident_type_ids", "properties.b", "properties.c"]
+        assert patch.get_old_value("description") is None
+        assert patch.get_new_value("description") == "new"
+        assert patch.get_old_value("incident_type_ids") == [1, 2]
+        assert patch.get_old_value("properties.b") == "x"
+        assert patch.get_new_value("properties.b") == "y"
+        assert patch.get_old_value("properties.c") is None
+
+    def test_from_diff_no_changes(self):
+        existing = {"vers": 7, "name": "inc", "properties": {"a": 1}}
+        patch = resilient.Patch.from_diff(existing, {"name": "inc", "properties": {"a": 1}})
+
+        assert not patch.has_changes()
+
+    def test_from_diff_ignore_fields(self):
+        existing = {"name": "inc", "properties": {"a": 1, "b": 2}}
+        patch = resilient.Patch.from_diff(existing, {"name": "new", "properties": {"a": 3, "b": 4}},
+                                          ignore_fields=["name", "properties.a"])
+
+        assert list(patch.changes) == ["properties.b"]
+
 
 class TestPatchStatus:
     @pytest.mark.parametrize("success", (True, False))
@@ -0,0 +1,76 @@
+# (c) Copyright IBM Corp. 2010, 2017. All Rights Reserved.
+""" Tests for patching many objects """
+from __future__ import print_function
+import json
+import re
+import threading
+import pytest
+import resilient
+
+ORG_URL = "https://resilient.example.com/rest/orgs/201"
+
+CONFLICT = {"success": False,
+            "field_failures": [{"field": "severity_code", "your_original_value": 4, "actual_current_value": 5}]}
+
+
+@pytest.fixture
+def server(mock_client):
+    """Mock server where incident 3 has a conflicting severity, and incident 4 does not exist"""
+    requests = []
+    lock = threading.Lock()
+
+    def patch(request, context):
+        incident_id = int(request.path.rsplit("/", 1)[1])
+        body = json.loads(request.body.decode("utf-8"))
+        with lock:
+            requests.append((incident_id, body))
+        if incident_id == 4:
+            context.status_code = 404
+            return {"message": "not found"}
+        if incident_id == 3 and body["changes"][0]["old_value"]["object"] != 5:
+            return CONFLICT
+        return {"success": True}
+
+    mock_client.mock_adapter.register_uri("PATCH", re.compile(ORG_URL + "/incidents/[0-9]+$"), json=patch)
+    return requests
+
+
+def severity_patches(incident_ids):
+    patches = []
+    for incident_id in incident_ids:
+        patch = resilient.Patch({"vers": 1, "severity_code": 4})
+        patch.add_value("severity_code", 6)
+        patches.append(("/incidents/{0}".format(incident_id), patch))
+    return patches
+
+
+class TestPatchMany:
+    def test_overwrite_conflicts(self, mock_client, server):
+        results = mock_client.patch_many(severity_patches([1, 2, 3, 4]), overwrite_conflict=True, max_workers=4)
+        assert list(results) == ["/incidents/1", "/incidents/2", "/incidents/3", "/incidents/4"]
+        assert all(results[uri].is_success() for uri in ("/incidents/1", "/incidents/2", "/incidents/3"))
+        assert isinstance(results["/incidents/4"], resilient.SimpleHTTPException)
+        # incident 3 was patched twice, the second time with the current value as the old value
+        assert [body["changes"][0]["old_value"]["object"] for incident_id, body in server if incident_id == 3] == [4, 5]
+
+    def test_conflict_raises_per_uri(self, mock_client, server):
+        results = mock_client.patch_many(severity_patches([1, 3]))
+        assert results["/incidents/1"].is_success()
+        assert isinstance(results["/incidents/3"], resilient.PatchConflictException)
+        assert results["/incidents/3"].patch_status.get_actual_current_value("severity_code") == 5
+
+    def test_callback(self, mock_client, server):
+        conflicts = []
+
+        def callback(response, patch_status, patch):
+            conflicts.append(patch_status.get_conflict_fields())
+            raise resilient.NoChange
+
+        results = mock_client.patch_many(severity_patches([2, 3]), callback)
+        assert conflicts == [["severity_code"]]
+        assert results["/incidents/2"].is_success()
+        assert not results["/incidents/3"].is_success()
+
+    def test_duplicate_uri(self, mock_client):
+        with pytest.raises(ValueError):
+            mock_client.patch_many(severity_patches([1, 1]))
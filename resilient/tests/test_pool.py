@@ -0,0 +1,76 @@
+# (c) Copyright IBM Corp. 2010, 2017. All Rights Reserved.
+""" Tests for the connection pool settings and statistics """
+from __future__ import print_function
+import socket
+import threading
+import time
+import pytest
+import requests
+from six.moves import BaseHTTPServer, socketserver
+from concurrent.futures import ThreadPoolExecutor
+from resilient.co3base import TLSHttpAdapter, get_socket_options
+
+
+class KeepAliveHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        # slow enough that concurrent requests overlap
+        time.sleep(0.05)
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ThreadingServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingServer(("127.0.0.1", 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield "http://127.0.0.1:{0}/".format(server.server_address[1])
+    server.shutdown()
+    server.server_close()
+
+
+class TestPool:
+    def test_socket_options(self):
+        options = get_socket_options(tcp_keepalive=True, tcp_nodelay=False)
+        assert (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1) in options
+        assert (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1) not in options
+        assert get_socket_options() == [(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)]
+
+    def test_reuse(self, server_url):
+        adapter = TLSHttpAdapter(tcp_keepalive=True)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        for _ in range(3):
+            assert session.get(server_url).json() == {"ok": True}
+        assert adapter.pool_stats.as_dict() == {"created": 1, "reused": 2, "discarded": 0}
+
+    def test_discard(self, server_url):
+        adapter = TLSHttpAdapter(pool_maxsize=1)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        barrier = threading.Barrier(4) if hasattr(threading, "Barrier") else None
+
+        def get(_):
+            if barrier:
+                barrier.wait()
+            return session.get(server_url).status_code
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            assert list(executor.map(get, range(4))) == [200] * 4
+        stats = adapter.pool_stats.as_dict()
+        assert stats["created"] > 1
+        assert stats["discarded"] == stats["created"] - 1
@@ -0,0 +1,63 @@
+# (c) Copyright IBM Corp. 2010, 2017. All Rights Reserved.
+""" Tests for uploading several files """
+from __future__ import print_function
+import collections
+import threading
+import pytest
+import resilient
+
+ORG_URL = "https://resilient.example.com/rest/orgs/201"
+
+
+def read_upload(request, context):
+    """requests_mock callback that reads the streamed multipart body, and returns an attachment"""
+    body = request.body
+    data = body.read() if hasattr(body, "read") else body
+    name = data.split(b'filename="')[1].split(b'"')[0].decode("utf-8")
+    if name == "bad.txt":
+        context.status_code = 400
+        return {"message": "bad"}
+    return {"id": len(data), "name": name}
+
+
+@pytest.fixture
+def files(tmpdir):
+    paths = []
+    for index in range(5):
+        path = tmpdir.join("file{0}.txt".format(index))
+        path.write_binary(b"x" * (1000 * (index + 1)))
+        paths.append(str(path))
+    return paths
+
+
+class TestPostAttachments:
+    def test_upload_with_progress(self, mock_client, files):
+        mock_client.mock_adapter.register_uri("POST", ORG_URL + "/incidents/2095/attachments", json=read_upload)
+        progress = collections.defaultdict(list)
+        lock = threading.Lock()
+
+        def callback(filepath, bytes_sent, total_bytes):
+            with lock:
+                progress[filepath].append((bytes_sent, total_bytes))
+
+        results = mock_client.post_attachments("/incidents/2095/attachments", files, max_workers=3,
+                                               progress_callback=callback)
+        assert [result["name"] for result in results] == ["file{0}.txt".format(index) for index in range(5)]
+        for filepath in files:
+            bytes_sent, total_bytes = progress[filepath][-1]
+            assert bytes_sent == total_bytes > 0
+
+    def test_errors_per_file(self, mock_client, files, tmpdir):
+        mock_client.mock_adapter.register_uri("POST", ORG_URL + "/incidents/2095/attachments", json=read_upload)
+        bad = tmpdir.join("bad.txt")
+        bad.write_binary(b"bad")
+        results = mock_client.post_attachments("/incidents/2095/attachments", [files[0], str(bad), files[1]])
+        assert results[0]["name"] == "file0.txt"
+        assert isinstance(results[1], resilient.SimpleHTTPException)
+        assert results[2]["name"] == "file1.txt"
+
+    def test_artifact_files(self, mock_client, files):
+        mock_client.mock_adapter.register_uri("POST", ORG_URL + "/incidents/2095/artifacts/files", json=read_upload)
+        results = mock_client.post_artifact_files("/incidents/2095/artifacts/files", "Malware Sample", files[:2],
+                                                  description="extracted")
+        assert [result["name"] for result in results] == ["file0.txt", "file1.txt"]
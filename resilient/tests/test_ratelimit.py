@@ -0,0 +1,76 @@
+# (c) Copyright IBM Corp. 2010, 2017. All Rights Reserved.
+""" Tests for client-side rate limits """
+from __future__ import print_function
+import pytest
+from resilient.ratelimit import RateLimiter, TokenBucket, parse_rates
+
+ORG_URL = "https://resilient.example.com/rest/orgs/201"
+
+
+class FakeClock(object):
+    """A timer whose sleep just moves the time forward"""
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestRateLimiter:
+    def test_token_bucket(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, burst=2, timer=clock)
+        assert [bucket.reserve() for _ in range(4)] == [0, 0, 0.5, 1.0]
+        clock.now = 10
+        assert bucket.reserve() == 0
+
+    def test_queued_callers_wait_their_turn(self):
+        clock = FakeClock()
+        limiter = RateLimiter(5, burst=1, sleep=clock.sleep, timer=clock)
+        for _ in range(6):
+            limiter.acquire("GET", ORG_URL + "/incidents")
+        # 6 requests at 5 per second take a second, evenly spaced
+        assert clock.now == pytest.approx(1.0)
+        stats = limiter.stats()["all"]
+        assert stats["requests"] == 6
+        assert stats["waited"] == 5
+        assert stats["wait_time"] == pytest.approx(1.0)
+
+    def test_per_class(self):
+        clock = FakeClock()
+        limiter = RateLimiter("write:1", burst=1, sleep=clock.sleep, timer=clock)
+        for _ in range(3):
+            limiter.acquire("GET", ORG_URL + "/incidents/1")
+        assert clock.sleeps == []
+        limiter.acquire("PUT", ORG_URL + "/incidents/1")
+        limiter.acquire("PUT", ORG_URL + "/incidents/1")
+        assert clock.sleeps == [1.0]
+        assert list(limiter.stats()) == ["write"]
+
+    def test_invalid_class(self):
+        with pytest.raises(ValueError):
+            parse_rates("reads:10")
+
+    def test_invalid_rate(self):
+        for rates in ("read:0", "write:-1", 0, {"search": 0}):
+            with pytest.raises(ValueError) as exc:
+                RateLimiter(rates)
+        assert "search" in str(exc.value)
+        with pytest.raises(ValueError):
+            RateLimiter("read:5", burst=0)
+        with pytest.raises(ValueError):
+            TokenBucket(rate=0)
+
+    def test_client(self, mock_client):
+        clock = FakeClock()
+        mock_client.rate_limiter = RateLimiter("read:2", burst=1, sleep=clock.sleep, timer=clock)
+        mock_client.mock_adapter.register_uri("GET", ORG_URL + "/incidents/1", json={"id": 1})
+        for _ in range(3):
+            mock_client.get("/incidents/1")
+        assert clock.sleeps == [0.5, 0.5]
+        assert mock_client.get_rate_limit_stats()["read"]["waited"] == 2
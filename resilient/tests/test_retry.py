@@ -0,0 +1,112 @@
+# (c) Copyright IBM Corp. 2010, 2017. All Rights Reserved.
+""" Tests for retries of failed requests and update conflicts """
+from __future__ import print_function
+import pytest
+import requests
+import resilient
+from resilient.retry import RetryPolicy
+
+ORG_URL = "https://resilient.example.com/rest/orgs/201"
+
+
+@pytest.fixture
+def sleeps(mock_client):
+    """Use a retry policy that records its waits instead of sleeping"""
+    waits = []
+    mock_client.retry_policy = RetryPolicy(max_attempts=3, backoff=1, max_conflict_attempts=3, sleep=waits.append)
+    return waits
+
+
+class TestRetryPolicy:
+    def test_backoff_is_bounded(self):
+        policy = RetryPolicy(backoff=1, max_backoff=5)
+        for retry_number in range(1, 10):
+            delay = policy.backoff_delay(retry_number)
+            assert 0 <= delay <= min(5, 2 ** (retry_number - 1))
+
+    def test_deadline(self):
+        now = [0]
+        policy = RetryPolicy(max_attempts=10, backoff=1, deadline=5, timer=lambda: now[0])
+        retry = policy.begin()
+        assert retry.next_delay() is not None
+        now[0] = 6
+        assert retry.next_delay() is None
+        assert policy.stats() == {"retries": 1, "conflict_retries": 0, "gave_up": 1}
+
+    def test_only_idempotent_methods(self):
+        policy = RetryPolicy()
+        response = requests.Response()
+        response.status_code = 503
+        assert policy.is_retryable("get", response=response)
+        assert not policy.is_retryable("post", response=response)
+        assert policy.is_retryable("DELETE", exception=requests.exceptions.ConnectionError())
+        assert not policy.is_retryable("GET", exception=ValueError())
+
+
+class TestClientRetry:
+    def test_get_retries_unavailable(self, mock_client, sleeps):
+        mock_client.mock_adapter.register_uri("GET", ORG_URL + "/incidents/1",
+                                              [{"status_code": 503, "text": "maintenance"},
+                                               {"json": {"id": 1}}])
+        assert mock_client.get("/incidents/1") == {"id": 1}
+        assert len(sleeps) == 1
+        assert mock_client.get_retry_stats()["retries"] == 1
+
+    def test_retried_response_is_closed(self, mock_client, sleeps, monkeypatch):
+        closed = []
+        monkeypatch.setattr(requests.Response, "close", lambda response: closed.append(response.status_code))
+        mock_client.mock_adapter.register_uri("GET", ORG_URL + "/incidents/1",
+                                              [{"status_code": 503, "text": "maintenance"},
+                                               {"json": {"id": 1}}])
+        assert mock_client.get("/incidents/1") == {"id": 1}
+        assert 503 in closed
+
+    def test_get_retries_connection_error(self, mock_client, sleeps):
+        mock_client.mock_adapter.register_uri("GET", ORG_URL + "/incidents/1",
+                                              [{"exc": requests.exceptions.ConnectionError},
+                                               {"json": {"id": 1}}])
+        assert mock_client.get("/incidents/1") == {"id": 1}
+
+    def test_get_gives_up(self, mock_client, sleeps):
+        mock_client.mock_adapter.register_uri("GET", ORG_URL + "/incidents/1",
+                                              status_code=503, text="maintenance")
+        with pytest.raises(resilient.SimpleHTTPException):
+            mock_client.get("/incidents/1")
+        assert mock_client.mock_adapter.call_count == 4  # connect, and 3 attempts
+        assert mock_client.get_retry_stats()["gave_up"] == 1
+
+    def test_post_is_not_retried(self, mock_client, sleeps):
+        mock_client.mock_adapter.register_uri("POST", ORG_URL + "/incidents",
+                                              [{"status_code": 503, "text": "maintenance"},
+                                               {"json": {"id": 1}}])
+        with pytest.raises(resilient.SimpleHTTPException):
+            mock_client.post("/incidents", {"name": "test"})
+        assert sleeps == []
+
+    def test_get_put_conflicts_are_bounded(self, mock_client, sleeps):
+        mock_client.mock_adapter.register_uri("GET", ORG_URL + "/incidents/1", json={"id": 1, "vers": 1})
+        mock_client.mock_adapter.register_uri("PUT", ORG_URL + "/incidents/1", status_code=409, text="conflict")
+
+        def apply_func(incident):
+            incident["name"] = "updated"
+
+        with pytest.raises(resilient.SimpleHTTPException):
+            mock_client.get_put("/incidents/1", apply_func)
+        assert len(sleeps) == 2
+        assert mock_client.get_retry_stats()["conflict_retries"] == 2
+
+    def test_get_put_conflict_then_success(self, mock_client, sleeps):
+        mock_client.mock_adapter.register_uri("GET", ORG_URL + "/incidents/1", json={"id": 1, "vers": 1})
+        mock_client.mock_adapter.register_uri("PUT", ORG_URL + "/incidents/1",
+                                              [{"status_code": 409, "text": "conflict"},
+                                               {"json": {"id": 1, "vers": 2}}])
+        assert mock_client.get_put("/incidents/1", lambda incident: None) == {"id": 1, "vers": 2}
+        assert len(sleeps) == 1
+
+    def test_patch_conflicts_are_bounded(self, mock_client, sleeps):
+        mock_client.mock_adapter.register_uri("PATCH", ORG_URL + "/incidents/1", status_code=409, text="conflict")
+        patch = resilient.Patch({"name": "old"})
+        patch.add_value("name", "new")
+        with pytest.raises(resilient.SimpleHTTPException):
+            mock_client.patch("/incidents/1", patch)
+        assert len(sleeps) == 2
@@ -0,0 +1,54 @@
+# (c) Copyright IBM Corp. 2010, 2017. All Rights Reserved.
+""" Tests for sharing a SimpleClient between threads """
+from __future__ import print_function
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_URL = "https://resilient.example.com"
+ORG_URL = BASE_URL + "/rest/orgs/201"
+
+
+class TestThreadSafe:
+    def test_single_reauth(self, mock_client):
+        """When the session expires, only one of the threads re-authenticates"""
+        lock = threading.Lock()
+        server = {"session": 1}
+
+        def new_session(request, context):
+            with lock:
+                server["session"] += 1
+                context.cookies["JSESSIONID"] = "session{0}".format(server["session"])
+            time.sleep(0.05)
+            return {"orgs": [{"name": "Test Org", "id": 201, "enabled": True}],
+                    "csrf_token": "token{0}".format(server["session"]),
+                    "user_id": 1,
+                    "session_ip": "127.0.0.1"}
+
+        def get_incident(request, context):
+            with lock:
+                expected = "session{0}".format(server["session"])
+                csrf = "token{0}".format(server["session"])
+            time.sleep(0.05)
+            if "JSESSIONID={0}".format(expected) not in request.headers.get("Cookie", "") or \
+                    request.headers.get("X-sess-id") != csrf:
+                context.status_code = 401
+                return {}
+            return {"id": 1}
+
+        mock_client.mock_adapter.register_uri("POST", BASE_URL + "/rest/session", json=new_session)
+        mock_client.mock_adapter.register_uri("GET", ORG_URL + "/incidents/1", json=get_incident)
+
+        # The fixture's session is not valid on this server, so all the threads get a 401
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: mock_client.get("/incidents/1"), range(8)))
+        assert results == [{"id": 1}] * 8
+        assert server["session"] == 2
+        assert mock_client.cookies == {"JSESSIONID": "session2"}
+
+    def test_cached_get(self, mock_client):
+        mock_client.mock_adapter.register_uri("GET", ORG_URL + "/types/incident/fields", json=[])
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: mock_client.cached_get("/types/incident/fields"), range(50)))
+        assert results == [[]] * 50
+        assert "/types/incident/fields" in mock_client.cache